@@ -0,0 +1,279 @@
+"""Benchmarks for the scraper hot paths on fixed synthetic inputs
+
+    python benchmarks/bench_wsb.py --output results.json
+    python benchmarks/bench_wsb.py --save-baseline benchmarks/baseline.json
+    python benchmarks/bench_wsb.py --baseline benchmarks/baseline.json
+
+Runs fully offline: the scraper is built from an empty replay cassette and
+quotes are fetched from a local mock server. With --baseline, any benchmark
+slower than the baseline by more than --threshold is flagged and the exit
+status is 1.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from wsb_analysis import analyze_quotes
+from wsb_cassette import CASSETTE_VERSION, Cassette
+from wsb_records import Quote
+from wsb_scraper import WSBScraper
+
+SEED = 42
+
+WORDS = ('the', 'calls', 'puts', 'moon', 'yolo', 'bought', 'sold', 'earnings', 'this', 'week',
+         'going', 'to', 'print', 'tendies', 'apes', 'hold', 'my', 'wife', 'boyfriend', 'loss', 'not',
+         '🚀', '🌈🐻', 'crash', 'squeeze',
+         'I', 'AM', 'NOT', 'A', 'CEO', 'DD', 'WSB', 'FOR', 'AND', 'ALL', 'IN', 'OPEN', 'NOW')
+UNKNOWN_CAPS = ('ZXQ', 'BLAH', 'MOASS', 'FOMO', 'TLDR', 'IMHO', 'EDIT', 'LMAO')
+QUOTE_TICKERS = ['TSLA', 'AAPL', 'NVDA', 'GOOGL', 'MSFT', 'GME', 'AMC', 'PLTR'] * 8
+
+
+def synthetic_texts(count, words_per_text, tickers, seed=SEED, positions=0.0):
+    """Reddit-like text mixing words, known tickers, cashtags and noise
+
+    With positions > 0, that share of the standalone tickers is followed by
+    an options position such as "450p 6/21" or "30c 0DTE".
+    """
+    rng = random.Random(seed)
+    texts = []
+    for _ in range(count):
+        tokens = []
+        for _ in range(words_per_text):
+            roll = rng.random()
+            if roll < 0.05:
+                tokens.append('$' + rng.choice(tickers))
+            elif roll < 0.12:
+                tokens.append(rng.choice(tickers))
+                if positions and rng.random() < positions:
+                    tokens.append(f"{rng.randint(1, 500)}{rng.choice('cp')} "
+                                  f"{rng.choice(('6/21', '0DTE', '12/19/25', 'x5'))}")
+            elif roll < 0.15:
+                tokens.append(rng.choice(UNKNOWN_CAPS))
+            else:
+                tokens.append(rng.choice(WORDS))
+        texts.append(' '.join(tokens))
+    return texts
+
+
+def synthetic_swaggy_html(tickers, rows=100, seed=SEED):
+    """SwaggyStocks-like sentiment table"""
+    rng = random.Random(seed)
+    body = ''.join(
+        f"<tr><td>{rng.choice(tickers)}</td><td>{rng.randint(10, 5000)}</td>"
+        f"<td><span>{rng.choice(('Bullish', 'Bearish', 'Neutral'))}</span></td></tr>"
+        for _ in range(rows))
+    return f"<html><body><div><h1>Ticker Sentiment</h1><table>{body}</table></div></body></html>".encode()
+
+
+def synthetic_quotes(count, seed=SEED):
+    rng = random.Random(seed)
+    return [Quote(f"T{i % 1000}", rng.uniform(1, 500), rng.uniform(1, 500), rng.uniform(-10, 10),
+                  volume=rng.randint(10_000, 50_000_000), source='yahoo')
+            for i in range(count)]
+
+
+class MockQuoteServer:
+    """Local Yahoo chart API stand-in with fixed per-request latency"""
+
+    def __init__(self, latency):
+        latency_seconds = latency
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                time.sleep(latency_seconds)
+                body = json.dumps({'chart': {'result': [{'meta': {
+                    'regularMarketPrice': 123.45,
+                    'previousClose': 120.0,
+                    'regularMarketVolume': 1_000_000,
+                }}]}}).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/chart"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+
+
+def make_scraper(workdir):
+    """Build a WSBScraper with no credentials from an empty replay cassette"""
+    # Keep the benchmarks away from the on-disk price and mention history
+    os.environ['PRICE_HISTORY_DIR'] = ''
+    os.environ['MENTION_HISTORY_DB'] = ''
+    os.environ['SNAPSHOT_DB'] = ''
+    path = os.path.join(workdir, 'empty_cassette.json')
+    with open(path, 'w') as f:
+        json.dump({'version': CASSETTE_VERSION, 'settings': {}, 'interactions': []}, f)
+    return WSBScraper(cassette=Cassette(path, 'replay'))
+
+
+def measure(fn, repeat):
+    """Median and best wall time of fn over repeat runs"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings), min(timings)
+
+
+def run_benchmarks(args):
+    workdir = tempfile.mkdtemp(prefix='wsb_bench_')
+    scraper = make_scraper(workdir)
+    tickers = sorted(scraper.known_tickers)
+    comment_count = 100_000 if args.quick else 1_000_000
+    benchmarks = []
+
+    # Ticker extraction from Reddit text
+    for name, count, words in (('extract_30_posts', 30, 200),
+                               ('extract_10k_posts', 10_000, 200),
+                               (f'extract_{comment_count // 1000}k_comments', comment_count, 25)):
+        texts = synthetic_texts(count, words, tickers)
+        benchmarks.append((name, count, 1 if count >= 100_000 else args.repeat,
+                           lambda texts=texts: scraper.extractor.count_mentions(texts)))
+
+    # The same with options positions parsed, on comments where a tenth of
+    # the ticker mentions quote one (the rest have no digits to scan for)
+    texts = synthetic_texts(comment_count, 25, tickers, positions=0.1)
+    benchmarks.append((f'extract_{comment_count // 1000}k_comments_options', comment_count, 1,
+                       lambda texts=texts: scraper.extractor.count_mentions(texts, options={})))
+
+    # Lexicon sentiment around each counted mention
+    texts = synthetic_texts(10_000, 200, tickers)
+    spans = []
+    scraper.extractor.count_mentions(texts, spans=spans)
+    benchmarks.append(('sentiment_10k_posts', len(texts), args.repeat,
+                       lambda: scraper.sentiment_scorer.score_texts(texts, spans)))
+
+    html = synthetic_swaggy_html(tickers)
+    benchmarks.append(('parse_swaggy_html', 1, args.repeat, lambda: scraper.parse_swaggy_html(html, {})))
+
+    quotes = synthetic_quotes(10_000)
+    benchmarks.append(('analyze_ticker_1k', 1000, args.repeat,
+                       lambda: [scraper.analyze_ticker(q) for q in quotes[:1000]]))
+    benchmarks.append(('analyze_quotes_10k', len(quotes), args.repeat, lambda: analyze_quotes(quotes)))
+    benchmarks.append(('create_email_content', 1, args.repeat * 10,
+                       lambda: scraper.create_email_content(quotes[:8])))
+
+    results = {}
+    for name, items, repeat, fn in benchmarks:
+        if args.only and args.only not in name:
+            continue
+        median, best = measure(fn, repeat)
+        results[name] = {'items': items, 'repeat': repeat, 'median_seconds': median,
+                         'best_seconds': best, 'items_per_second': items / median if median else None}
+        print(f"{name:32s} {median * 1000:10.2f} ms  {items / median:14.0f} items/s")
+
+    # Quote fetching against the local mock server
+    server = MockQuoteServer(args.quote_latency)
+    scraper.http = requests
+    scraper.alpha_key = None
+    scraper.yahoo_chart_url = server.url
+    try:
+        for workers in (1, 4, 16):
+            name = f'quotes_concurrency_{workers}'
+            if args.only and args.only not in name:
+                continue
+
+            def fetch_all():
+                with ThreadPoolExecutor(max_workers=workers) as pool:
+                    list(pool.map(scraper.get_stock_data, QUOTE_TICKERS))
+
+            median, best = measure(fetch_all, max(1, args.repeat // 2))
+            results[name] = {'items': len(QUOTE_TICKERS), 'repeat': max(1, args.repeat // 2),
+                             'median_seconds': median, 'best_seconds': best,
+                             'items_per_second': len(QUOTE_TICKERS) / median}
+            print(f"{name:32s} {median * 1000:10.2f} ms  {len(QUOTE_TICKERS) / median:14.0f} quotes/s")
+    finally:
+        server.close()
+
+    return {
+        'meta': {
+            'timestamp': datetime.now().isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'quick': args.quick,
+            'quote_latency': args.quote_latency,
+        },
+        'results': results,
+    }
+
+
+def compare(results, baseline, threshold):
+    """Print the comparison with a baseline and return the regressed benchmarks"""
+    regressions = []
+    for key in ('python', 'platform'):
+        if baseline['meta'].get(key) != results['meta'][key]:
+            print(f"Warning: the baseline was recorded on {key} {baseline['meta'].get(key)}, "
+                  f"not {results['meta'][key]}; timings may not compare")
+    print(f"\n{'benchmark':32s} {'baseline':>12s} {'current':>12s} {'change':>8s}")
+    for name, current in results['results'].items():
+        previous = baseline['results'].get(name)
+        if not previous:
+            continue
+        change = current['median_seconds'] / previous['median_seconds'] - 1
+        flag = ''
+        if change > threshold:
+            regressions.append(name)
+            flag = '  REGRESSION'
+        print(f"{name:32s} {previous['median_seconds'] * 1000:10.2f}ms {current['median_seconds'] * 1000:10.2f}ms "
+              f"{change:+7.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the WSB scraper hot paths")
+    parser.add_argument('--output', help="write results JSON to this file")
+    parser.add_argument('--baseline', help="compare against a stored baseline JSON")
+    parser.add_argument('--save-baseline', metavar='PATH', help="store these results as the new baseline")
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help="slowdown ratio flagged as a regression (default: 0.2 = 20%%)")
+    parser.add_argument('--repeat', type=int, default=5, help="runs per benchmark (default: 5)")
+    parser.add_argument('--quote-latency', type=float, default=0.02,
+                        help="mock quote server latency in seconds (default: 0.02)")
+    parser.add_argument('--quick', action='store_true', help="use 100k instead of 1M comments")
+    parser.add_argument('--only', help="run only benchmarks whose name contains this text")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args)
+
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, 'w') as f:
+                json.dump(results, f, indent=2)
+            print(f"Results written to {path}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}")
+            sys.exit(1)
+        print("\nNo regressions")
+
+
+if __name__ == "__main__":
+    main()
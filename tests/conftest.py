@@ -0,0 +1,44 @@
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from wsb_cassette import CASSETTE_VERSION, Cassette  # noqa: E402
+
+
+class FakePost:
+    def __init__(self, title, selftext=''):
+        self.title = title
+        self.selftext = selftext
+
+
+class FakeReddit:
+    """praw.Reddit stand-in serving fixed hot posts per subreddit"""
+
+    def __init__(self, posts):
+        self.posts = posts
+
+    def subreddit(self, name):
+        posts = self.posts.get(name, [])
+
+        class Subreddit:
+            def hot(self, limit):
+                return [FakePost(title) for title in posts[:limit]]
+
+        return Subreddit()
+
+
+@pytest.fixture
+def scraper(tmp_path, monkeypatch):
+    """WSBScraper with no credentials, no on-disk stores and an empty replay cassette"""
+    for name in ('PRICE_HISTORY_DIR', 'MENTION_HISTORY_DB', 'SNAPSHOT_DB', 'CHECKPOINT_DIR', 'EXPORT_SINKS',
+                 'JOB_QUEUE_DB', 'SUBSCRIBERS_FILE', 'METRICS_DIR', 'RUN_ID', 'REPORT_MARKDOWN_FILE',
+                 'GITHUB_STEP_SUMMARY', 'ALPHA_VANTAGE_API_KEY'):
+        monkeypatch.setenv(name, '')
+    path = tmp_path / 'empty_cassette.json'
+    path.write_text(json.dumps({'version': CASSETTE_VERSION, 'settings': {}, 'interactions': []}))
+    from wsb_scraper import WSBScraper
+    return WSBScraper(cassette=Cassette(str(path), 'replay'))
@@ -0,0 +1,56 @@
+import math
+
+import pandas as pd
+import pytest
+
+from wsb_analysis import analysis_by_ticker, analyze_quote, analyze_quotes
+from wsb_records import Quote
+
+QUOTES = [
+    Quote('AAA', 3.0, 2.5, 20.0, volume=1000),
+    Quote('BBB', 15.0, 14.5, 3.4),
+    Quote('CCC', 40.0, 40.5, -1.2, volume=10),
+    Quote('DDD', 120.0, 130.0, -7.7, volume=5),
+    Quote('EEE', 80.0, 82.0, -3.0, volume=0),
+    Quote.missing('FFF'),
+]
+INDICATORS = pd.DataFrame({
+    'realized_vol': [120.0, 45.0, 10.0],
+    'atr_pct': [2.0, 4.0, 0.5],
+    'relative_volume': [2.5, 0.8, 1.0],
+    'unusual_activity': [True, False, False],
+    'bullish_ratio': [0.75, 0.2, 0.5],
+}, index=['AAA', 'BBB', 'CCC'])
+# Known tickers whose indicators could not be computed
+NAN_INDICATORS = pd.concat([INDICATORS, pd.DataFrame({
+    'realized_vol': [math.nan, None],
+    'atr_pct': [math.nan, 0.0],
+    'relative_volume': [math.nan, None],
+    'unusual_activity': [math.nan, None],
+    'bullish_ratio': [math.nan, math.nan],
+}, index=['DDD', 'EEE'])])
+
+
+def same(a, b):
+    return a == b or (isinstance(a, float) and isinstance(b, float) and math.isnan(a) and math.isnan(b))
+
+
+@pytest.mark.parametrize('indicators', [None, INDICATORS, NAN_INDICATORS])
+def test_single_quote_analysis_matches_the_batch(indicators):
+    batch = analysis_by_ticker(analyze_quotes(QUOTES, indicators))
+    for quote in QUOTES:
+        values = {}
+        if indicators is not None and quote.ticker in indicators.index:
+            values = indicators.loc[quote.ticker].to_dict()
+        single = analyze_quote(quote, values)
+        expected = {key: value for key, value in batch[quote.ticker].items() if key != 'change_zscore'}
+        if indicators is not None and quote.ticker not in indicators.index:
+            expected = {key: value for key, value in expected.items() if key not in ('bullish_ratio',)}
+        for key, value in expected.items():
+            assert same(single[key], value), (quote.ticker, key, single[key], value)
+
+
+def test_nan_indicators_are_not_known():
+    row = analyze_quote(QUOTES[3], NAN_INDICATORS.loc['DDD'].to_dict())
+    assert row['unusual_activity'] is False
+    assert row['risk'] == analyze_quote(QUOTES[3])['risk']
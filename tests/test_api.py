@@ -0,0 +1,112 @@
+import asyncio
+import http.client
+import json
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from wsb_api import ApiCache, ApiServer, build_documents
+from wsb_records import Quote
+
+QUOTES = [Quote('GME', 25.0, 20.0, 25.0), Quote('TSLA', 190.0, 200.0, -5.0)]
+ANALYSIS = {'GME': {'momentum': 'up', 'realized_vol': np.float64('nan')}}
+
+
+@pytest.fixture
+def api():
+    """(cache, connect) for an ApiServer on an ephemeral port in a background loop"""
+    cache = ApiCache()
+    cache.refresh(build_documents(datetime(2025, 6, 2, 9, 30), QUOTES, ANALYSIS))
+    server = ApiServer(cache, port=0)
+    loop = asyncio.new_event_loop()
+    task = loop.create_task(server.serve())
+
+    def run():
+        try:
+            loop.run_until_complete(task)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            loop.close()
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    for _ in range(100):
+        if server.port:
+            break
+        time.sleep(0.01)
+
+    connections = []
+
+    def connect():
+        connection = http.client.HTTPConnection('127.0.0.1', server.port, timeout=5)
+        connections.append(connection)
+        return connection
+
+    yield cache, connect
+    for connection in connections:
+        connection.close()
+    loop.call_soon_threadsafe(task.cancel)
+    thread.join(5)
+
+
+def get(connection, path, **headers):
+    connection.request('GET', path, headers=headers)
+    response = connection.getresponse()
+    return response, response.read()
+
+
+def test_routes_serve_the_documents(api):
+    _, connect = api
+    connection = connect()
+
+    response, body = get(connection, '/')
+    assert response.status == 200
+    assert json.loads(body)['endpoints'] == ['/health', '/mentions', '/rankings', '/tickers/GME', '/tickers/TSLA', '/']
+
+    # Keep-alive: the same connection serves the next requests
+    response, body = get(connection, '/rankings')
+    rankings = json.loads(body)['tickers']
+    assert [row['ticker'] for row in rankings] == ['GME', 'TSLA']
+    # NaN is served as null
+    assert rankings[0]['analysis'] == {'momentum': 'up', 'realized_vol': None}
+
+    response, body = get(connection, '/tickers/TSLA/')
+    assert response.getheader('Content-Type') == 'application/json'
+    assert json.loads(body)['ranking']['rank'] == 2
+
+
+def test_unknown_paths_and_methods_are_errors(api):
+    _, connect = api
+    connection = connect()
+    response, body = get(connection, '/tickers/ZZZZ')
+    assert response.status == 404
+    assert json.loads(body) == {'error': 'not found'}
+
+    connection.request('POST', '/rankings', body=b'{}')
+    response = connection.getresponse()
+    response.read()
+    assert response.status == 405
+
+
+def test_etags_follow_the_content(api):
+    cache, connect = api
+    connection = connect()
+    response, _ = get(connection, '/rankings')
+    etag = response.getheader('ETag')
+    assert etag.startswith('"') and etag.endswith('"')
+
+    response, body = get(connection, '/rankings', **{'If-None-Match': etag})
+    assert (response.status, body) == (304, b'')
+    assert response.getheader('ETag') == etag
+
+    # The same documents give the same ETag; new content a new one
+    cache.refresh(build_documents(datetime(2025, 6, 2, 9, 30), QUOTES, ANALYSIS))
+    assert get(connection, '/rankings', **{'If-None-Match': etag})[0].status == 304
+    cache.refresh(build_documents(datetime(2025, 6, 2, 9, 30), QUOTES[::-1], ANALYSIS))
+    response, _ = get(connection, '/rankings', **{'If-None-Match': etag})
+    assert response.status == 200
+    assert response.getheader('ETag') != etag
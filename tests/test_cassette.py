@@ -0,0 +1,111 @@
+import json
+
+import pytest
+
+import wsb_scraper
+from conftest import FakeReddit
+from wsb_cassette import Cassette, CassetteMiss, InjectedFailure
+from wsb_pipeline import ScrapeQuotePipeline
+
+POSTS = {
+    'wallstreetbets': ['GME calls', 'GME to the moon', '$AMC squeeze', 'TSLA earnings', 'TSLA puts', 'PLTR PLTR'],
+    'stocks': ['GME is back', 'AMC AMC', 'TSLA delivery numbers', 'PLTR margins'],
+}
+SWAGGY_HTML = ("<html><body><table><tr><td>GME</td><td>120</td><td>Bullish</td></tr>"
+               "<tr><td>NVDA</td><td>80</td><td>Bearish</td></tr></table></body></html>")
+
+
+class FakeResponse:
+    def __init__(self, body, status_code=200):
+        self.status_code = status_code
+        self.text = body if isinstance(body, str) else json.dumps(body)
+        self.content = self.text.encode()
+
+    def json(self):
+        return json.loads(self.text)
+
+
+class FakeHttp:
+    """SwaggyStocks, Alpha Vantage and Yahoo stand-in with fixed answers"""
+
+    def get(self, url, **kwargs):
+        if 'swaggystocks' in url:
+            return FakeResponse(SWAGGY_HTML)
+        ticker = url.rsplit('=', 1)[-1] if 'alphavantage' in url else url.rsplit('/', 1)[-1]
+        price = 10.0 + sum(map(ord, ticker)) % 90
+        if 'alphavantage' in url:
+            # Alpha Vantage only knows some tickers; Yahoo has the rest
+            if ticker.startswith(('G', 'T')):
+                return FakeResponse({'Global Quote': {'05. price': str(price), '08. previous close': str(price - 1),
+                                                      '10. change percent': '1.5%', '06. volume': '1000'}})
+            return FakeResponse({})
+        return FakeResponse({'chart': {'result': [{'meta': {
+            'regularMarketPrice': price, 'previousClose': price + 2, 'regularMarketVolume': 5000}}]}})
+
+
+@pytest.fixture
+def recorded(scraper, tmp_path, monkeypatch):
+    """Path of a cassette recorded from a scrape of POSTS with an Alpha Vantage key"""
+    monkeypatch.setenv('SUBREDDITS', 'wallstreetbets:1,stocks:0.5')
+    path = str(tmp_path / 'recorded.json')
+    cassette = Cassette(path, 'record')
+    scraper.subreddits = {'wallstreetbets': 1.0, 'stocks': 0.5}
+    scraper.http, scraper.reddit, scraper.gmail_service = FakeHttp(), FakeReddit(POSTS), None
+    scraper.alpha_key = 'SECRET-KEY'
+    # Record in a fixed order too, so the replay can be compared with it
+    monkeypatch.setattr(wsb_scraper, 'ScrapeQuotePipeline',
+                        lambda scraper, **kwargs: ScrapeQuotePipeline(scraper, quote_delay=0, overlap=False))
+    scraper.cassette = cassette
+    cassette.attach(scraper)
+    scraper.recorded_result = scrape(scraper)
+    cassette.save()
+    return path
+
+
+def scrape(scraper):
+    quotes, mentions, attempted = scraper._scrape_and_price()
+    return ([quote.to_dict() for quote in quotes], [mention.to_dict() for mention in mentions], attempted,
+            {ticker: tally.to_dict() for ticker, tally in scraper.reddit_sentiment.items()})
+
+
+def replay(path, **options):
+    return scrape(wsb_scraper.WSBScraper(cassette=Cassette(path, 'replay', **options)))
+
+
+def test_replays_are_identical(recorded):
+    assert replay(recorded) == replay(recorded)
+    # With failures injected, the same seed fails the same interactions
+    assert replay(recorded, failure_rate=0.3, seed=7) == replay(recorded, failure_rate=0.3, seed=7)
+
+
+def test_replay_gives_the_recorded_result(scraper, recorded):
+    assert replay(recorded) == scraper.recorded_result
+
+
+def test_api_keys_are_redacted(recorded):
+    with open(recorded) as f:
+        text = f.read()
+    assert 'SECRET-KEY' not in text
+    assert 'apikey=REDACTED' in text
+
+
+def test_failure_injection_follows_the_seed(recorded):
+    def failures(seed):
+        cassette = Cassette(recorded, 'replay', failure_rate=0.5, seed=seed)
+        outcomes = []
+        for _ in range(20):
+            try:
+                cassette.next('reddit', 'wallstreetbets/hot/30')
+                outcomes.append(True)
+            except InjectedFailure:
+                outcomes.append(False)
+        return outcomes
+
+    assert failures(1) == failures(1)
+    assert failures(1) != failures(2)
+    assert True in failures(1) and False in failures(1)
+
+
+def test_unrecorded_interactions_miss(recorded):
+    with pytest.raises(CassetteMiss):
+        Cassette(recorded, 'replay').next('http', 'https://example.com/never-recorded')
@@ -0,0 +1,103 @@
+import pytest
+
+from wsb_checkpoint import RunCheckpoint, send_results
+from wsb_records import Mention, Quote
+
+
+def test_saved_stages_load_back_under_the_same_run_id(tmp_path):
+    RunCheckpoint(str(tmp_path), '2024-01-02-daily').save('quotes', [{'ticker': 'GME'}])
+    checkpoint = RunCheckpoint(str(tmp_path), '2024-01-02-daily')
+    assert checkpoint.completed() == ['quotes']
+    assert checkpoint.load('quotes') == [{'ticker': 'GME'}]
+    assert checkpoint.load('send') is None
+    assert RunCheckpoint(str(tmp_path), '2024-01-02-close').completed() == []
+
+
+def use_checkpoints(scraper, monkeypatch, tmp_path, sends):
+    """Scrape one quote and record every send attempt, failing the first"""
+    scraper.cassette = None
+    scraper.checkpoint_dir = str(tmp_path / 'checkpoints')
+    scrapes = []
+
+    def scrape_and_price():
+        scrapes.append(1)
+        return [Quote('GME', 20.0, 18.0, 11.1, volume=1000, source='yahoo')], [Mention('GME', 'reddit', 5.0)], ['GME']
+
+    def send_email(html, subject=None, text=None):
+        sends.append(html)
+        return len(sends) > 1
+
+    monkeypatch.setattr(scraper, '_scrape_and_price', scrape_and_price)
+    monkeypatch.setattr(scraper, 'send_email', send_email)
+    return scrapes
+
+
+def test_rerun_with_the_same_run_id_resumes_after_the_failed_send(scraper, monkeypatch, tmp_path):
+    sends = []
+    scrapes = use_checkpoints(scraper, monkeypatch, tmp_path, sends)
+    scraper.run_daily_scrape(run_id='retry-me')
+    quotes = scraper.run_daily_scrape(run_id='retry-me')
+
+    assert len(scrapes) == 1
+    assert [q.ticker for q in quotes] == ['GME']
+    assert len(sends) == 2 and sends[0] == sends[1]
+    assert RunCheckpoint(str(tmp_path / 'checkpoints'), 'retry-me').load('send') == {scraper.email_to: {'ok': True}}
+
+
+def test_runs_without_a_run_id_never_share_checkpoints(scraper, monkeypatch, tmp_path):
+    sends = []
+    scrapes = use_checkpoints(scraper, monkeypatch, tmp_path, sends)
+    scraper.run_daily_scrape()
+    scraper.run_daily_scrape()
+
+    assert len(scrapes) == 2
+    assert len(list((tmp_path / 'checkpoints').iterdir())) == 2
+
+
+def test_send_checkpoints_of_either_form_load_per_recipient():
+    assert send_results(None, 'me@x.com') == {}
+    assert send_results({'ok': False}, 'me@x.com') == {'me@x.com': {'ok': False}}
+    results = {'me@x.com': {'ok': True, 'message_id': 'm1', 'error': None, 'attempts': 1}}
+    assert send_results(results, 'other@x.com') == results
+
+
+@pytest.mark.parametrize('saved, resent', [
+    ({'ok': True}, False),
+    ({'ok': False}, True),
+    ({'replay@localhost': {'ok': True}, 'b@x.com': {'ok': False}}, False),
+    ({'replay@localhost': {'ok': False}, 'b@x.com': {'ok': True}}, True),
+])
+def test_single_report_resumes_from_either_send_form(scraper, monkeypatch, tmp_path, saved, resent):
+    sends = []
+    use_checkpoints(scraper, monkeypatch, tmp_path, sends)
+    scraper.run_daily_scrape(run_id='resume')
+    checkpoint = RunCheckpoint(str(tmp_path / 'checkpoints'), 'resume')
+    checkpoint.save('send', saved)
+    attempts = len(sends)
+
+    scraper.run_daily_scrape(run_id='resume')
+    assert len(sends) - attempts == int(resent)
+    assert send_results(checkpoint.load('send'), scraper.email_to)[scraper.email_to]['ok']
+
+
+@pytest.mark.parametrize('saved, skipped', [
+    ({'ok': True}, {'replay@localhost'}),
+    ({'ok': False}, set()),
+    ({'replay@localhost': {'ok': False}, 'b@x.com': {'ok': True}}, {'b@x.com'}),
+])
+def test_subscriber_reports_resume_from_either_send_form(scraper, monkeypatch, tmp_path, saved, skipped):
+    use_checkpoints(scraper, monkeypatch, tmp_path, [])
+    scraper.subscribers_file = str(tmp_path / 'subscribers.json')
+    skips = []
+
+    def send_subscriber_reports(tickers_data, analysis=None, unusual=None, skip=()):
+        skips.append(set(skip))
+        return {email: {'ok': True} for email in ('replay@localhost', 'b@x.com') if email not in skip}
+
+    monkeypatch.setattr(scraper, 'send_subscriber_reports', send_subscriber_reports)
+    checkpoint = RunCheckpoint(str(tmp_path / 'checkpoints'), 'resume')
+    checkpoint.save('send', saved)
+    scraper.run_daily_scrape(run_id='resume')
+
+    assert skips == [skipped]
+    assert checkpoint.load('send') == {'replay@localhost': {'ok': True}, 'b@x.com': {'ok': True}}
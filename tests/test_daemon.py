@@ -0,0 +1,94 @@
+import asyncio
+import json
+import logging
+import threading
+from datetime import date, datetime, time
+
+import pytest
+import pytz
+
+from wsb_daemon import DaemonScheduler, MarketCalendar, ScheduledJob, parse_jobs
+
+UTC = pytz.utc
+NEW_YORK = pytz.timezone('America/New_York')
+
+
+@pytest.fixture
+def calendar(tmp_path):
+    """2025 calendar with Good Friday and Memorial Day as holidays"""
+    path = tmp_path / 'holidays.json'
+    path.write_text(json.dumps({'holidays': ['2025-04-18', '2025-05-26']}))
+    return MarketCalendar(str(path))
+
+
+def next_run(calendar, now, at='09:30', timezone=NEW_YORK):
+    job = ScheduledJob('daily', datetime.strptime(at, '%H:%M').time(), None)
+    return job.next_run(now, timezone, calendar)
+
+
+def test_weekends_and_holidays_are_skipped(calendar):
+    # Thursday after the trigger: Good Friday and the weekend are skipped
+    now = NEW_YORK.localize(datetime(2025, 4, 17, 10, 0))
+    assert next_run(calendar, now) == NEW_YORK.localize(datetime(2025, 4, 21, 9, 30))
+    # Friday evening before Memorial Day
+    now = NEW_YORK.localize(datetime(2025, 5, 23, 18, 0))
+    assert next_run(calendar, now).date() == date(2025, 5, 27)
+    # Before the trigger on a trading day: the same day
+    now = NEW_YORK.localize(datetime(2025, 5, 27, 9, 29))
+    assert next_run(calendar, now).date() == date(2025, 5, 27)
+
+
+def test_triggers_follow_the_scheduler_timezone(calendar):
+    # 09:30 in New York is 14:30 UTC before the DST change and 13:30 after it
+    now = UTC.localize(datetime(2025, 3, 7, 15, 0))
+    trigger = next_run(calendar, now)
+    assert trigger.astimezone(UTC) == UTC.localize(datetime(2025, 3, 10, 13, 30))
+    assert next_run(calendar, UTC.localize(datetime(2025, 3, 7, 14, 0))).astimezone(UTC).hour == 14
+
+    # Buenos Aires has no DST: 09:30 there is 12:30 UTC. Late on Monday in
+    # Buenos Aires is already Tuesday in UTC, which must not skip a day
+    buenos_aires = pytz.timezone('America/Argentina/Buenos_Aires')
+    now = UTC.localize(datetime(2025, 6, 3, 2, 0))
+    trigger = next_run(calendar, now, timezone=buenos_aires)
+    assert trigger.astimezone(UTC) == UTC.localize(datetime(2025, 6, 3, 12, 30))
+
+
+def test_a_job_is_skipped_while_another_runs(calendar, caplog):
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def slow():
+        calls.append('slow')
+        started.set()
+        release.wait(5)
+
+    scheduler = DaemonScheduler(calendar, 'America/New_York')
+    scheduler.add_job('daily', time(9, 30), slow)
+    scheduler.add_job('midday', time(12, 0), lambda: calls.append('midday'))
+    daily, midday = scheduler.jobs
+
+    async def overlap():
+        running = asyncio.create_task(scheduler._run_job(daily))
+        await asyncio.to_thread(started.wait, 5)
+        await scheduler._run_job(midday)
+        release.set()
+        await running
+        await scheduler._run_job(midday)
+
+    with caplog.at_level(logging.WARNING, logger='wsb_daemon'):
+        asyncio.run(overlap())
+    assert calls == ['slow', 'midday']
+    assert "Skipping job 'midday'" in caplog.text
+
+
+def test_years_without_holidays_are_warned_about_once(calendar, caplog):
+    with caplog.at_level(logging.WARNING, logger='wsb_daemon'):
+        assert calendar.is_trading_day(date(2025, 5, 27))
+        assert calendar.is_trading_day(date(2031, 1, 2))
+        assert calendar.is_trading_day(date(2031, 1, 3))
+    warnings = [record for record in caplog.records if record.levelno == logging.WARNING]
+    assert [record.year for record in warnings] == [2031]
+
+
+def test_parse_jobs():
+    assert parse_jobs('daily=09:30, midday = 12:15') == [('daily', time(9, 30)), ('midday', time(12, 15))]
@@ -0,0 +1,75 @@
+from datetime import datetime
+
+import pandas as pd
+
+from wsb_delta import SnapshotStore, compute_delta, has_changes
+from wsb_records import Mention, Quote
+
+
+def snapshot(rows):
+    """Snapshot frame from {ticker: (rank, mentions, price)}"""
+    frame = pd.DataFrame.from_dict(rows, orient='index', columns=['rank', 'mentions', 'price'], dtype='float64')
+    frame['change_percent'] = float('nan')
+    return frame.rename_axis('ticker')
+
+
+def tickers(delta, kind):
+    return [row['ticker'] for row in delta[kind]]
+
+
+PREVIOUS = snapshot({'GME': (1, 10, 20.0), 'TSLA': (2, 8, 200.0), 'AMC': (5, 4, 5.0), 'NVDA': (6, 3, 100.0)})
+
+
+def test_unchanged_snapshot_has_no_changes():
+    assert not has_changes(compute_delta(PREVIOUS, PREVIOUS))
+
+
+def test_thresholds_are_inclusive():
+    current = snapshot({'GME': (4, 10, 20.0), 'TSLA': (1, 15.9, 206.0), 'AMC': (2, 8, 5.0), 'NVDA': (3, 3, 97.0)})
+    delta = compute_delta(PREVIOUS, current)
+
+    # AMC gained exactly 3 places and NVDA 3; TSLA only 1
+    assert tickers(delta, 'rank_jumps') == ['AMC', 'NVDA']
+    # AMC doubled to 8 (>= 5); TSLA's 15.9 is short of 2x; NVDA is below the minimum
+    assert tickers(delta, 'mention_surges') == ['AMC']
+    # TSLA +3.0% and NVDA -3.0% both count, sorted by size
+    assert sorted(tickers(delta, 'price_moves')) == ['NVDA', 'TSLA']
+    assert delta['new_entrants'] == []
+
+
+def test_new_entrants_and_unranked_surges():
+    current = snapshot({'GME': (1, 10, 20.0), 'PLTR': (2, 6, 25.0), 'BB': (float('nan'), 12, float('nan'))})
+    delta = compute_delta(PREVIOUS, current)
+
+    assert tickers(delta, 'new_entrants') == ['PLTR']
+    assert delta['new_entrants'][0]['rank_previous'] is None
+    # Mentions without a previous score surge, ranked or not
+    assert tickers(delta, 'mention_surges') == ['BB', 'PLTR']
+    assert delta['price_moves'] == []
+
+
+def test_mentions_up_from_zero_surge():
+    previous = snapshot({'SPY': (1, 0, 400.0)})
+    current = snapshot({'SPY': (1, 7, 400.0)})
+    assert tickers(compute_delta(previous, current), 'mention_surges') == ['SPY']
+
+
+def test_custom_thresholds():
+    current = snapshot({'GME': (1, 10, 20.5), 'TSLA': (2, 8, 200.0), 'AMC': (4, 4, 5.0), 'NVDA': (6, 3, 100.0)})
+    assert not has_changes(compute_delta(PREVIOUS, current))
+    delta = compute_delta(PREVIOUS, current, rank_jump=1, price_move=2.0)
+    assert tickers(delta, 'rank_jumps') == ['AMC']
+    assert tickers(delta, 'price_moves') == ['GME']
+
+
+def test_store_diffs_against_the_latest_other_run(tmp_path):
+    store = SnapshotStore(str(tmp_path / 'snapshots.db'))
+    store.record('morning', datetime(2024, 1, 2, 10), [Quote('GME', 20.0, 19.0, 5.0)], [Mention('GME', 'reddit', 4)])
+    store.record('noon', datetime(2024, 1, 2, 12),
+                 [Quote('TSLA', 200.0, 190.0, 5.0), Quote('GME', 21.0, 19.0, 10.0)],
+                 [Mention('GME', 'reddit', 9), Mention('TSLA', 'reddit', 3), Mention('BB', 'reddit', 6)])
+
+    assert store.previous('noon') == ('morning', '2024-01-02T10:00:00')
+    delta = compute_delta(store.load('morning'), store.load('noon'))
+    assert tickers(delta, 'new_entrants') == ['TSLA']
+    assert tickers(delta, 'mention_surges') == ['GME', 'BB']
@@ -0,0 +1,62 @@
+import csv
+import gzip
+import json
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+import wsb_export
+from wsb_export import (FIELDS, LOW_CONFIDENCE, NO_PRICE, NOT_PRICED, RunExporter, candidate_rows,
+                        parse_sinks)
+from wsb_records import Mention, Quote
+
+CAPTURED = datetime(2024, 1, 2, 10, 0)
+
+
+def rows():
+    quotes = [Quote('GME', 25.0, 20.0, 25.0, volume=1000, source='yahoo'), Quote('AAPL', 190.0, 188.0, 1.1)]
+    mentions = [Mention('GME', 'swaggystocks'), Mention('GME', 'reddit', 12.0, cashtag=True),
+                Mention('TSLA', 'reddit', 6.0), Mention('XYZW', 'reddit', 4.0, cashtag=True),
+                Mention('YOLO', 'reddit', 3.0)]
+    analysis = {'GME': {'momentum': '🚀 Strong Bullish', 'risk': '🔥 High', 'big_mover': True},
+                'AAPL': {'momentum': '➡️ Neutral', 'risk': '✅ Low', 'big_mover': False}}
+    return list(candidate_rows('run-1', CAPTURED, quotes, mentions, analysis, ['GME', 'TSLA', 'AAPL'], {'GME', 'TSLA', 'AAPL'}))
+
+
+def test_one_row_per_candidate_with_its_status():
+    by_ticker = {row['ticker']: row for row in rows()}
+
+    assert list(by_ticker) == ['GME', 'TSLA', 'XYZW', 'YOLO', 'AAPL']
+    gme = by_ticker['GME']
+    assert (gme['sources'], gme['weight'], gme['cashtag'], gme['status'], gme['rank']) == \
+        ('swaggystocks+reddit', 13.0, True, 'ranked', 1)
+    assert (gme['current_price'], gme['quote_source'], gme['momentum'], gme['big_mover']) == (25.0, 'yahoo', '🚀 Strong Bullish', True)
+    assert by_ticker['AAPL']['sources'] == 'fallback' and by_ticker['AAPL']['rank'] == 2
+    assert [by_ticker[t]['rejection_reason'] for t in ('TSLA', 'XYZW', 'YOLO')] == [NO_PRICE, NOT_PRICED, LOW_CONFIDENCE]
+    assert by_ticker['TSLA']['current_price'] is None and by_ticker['TSLA']['momentum'] is None
+    assert all(set(row) == set(FIELDS) for row in by_ticker.values())
+
+
+def test_rows_round_trip_through_every_sink(tmp_path):
+    spec = f"ndjson:{tmp_path}/rows.ndjson.gz,csv:{tmp_path}/rows.csv,parquet:{tmp_path}/parquet"
+    assert RunExporter(parse_sinks(spec, 'run-1', 'gzip')).export(rows()) == 5
+
+    with gzip.open(tmp_path / 'rows.ndjson.gz', 'rt') as f:
+        assert [json.loads(line)['ticker'] for line in f] == ['GME', 'TSLA', 'XYZW', 'YOLO', 'AAPL']
+    with gzip.open(tmp_path / 'rows.csv', 'rt') as f:
+        reader = csv.DictReader(f)
+        assert reader.fieldnames == FIELDS
+        assert [row['status'] for row in reader] == ['ranked', 'rejected', 'rejected', 'rejected', 'ranked']
+    frame = pd.read_parquet(tmp_path / 'parquet' / 'run-1.parquet')
+    assert list(frame.columns) == FIELDS and len(frame) == 5
+
+
+def test_bad_sink_closes_the_sinks_already_opened(tmp_path, monkeypatch):
+    files = []
+    open_text = wsb_export._open_text
+    monkeypatch.setattr(wsb_export, '_open_text', lambda *args: files.append(open_text(*args)) or files[-1])
+
+    with pytest.raises(ValueError, match='Unknown export sink'):
+        parse_sinks(f"ndjson:{tmp_path}/a.ndjson,csv:{tmp_path}/b.csv,xml:{tmp_path}/c.xml", 'run-1')
+    assert len(files) == 2 and all(f.closed for f in files)
@@ -0,0 +1,75 @@
+from collections import Counter
+
+import pytest
+
+from wsb_extract import AMBIGUOUS_TICKERS, CASHTAG, KNOWN, OTHER, TickerExtractor
+
+KNOWN_TICKERS = {'GME', 'TSLA', 'AMC', 'ALL', 'IT', 'NOW', 'OPEN', 'F', 'GE', 'CAN', 'ARE'}
+
+
+@pytest.fixture
+def extract(scraper):
+    """count_mentions with a small known-ticker set and the scraper's common words"""
+    extractor = TickerExtractor(KNOWN_TICKERS, scraper.common_words)
+    return lambda *texts, **kwargs: extractor.count_mentions(list(texts), **kwargs)
+
+
+def test_mentions_are_weighted_by_kind(extract):
+    cashtags, kinds = set(), Counter()
+    mentions = extract('$GME and GME again', 'tsla calls, ZXQW to the MOON', 'CEO of $BBBY', cashtags=cashtags, kinds=kinds)
+
+    # $GME is a cashtag (3) and a standalone word (2)
+    assert mentions == {'GME': 7, 'TSLA': 2, 'ZXQW': 1, 'BBBY': 4}
+    assert cashtags == {'GME', 'BBBY'}
+    assert kinds == {('GME', CASHTAG): 1, ('GME', KNOWN): 2, ('TSLA', KNOWN): 1, ('ZXQW', OTHER): 1,
+                     ('BBBY', CASHTAG): 1, ('BBBY', OTHER): 1}
+
+
+def test_ambiguous_words_count_only_in_ticker_context(extract):
+    assert extract('Bought ALL calls before earnings') == {'ALL': 2}
+    assert extract('I bought IT shares, Gartner consulting is strong') == {'IT': 2}
+    assert extract('Loading up on F, Ford Lightning is a hit')['F'] == 2
+    assert extract('$NOW 800c expiring friday') == {'NOW': 3}
+
+    for text in ('Went ALL in on calls', "IT'S going to moon NOW or never",
+                 'Market OPEN at 9:30, CAN someone explain',
+                 # Lowercase words are never the ambiguous tickers
+                 'all of it can open now'):
+        assert not extract(text).keys() & AMBIGUOUS_TICKERS, text
+
+
+def test_shouted_passages_need_more_context(extract):
+    # A borderline score (buy ALL) is rejected when the passage is shouted
+    assert extract('Just buy ALL today, hold')['ALL'] == 2
+    assert 'ALL' not in extract('JUST BUY ALL TODAY GUYS, HOLD')
+    # A clear one is not
+    assert extract('JUST BUY ALL SHARES TODAY')['ALL'] == 2
+
+
+def test_ambiguous_cashtags_are_recorded(extract):
+    cashtags = set()
+    assert extract('Picked up $ALL shares', cashtags=cashtags) == {'ALL': 3}
+    assert cashtags == {'ALL'}
+
+
+def test_ambiguous_words_get_no_placeholder_quote(scraper):
+    # With every quote source unreachable, only unambiguous known tickers
+    # fall back to a placeholder
+    assert scraper.get_stock_data('TSLA').source == 'placeholder'
+    assert scraper.get_stock_data('ALL').source == 'missing'
+    assert scraper.get_stock_data('F').source == 'missing'
+
+
+def test_ambiguous_words_keep_their_offsets(extract):
+    # Punctuation, tabs, newlines and double spaces do not shift the word
+    # the options position is read after
+    options = {}
+    text = 'Loading\nup  on\t(ALL) today,\nALL 90c 6/21 before insurance earnings'
+    assert extract(text, options=options)['ALL'] == 4
+    assert (options['ALL'].calls, options['ALL'].puts) == (1, 0)
+
+
+def test_swaggy_cells_take_one_letter_tickers_only_when_ambiguous(scraper):
+    rows = ''.join(f"<tr><td>{cell}</td><td>12</td></tr>" for cell in ('F', 'f', 'V', 'All', 'GME'))
+    html = f"<html><body><table>{rows}</table></body></html>".encode()
+    assert sorted(scraper.parse_swaggy_html(html, {})) == ['F', 'GME']
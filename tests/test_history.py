@@ -0,0 +1,75 @@
+from datetime import datetime
+
+import pandas as pd
+
+from wsb_history import MARKET_TIMEZONE, PriceHistory
+
+
+class FakeChart:
+    """Yahoo chart API stand-in; bars maps 'YYYY-MM-DD' -> volume"""
+
+    def __init__(self, bars):
+        self.bars = bars
+        self.requests = 0
+
+    def get(self, url, headers=None, timeout=None):
+        self.requests += 1
+        days = sorted(self.bars)
+        stamps = [int(MARKET_TIMEZONE.localize(datetime.fromisoformat(day).replace(hour=9, minute=30)).timestamp())
+                  for day in days]
+        volumes = [self.bars[day] for day in days]
+        body = {'chart': {'result': [{'timestamp': stamps, 'indicators': {'quote': [{
+            'open': [10.0] * len(days), 'high': [11.0] * len(days), 'low': [9.0] * len(days),
+            'close': [10.5] * len(days), 'volume': volumes}]}}]}}
+
+        class Response:
+            status_code = 200
+
+            def json(self):
+                return body
+
+        return Response()
+
+
+def make_history(tmp_path, chart, now):
+    history = PriceHistory(str(tmp_path), chart, 'http://chart')
+    history.calendar.holidays = set()
+    history._now = lambda: now[0]
+    return history
+
+
+def at(day, hour, minute=0):
+    return MARKET_TIMEZONE.localize(datetime.fromisoformat(day).replace(hour=hour, minute=minute))
+
+
+def test_partial_session_bar_is_returned_but_never_persisted(tmp_path):
+    chart = FakeChart({'2026-10-14': 1000.0, '2026-10-15': 1200.0, '2026-10-16': 300.0})
+    now = [at('2026-10-16', 11)]
+    history = make_history(tmp_path, chart, now)
+
+    bars = history.history('GME')
+    assert bars.index[-1] == pd.Timestamp('2026-10-16')
+    on_disk = pd.read_parquet(tmp_path / 'GME.parquet')
+    assert on_disk.index[-1] == pd.Timestamp('2026-10-15')
+
+    # Served from memory for a while, then the live bar is refetched
+    history.history('GME')
+    assert chart.requests == 1
+    chart.bars['2026-10-16'] = 900.0
+    now[0] = at('2026-10-16', 14)
+    assert history.history('GME').loc['2026-10-16', 'volume'] == 900.0
+    assert chart.requests == 2
+
+
+def test_closed_session_is_persisted_and_then_served_from_cache(tmp_path):
+    chart = FakeChart({'2026-10-15': 1200.0, '2026-10-16': 2500.0})
+    now = [at('2026-10-16', 17)]
+    history = make_history(tmp_path, chart, now)
+
+    history.history('GME')
+    assert pd.read_parquet(tmp_path / 'GME.parquet').loc['2026-10-16', 'volume'] == 2500.0
+
+    # Monday before the open: Friday's bar is final, so nothing is fetched
+    fresh = make_history(tmp_path, chart, [at('2026-10-19', 8)])
+    assert fresh.history('GME').index[-1] == pd.Timestamp('2026-10-16')
+    assert chart.requests == 1
@@ -0,0 +1,88 @@
+import pytest
+
+from conftest import FakeReddit
+from wsb_jobs import QUOTE, SCRAPE_SUBREDDIT, Coordinator, JobQueue, JobWorker
+from wsb_records import Quote
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return JobQueue(str(tmp_path / 'jobs.db'), backoff=0)
+
+
+class FlakyReddit:
+    """Reddit whose listings fail a number of times before serving posts"""
+
+    def __init__(self, failures, posts):
+        self.failures = failures
+        self.reddit = FakeReddit(posts)
+
+    def subreddit(self, name):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError('listing timed out')
+        return self.reddit.subreddit(name)
+
+
+def test_failed_scrape_is_retried_instead_of_completing_empty(scraper, queue):
+    scraper.reddit = FlakyReddit(1, {'wallstreetbets': ['GME GME calls']})
+    scraper.subreddits = {'wallstreetbets': 1.0}
+    worker = JobWorker(queue, scraper)
+    queue.submit('b', SCRAPE_SUBREDDIT, 'wallstreetbets', {'subreddit': 'wallstreetbets'})
+
+    assert worker.run_once('b')
+    assert queue.counts('b') == {'pending': 1}
+    assert worker.run_once('b')
+    assert queue.results('b', SCRAPE_SUBREDDIT)['wallstreetbets']['mentions'] == {'GME': 4}
+
+
+def test_job_fails_for_good_after_max_attempts(scraper, queue):
+    scraper.reddit = FlakyReddit(5, {})
+    worker = JobWorker(queue, scraper)
+    queue.submit('b', SCRAPE_SUBREDDIT, 'stocks', {'subreddit': 'stocks'}, max_attempts=2)
+
+    assert worker.run_once('b') and worker.run_once('b')
+    assert queue.counts('b') == {'failed': 1}
+    assert not worker.run_once('b')
+
+
+def test_expired_lease_is_taken_over_and_the_late_result_dropped(queue):
+    queue.submit('b', QUOTE, '00000', {'tickers': ['GME']})
+    stalled = queue.lease('stalled', lease_seconds=-1)
+    taken = queue.lease('healthy', lease_seconds=60)
+
+    assert taken['id'] == stalled['id'] and taken['attempt'] == 2
+    assert not queue.heartbeat(stalled['id'], 'stalled')
+    assert not queue.complete(stalled['id'], 'stalled', {'quotes': []})
+    assert queue.complete(taken['id'], 'healthy', {'quotes': []})
+    assert queue.counts('b') == {'done': 1}
+
+
+def test_coordinator_prices_only_what_fills_the_report(scraper, queue, monkeypatch):
+    scraper.reddit = FakeReddit({'wallstreetbets': ['GME GME', 'TSLA TSLA', 'ZZZZ ZZZZ']})
+    scraper.subreddits = {'wallstreetbets': 1.0}
+    monkeypatch.setattr(scraper, 'scrape_swaggy_stocks', lambda emit=None, strict=False: [])
+    priced = []
+
+    def get_stock_data(ticker, strict=False):
+        priced.append(ticker)
+        if ticker == 'TSLA':
+            return Quote.missing(ticker)
+        return Quote(ticker, 10.0, 9.0, 11.1, volume=100, source='yahoo')
+
+    monkeypatch.setattr(scraper, 'get_stock_data', get_stock_data)
+    coordinator = Coordinator(queue, scraper, target=3, poll=0)
+    coordinator.helper.quote_delay = 0
+    valid = coordinator.run(['AAPL', 'GME', 'NVDA', 'MSFT'])
+
+    # GME, TSLA and AAPL fill the first round; TSLA has no price, so one more
+    assert [q.ticker for q in valid] == ['GME', 'AAPL', 'NVDA']
+    assert coordinator.attempted == ['GME', 'TSLA', 'AAPL', 'NVDA']
+    assert sorted(priced) == sorted(coordinator.attempted)
+
+
+def test_workers_skip_gmail_setup(monkeypatch):
+    import wsb_scraper
+    monkeypatch.setattr(wsb_scraper, 'create_reddit', lambda: FakeReddit({}))
+    monkeypatch.setattr(wsb_scraper.WSBScraper, 'setup_gmail', lambda self: pytest.fail('Gmail set up for a worker'))
+    assert wsb_scraper.WSBScraper(gmail=False).gmail_service is None
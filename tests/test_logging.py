@@ -0,0 +1,69 @@
+import io
+import json
+import logging
+import logging.handlers
+import queue
+import threading
+
+from wsb_logging import ContextFilter, JsonFormatter, RecordQueueHandler, SamplingFilter, log_stage, set_run
+
+
+def queued_logger(name, *filters):
+    """Logger feeding a RecordQueueHandler, and the listener writing its JSON lines"""
+    records = queue.SimpleQueue()
+    handler = RecordQueueHandler(records)
+    handler.addFilter(ContextFilter())
+    for f in filters:
+        handler.addFilter(f)
+    logger = logging.getLogger(name)
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    logger.handlers = [handler]
+    output = io.StringIO()
+    stream = logging.StreamHandler(output)
+    stream.setFormatter(JsonFormatter())
+    return logger, logging.handlers.QueueListener(records, stream), output
+
+
+def events(output):
+    return [json.loads(line) for line in output.getvalue().splitlines()]
+
+
+def test_exceptions_and_extras_reach_the_listener():
+    logger, listener, output = queued_logger('tests.logging.exceptions')
+    listener.start()
+    set_run('run-7')
+    items = ['GME']
+    with log_stage('quotes'):
+        try:
+            1 / 0
+        except ZeroDivisionError:
+            logger.exception("Quote failed for %s", items, extra={'event': 'quote_error', 'ticker': 'GME'})
+    items.append('AMC')  # the message keeps the arguments as they were
+    listener.stop()
+
+    [event] = events(output)
+    assert event['message'] == "Quote failed for ['GME']"
+    assert (event['event'], event['ticker'], event['run_id'], event['stage']) == ('quote_error', 'GME', 'run-7', 'quotes')
+    assert 'ZeroDivisionError: division by zero' in event['exception']
+
+
+def test_sampling_keeps_an_exact_share_across_threads():
+    logger, listener, output = queued_logger('tests.logging.sampling', SamplingFilter({'quote': 0.1}))
+    listener.start()
+
+    def emit():
+        for _ in range(1000):
+            logger.info("quote", extra={'event': 'quote'})
+        logger.warning("slow", extra={'event': 'quote'})
+
+    threads = [threading.Thread(target=emit) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    listener.stop()
+
+    levels = [event['level'] for event in events(output)]
+    assert levels.count('info') == 800
+    assert levels.count('warning') == 8
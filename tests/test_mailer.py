@@ -0,0 +1,101 @@
+import httplib2
+from googleapiclient.errors import HttpError
+
+import wsb_mailer
+from wsb_mailer import BatchMailer
+
+
+def http_error(status):
+    return HttpError(httplib2.Response({'status': status}), b'error')
+
+
+class FakeGmail:
+    """Gmail service stand-in whose batches fail recipients as scripted
+
+    failures maps a recipient to the errors of its successive attempts;
+    once they run out the message is sent.
+    """
+
+    def __init__(self, failures):
+        self.failures = {recipient: list(errors) for recipient, errors in failures.items()}
+        self.batches = []
+
+    def users(self):
+        return self
+
+    def messages(self):
+        return self
+
+    def send(self, userId, body):
+        return body
+
+    def new_batch_http_request(self, callback):
+        gmail = self
+
+        class Batch:
+            def __init__(self):
+                self.requests = []
+
+            def add(self, request, request_id=None):
+                self.requests.append(request_id)
+
+            def execute(self):
+                gmail.batches.append(self.requests)
+                for recipient in self.requests:
+                    errors = gmail.failures.get(recipient)
+                    if errors:
+                        callback(recipient, None, errors.pop(0))
+                    else:
+                        callback(recipient, {'id': f"id-{recipient}"}, None)
+
+        return Batch()
+
+
+def test_batches_retry_transient_failures_only(monkeypatch):
+    monkeypatch.setattr(wsb_mailer.time, 'sleep', lambda seconds: None)
+    gmail = FakeGmail({
+        'rate@x.com': [http_error(429)],
+        'flaky@x.com': [http_error(503), http_error(500)],
+        'bad@x.com': [http_error(400)],
+        'down@x.com': [http_error(503)] * 10,
+    })
+    messages = {f"user{i}@x.com": 'raw' for i in range(3)}
+    messages.update(dict.fromkeys(('rate@x.com', 'flaky@x.com', 'bad@x.com', 'down@x.com'), 'raw'))
+    results = BatchMailer(gmail, batch_size=3, max_retries=2).send(messages)
+
+    # 7 recipients in batches of 3, then only the retryable failures
+    assert [len(batch) for batch in gmail.batches] == [3, 3, 1, 3, 2]
+    assert gmail.batches[3] == ['rate@x.com', 'flaky@x.com', 'down@x.com']
+    assert gmail.batches[4] == ['flaky@x.com', 'down@x.com']
+
+    failed = {recipient for recipient, result in results.items() if not result['ok']}
+    assert failed == {'bad@x.com', 'down@x.com'}
+    assert results['bad@x.com']['attempts'] == 1
+    assert '400' in results['bad@x.com']['error']
+    assert results['down@x.com']['attempts'] == 3
+    assert (results['flaky@x.com']['ok'], results['flaky@x.com']['attempts']) == (True, 3)
+    assert results['rate@x.com']['message_id'] == 'id-rate@x.com'
+
+
+def test_a_failed_batch_request_retries_its_unanswered_recipients(monkeypatch):
+    monkeypatch.setattr(wsb_mailer.time, 'sleep', lambda seconds: None)
+    gmail = FakeGmail({})
+    executed = []
+
+    def new_batch(callback):
+        batch = FakeGmail.new_batch_http_request(gmail, callback)
+        execute = batch.execute
+
+        def flaky_execute():
+            executed.append(list(batch.requests))
+            if len(executed) == 1:
+                raise ConnectionError("connection reset")
+            execute()
+        batch.execute = flaky_execute
+        return batch
+
+    gmail.new_batch_http_request = new_batch
+    results = BatchMailer(gmail, batch_size=10).send({'a@x.com': 'raw', 'b@x.com': 'raw'})
+
+    assert executed == [['a@x.com', 'b@x.com']] * 2
+    assert all(result['ok'] and result['attempts'] == 2 for result in results.values())
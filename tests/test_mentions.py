@@ -0,0 +1,26 @@
+from collections import Counter
+from datetime import datetime
+
+from wsb_extract import KNOWN
+from wsb_history import MARKET_TIMEZONE
+from wsb_mentions import MentionStore
+
+
+def record(store, stamp, count):
+    captured_at = MARKET_TIMEZONE.localize(datetime.fromisoformat(stamp))
+    store.record(captured_at, {'wallstreetbets': Counter({('GME', KNOWN): count})})
+
+
+def test_cutoff_picks_the_last_run_before_the_decision_time(tmp_path):
+    store = MentionStore(str(tmp_path / 'mentions.db'))
+    record(store, '2026-10-15 08:30', 3)
+    record(store, '2026-10-15 09:35', 5)
+    record(store, '2026-10-15 16:05', 40)
+    record(store, '2026-10-16 16:05', 7)
+
+    latest = store.load()
+    assert sorted(latest['known']) == [7, 40]
+
+    before_open = store.load(cutoff='09:30')
+    assert list(before_open['known']) == [3]
+    assert list(store.load(cutoff='12:00')['known']) == [5]
@@ -0,0 +1,87 @@
+import json
+import urllib.error
+import urllib.request
+
+import pytest
+
+from wsb_metrics import PrometheusExporter, RunMetrics
+
+
+def sample_run():
+    metrics = RunMetrics()
+    with metrics.stage('scrape_reddit_wsb'):
+        pass
+    with metrics.stage('get_stock_data'):
+        pass
+    with metrics.stage('get_stock_data'):
+        pass
+    metrics.observe_http('yahoo', 0.2, 200)
+    metrics.observe_http('yahoo', 0.1, 503)
+    metrics.observe_http('yahoo', 0.4, 'error')
+    metrics.observe_http('alpha_vantage', 0.3, 200)
+    metrics.cache_hit('price_history')
+    metrics.cache_hit('price_history')
+    metrics.cache_miss('price_history')
+    metrics.cache_miss('sparklines')
+    metrics.increment('valid_tickers', 3)
+    metrics.increment('invalid_tickers')
+    return metrics
+
+
+def test_run_report(tmp_path):
+    metrics = sample_run()
+    with pytest.raises(ValueError):
+        with metrics.http('swaggystocks'):
+            raise ValueError("boom")
+
+    path = metrics.write_json(str(tmp_path / 'metrics'))
+    with open(path) as f:
+        report = json.load(f)
+
+    assert report['stages']['get_stock_data']['calls'] == 2
+    assert report['http']['yahoo'] == {'calls': 3, 'errors': 2, 'total_seconds': 0.7, 'mean_seconds': 0.2333,
+                                       'p50_seconds': 0.2, 'max_seconds': 0.4}
+    assert report['http']['swaggystocks']['errors'] == 1
+    assert report['caches'] == {'price_history': {'hits': 2, 'misses': 1, 'hit_rate': 0.6667},
+                                'sparklines': {'hits': 0, 'misses': 1, 'hit_rate': 0.0}}
+    assert report['counters'] == {'valid_tickers': 3, 'invalid_tickers': 1}
+
+
+def test_prometheus_render_accumulates_runs():
+    exporter = PrometheusExporter()
+    assert 'wsb_runs_total 0\n' in exporter.render()
+    assert 'wsb_stage_duration_seconds' not in exporter.render()
+
+    exporter.add_run(sample_run())
+    exporter.add_run(sample_run())
+    lines = exporter.render().splitlines()
+
+    assert 'wsb_runs_total 2' in lines
+    assert 'wsb_http_request_duration_seconds_sum{provider="yahoo"} 1.4000' in lines
+    assert 'wsb_http_request_duration_seconds_count{provider="yahoo"} 6' in lines
+    assert 'wsb_http_errors_total{provider="yahoo"} 4' in lines
+    assert 'wsb_cache_lookups_total{cache="price_history",result="hit"} 4' in lines
+    assert 'wsb_events_total{event="valid_tickers"} 6' in lines
+    assert any(line.startswith('wsb_stage_duration_seconds{stage="get_stock_data"} ') for line in lines)
+    # Every sample belongs to a declared metric
+    declared = {line.split()[2] for line in lines if line.startswith('# TYPE')}
+    for line in lines:
+        if not line.startswith('#'):
+            name = line.split('{')[0].split()[0]
+            assert name in declared or name.rsplit('_', 1)[0] in declared, line
+
+
+def test_metrics_are_served_on_localhost():
+    exporter = PrometheusExporter()
+    exporter.add_run(sample_run())
+    port = exporter.serve(0)
+    try:
+        assert exporter._server.server_address[0] == '127.0.0.1'
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=5) as response:
+            assert response.headers['Content-Type'] == 'text/plain; version=0.0.4'
+            assert response.read().decode() == exporter.render()
+        with pytest.raises(urllib.error.HTTPError) as error:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/other", timeout=5)
+        assert error.value.code == 404
+    finally:
+        exporter.close()
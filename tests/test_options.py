@@ -0,0 +1,53 @@
+import pytest
+
+from wsb_extract import STANDALONE_POSITION, TickerExtractor
+from wsb_options import OptionPosition, OptionsFlow, options_frame
+
+KNOWN_TICKERS = {'SPY', 'GME', 'TSLA', 'AMC', 'GE', 'ALL'}
+
+
+def flows(*texts):
+    options = {}
+    TickerExtractor(KNOWN_TICKERS, {'THE'}).count_mentions(list(texts), options=options)
+    return {ticker: flow.to_dict() for ticker, flow in options.items()}
+
+
+def contracts(calls=0, puts=0, call_contracts=None, put_contracts=None):
+    return {'calls': calls, 'puts': puts, 'call_contracts': calls if call_contracts is None else call_contracts,
+            'put_contracts': puts if put_contracts is None else put_contracts}
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('GME 30c 6/21', {'GME': contracts(calls=1)}),
+    ('SPY 450P 0DTE', {'SPY': contracts(puts=1)}),
+    ('SPY 0DTE 450p', {'SPY': contracts(puts=1)}),
+    ('10x TSLA 250C 7/19', {'TSLA': contracts(calls=1, call_contracts=10)}),
+    ('TSLA 7/19 250C x5', {'TSLA': contracts(calls=1, call_contracts=5)}),
+    ('$AMC $5 calls', {'AMC': contracts(calls=1)}),
+    ('bought GE 12c', {'GE': contracts(calls=1)}),
+    ('Bought ALL 130c on insurance earnings', {'ALL': contracts(calls=1)}),
+    # A year is not a quantity
+    ('2025 SPY 450c', {'SPY': contracts(calls=1)}),
+    ('In 2024 SPY 400p paid', {'SPY': contracts(puts=1)}),
+])
+def test_positions_are_parsed(text, expected):
+    assert flows(text) == expected
+
+
+@pytest.mark.parametrize('text', ['the 30c', 'SPY calls are cheap', 'gme to the moon', 'SPY at 450'])
+def test_no_position_without_a_counted_ticker_and_strike(text):
+    assert flows(text) == {}
+
+
+def test_expiry_before_or_after_the_strike():
+    assert STANDALONE_POSITION.findall('SPY 0DTE 450P')[0][:4] == ('', 'SPY', '0DTE', '450')
+    assert STANDALONE_POSITION.findall('SPY 450P 0 DTE')[0][4:6] == ('P', '0 DTE')
+    assert OptionPosition.parse('SPY', '450', 'P', '0 DTE').expiry == '0DTE'
+
+
+def test_flows_merge_and_frame():
+    total = OptionsFlow(2, 1, 20, 1).merge(OptionsFlow(1, 0, 1, 0))
+    assert (total.calls, total.puts, total.bullish_ratio) == (3, 1, 0.75)
+    frame = options_frame({'GME': total, 'SPY': OptionsFlow(0, 2, 0, 2)})
+    assert frame.loc['GME'].tolist() == [3.0, 1.0, 0.75]
+    assert frame.loc['SPY', 'options_bullish_ratio'] == 0.0
@@ -0,0 +1,65 @@
+import threading
+import time
+from collections import Counter
+
+import praw
+
+from conftest import FakeReddit
+from wsb_pipeline import ScrapeQuotePipeline
+
+
+def run_pipeline(scraper, monkeypatch, posts):
+    scraper.reddit = FakeReddit(posts)
+    scraper.subreddits = {'wallstreetbets': 1.0, 'stocks': 0.5}
+    monkeypatch.setattr(scraper, 'scrape_swaggy_stocks', lambda emit=None: [])
+    monkeypatch.setattr(scraper, 'price_candidate', lambda ticker, source=None: None)
+    pipeline = ScrapeQuotePipeline(scraper, quote_delay=0)
+    pipeline.run([])
+    return pipeline
+
+
+def test_each_reddit_ticker_is_recorded_once_with_its_merged_score(scraper, monkeypatch):
+    posts = {'wallstreetbets': ['GME calls', 'GME to the moon', '$GME squeeze', 'TSLA earnings', 'TSLA again'],
+             'stocks': ['GME is back', 'GME GME', 'TSLA delivery numbers', 'TSLA margins']}
+    pipeline = run_pipeline(scraper, monkeypatch, posts)
+
+    recorded = Counter(m.ticker for m in pipeline.mentions if m.source == 'reddit')
+    assert recorded == {'GME': 1, 'TSLA': 1}
+    scores = {m.ticker: m.score for m in pipeline.mentions}
+    # wallstreetbets: GME 2+2+(3+2 for the cashtag), TSLA 2+2; stocks (x0.5): GME 2+4, TSLA 2+2
+    assert scores == {'GME': 12.0, 'TSLA': 6.0}
+
+
+def test_recorded_mentions_do_not_depend_on_thread_timing(scraper, monkeypatch):
+    posts = {'wallstreetbets': ['AMC AMC', 'PLTR PLTR'], 'stocks': ['PLTR PLTR PLTR PLTR', 'AMC AMC AMC AMC']}
+    runs = [[m.to_dict() for m in run_pipeline(scraper, monkeypatch, posts).mentions] for _ in range(3)]
+    assert runs[0] == runs[1] == runs[2]
+    assert [m['ticker'] for m in runs[0]] == ['AMC', 'PLTR']
+
+
+def test_each_reddit_worker_has_its_own_client(scraper, monkeypatch):
+    clients = []
+
+    class Reddit(FakeReddit):
+        """praw.Reddit stand-in remembering the thread each client serves"""
+
+        def __init__(self, **credentials):
+            super().__init__({'wallstreetbets': ['GME GME'], 'stocks': ['GME calls'], 'options': ['TSLA calls']})
+            self.threads = set()
+            clients.append(self)
+
+        def subreddit(self, name):
+            self.threads.add(threading.get_ident())
+            time.sleep(0.05)  # Keep the workers busy at the same time
+            return super().subreddit(name)
+
+    monkeypatch.setattr(praw, 'Reddit', Reddit)
+    scraper.reddit = Reddit()
+    scraper.subreddits = {'wallstreetbets': 1.0, 'stocks': 0.5, 'options': 1.0}
+    scraper.reddit_max_concurrency = 2
+    assert scraper.scrape_reddit_wsb() == ['GME', 'TSLA']
+
+    main, *workers = clients
+    assert not main.threads
+    assert 1 <= len(workers) <= 2
+    assert all(len(worker.threads) == 1 for worker in workers)
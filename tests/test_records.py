@@ -0,0 +1,15 @@
+from wsb_records import Quote, quotes_to_array
+
+
+def test_quote_array_keeps_every_source_name():
+    sources = ['alpha_vantage', 'yahoo', 'placeholder', 'emergency', 'missing']
+    batch = quotes_to_array([Quote('GME', 20.0, 19.0, 5.26, source=source) for source in sources])
+    assert list(batch['source']) == sources
+
+
+def test_quote_round_trips_through_dict_with_missing_values():
+    quote = Quote('AMC', 4.5, source='yahoo')
+    data = quote.to_dict()
+    assert data['previous_close'] is None and data['volume'] is None
+    restored = Quote.from_dict(data)
+    assert restored.to_dict() == data
@@ -0,0 +1,50 @@
+import numpy as np
+
+from wsb_records import Quote
+from wsb_report import SparklineCache, render_delta, render_report, report_cards, sparkline_text
+
+ANALYSIS = {'GME': {'momentum': '🚀 Strong Bullish', 'risk': '🔥 High'},
+            'TSLA': {'momentum': '📉 Bearish', 'risk': '⚡ Medium'}}
+QUOTES = [Quote('GME', 25.0, 20.0, 25.0), Quote('TSLA', 190.0, 200.0, -5.0)]
+
+
+def test_sparkline_text_scales_to_the_block_range():
+    assert sparkline_text(np.arange(1.0, 9.0)) == '▁▂▃▄▅▆▇█'
+    assert sparkline_text(np.array([5.0])) == ''
+
+
+def test_html_cards_use_text_sparklines_that_webmail_keeps():
+    sparklines = SparklineCache().get(['GME', 'TSLA'], '2024-01-02',
+                                      load_prices=lambda tickers: {'GME': [1, 2, 3], 'TSLA': [3, 2, 1]},
+                                      load_mentions=lambda tickers: {'GME': [4, 8]})
+    cards = report_cards(QUOTES, ANALYSIS, sparklines)
+    report = render_report(cards, '2024-01-02 10:00', {}, ('html', 'text'))
+
+    html = report['html']
+    assert '<svg' not in html and 'data:image' not in html
+    assert '<span class="spark-line positive">▁▅█</span> price' in html
+    assert '<span class="spark-line mentions">▁█</span> mentions' in html
+    assert '<span class="spark-line negative">█▅▁</span> price' in html
+    assert '<span class="spark-line mentions">-</span> mentions' in html
+    assert 'Price ▁▅█  Mentions ▁█' in report['text']
+
+
+def test_cards_without_history_have_no_sparkline_row():
+    report = render_report(report_cards(QUOTES, ANALYSIS), '2024-01-02 10:00', {}, ('html',))
+    assert 'class="spark"' not in report['html']
+
+
+def test_delta_report_lists_only_the_changes():
+    delta = {'new_entrants': [{'rank': 1.0, 'ticker': 'GME', 'price': 25.0}],
+             'rank_jumps': [{'ticker': 'TSLA', 'rank': 2.0, 'rank_previous': 7.0}],
+             'mention_surges': [{'ticker': 'AMC', 'mentions': 40.0, 'mentions_previous': None},
+                                {'ticker': 'PLTR', 'mentions': 12.0, 'mentions_previous': 4.0}],
+             'price_moves': []}
+    html = render_delta(delta, '2024-01-02 12:00', '2024-01-02 10:00')
+
+    assert '📅 2024-01-02 12:00 · changes since 2024-01-02 10:00' in html
+    assert '<li>#1 $GME at $25.00</li>' in html
+    assert '<li>$TSLA: #7 → #2</li>' in html
+    assert '<li>$AMC: 40 mentions</li><li>$PLTR: 12 mentions (was 4)</li>' in html
+    assert 'Price Moves' not in html
+    assert html.rstrip().endswith('</html>')
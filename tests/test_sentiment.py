@@ -0,0 +1,78 @@
+import math
+
+import pytest
+
+from wsb_extract import TickerExtractor
+from wsb_sentiment import SentimentScorer, TickerSentiment, sentiment_frame
+
+KNOWN_TICKERS = {'GME', 'TSLA', 'ALL', 'IT', 'NOW', 'CAN', 'F'}
+
+
+@pytest.fixture
+def score(scraper):
+    """Sentiment of the mentions count_mentions takes from texts"""
+    extractor = TickerExtractor(KNOWN_TICKERS, scraper.common_words)
+    scorer = SentimentScorer()
+
+    def score(*texts):
+        spans = []
+        extractor.count_mentions(list(texts), spans=spans)
+        return scorer.score_texts(list(texts), spans)
+    return score
+
+
+def test_only_counted_mentions_are_scored(score):
+    assert score("I can't buy now, it's all over") == {}
+    assert score("I CAN'T BUY NOW, IT'S ALL OVER") == {}
+
+
+def test_cashtag_is_one_mention(score):
+    tallies = score('$GME to the moon 🚀')
+    assert tallies.keys() == {'GME'}
+    assert (tallies['GME'].bullish, tallies['GME'].mentions) == (1, 1)
+
+
+def test_ambiguous_tickers_are_scored_where_counted(score):
+    tallies = score('Loading up on F, Ford Lightning is a hit', 'Bought ALL calls before earnings')
+    assert tallies['F'].bullish == 1
+    assert tallies['ALL'].bullish == 1
+
+
+def test_negation_flips_terms(score):
+    assert score('Not selling GME')['GME'].bullish == 1
+    assert score('Selling GME')['GME'].bearish == 1
+    assert score("TSLA is not mooning")['TSLA'].bearish == 1
+
+
+def test_terms_count_within_the_window(score):
+    far = 'TSLA ' + 'x' * 90 + ' crash'
+    tally = score(far)['TSLA']
+    assert (tally.neutral, tally.score) == (1, 0.0)
+    assert math.isnan(tally.bullish_ratio)
+
+    near = 'TSLA ' + 'x' * 60 + ' crash'
+    assert score(near)['TSLA'].bearish == 1
+
+
+def test_negation_reaches_only_the_next_words(score):
+    # One short word may sit between the negation and the term
+    assert score('GME no more puts')['GME'].bullish == 1
+    assert score('GME not sure why anyone is selling')['GME'].bearish == 1
+
+
+def test_phrases_win_over_their_words(score):
+    # "short squeeze" is bullish even though "short" is bearish
+    assert score('GME short squeeze')['GME'].score == 2.0
+
+
+def test_tallies_merge_and_round_trip(score):
+    tallies = score('GME calls', 'GME puts', 'GME')
+    tally = tallies['GME']
+    assert (tally.bullish, tally.bearish, tally.neutral) == (1, 1, 1)
+    assert tally.bullish_ratio == 0.5
+
+    restored = TickerSentiment.from_dict(tally.to_dict())
+    assert restored.merge(tally).mentions == 6
+
+    frame = sentiment_frame(tallies)
+    assert frame.loc['GME', 'sentiment_mentions'] == 3
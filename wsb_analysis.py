@@ -0,0 +1,202 @@
+import math
+from bisect import bisect_left, bisect_right
+
+import numpy as np
+import pandas as pd
+
+from wsb_records import quotes_to_array
+
+STRONG_BULLISH = "🚀 Strong Bullish"
+BULLISH = "📈 Bullish"
+NEUTRAL = "➡️ Neutral"
+BEARISH = "📉 Bearish"
+STRONG_BEARISH = "🔴 Strong Bearish"
+
+HIGH_RISK = "🔥 High Risk/High Reward"
+MEDIUM_HIGH_RISK = "⚡ Medium-High Risk"
+MEDIUM_RISK = "⚖️ Medium Risk"
+LOWER_RISK = "🛡️ Lower Risk"
+UNKNOWN_RISK = "❓ Unknown Risk"
+
+# Daily moves at least this large (in %) are flagged as big movers
+BIG_MOVE_PERCENT = 5.0
+
+# Annualized realized volatility (%) at which each risk bucket starts
+HIGH_RISK_VOL = 100.0
+MEDIUM_HIGH_RISK_VOL = 60.0
+MEDIUM_RISK_VOL = 30.0
+
+# Share prices below which each risk bucket applies (no volatility known)
+HIGH_RISK_PRICE = 5.0
+MEDIUM_HIGH_RISK_PRICE = 20.0
+MEDIUM_RISK_PRICE = 50.0
+
+# Daily move measured in ATRs at which each momentum bucket starts
+STRONG_MOVE_ATR = 1.5
+MOVE_ATR = 0.5
+
+# The same in percent, for tickers without an ATR
+STRONG_MOVE_PERCENT = 5.0
+MOVE_PERCENT = 2.0
+
+# The thresholds above as ascending bounds with the label below, between
+# and above them, shared by analyze_quotes and analyze_quote (see _bucket)
+VOL_RISK_BOUNDS = (MEDIUM_RISK_VOL, MEDIUM_HIGH_RISK_VOL, HIGH_RISK_VOL)
+VOL_RISK_LABELS = (LOWER_RISK, MEDIUM_RISK, MEDIUM_HIGH_RISK, HIGH_RISK)
+PRICE_RISK_BOUNDS = (HIGH_RISK_PRICE, MEDIUM_HIGH_RISK_PRICE, MEDIUM_RISK_PRICE)
+PRICE_RISK_LABELS = (HIGH_RISK, MEDIUM_HIGH_RISK, MEDIUM_RISK, LOWER_RISK)
+ATR_MOVE_BOUNDS = (-STRONG_MOVE_ATR, -MOVE_ATR, MOVE_ATR, STRONG_MOVE_ATR)
+PERCENT_MOVE_BOUNDS = (-STRONG_MOVE_PERCENT, -MOVE_PERCENT, MOVE_PERCENT, STRONG_MOVE_PERCENT)
+MOMENTUM_LABELS = (STRONG_BEARISH, BEARISH, NEUTRAL, BULLISH, STRONG_BULLISH)
+
+
+def analyze_quotes(quotes, indicators=None):
+    """Momentum, risk and extra signals for a whole batch of quotes at once
+
+    indicators is an optional DataFrame indexed by ticker with any of
+    realized_vol, atr_pct and volume_spike (see wsb_history.compute_indicators),
+    relative_volume and unusual_activity. Where a ticker has them, risk
+    comes from realized volatility and momentum from the day's move in ATR
+    units; otherwise the price and fixed percent thresholds are used.
+
+    Returns a DataFrame with one row per quote (same order) and the columns
+    ticker, momentum, risk, dollar_volume, change_zscore, big_mover,
+    realized_vol, atr_pct, volume_spike, relative_volume and
+    unusual_activity, followed by any other indicator columns as given
+    (e.g. bullish_ratio from wsb_sentiment).
+    """
+    batch = quotes_to_array(quotes)
+    price = batch['current_price']
+    change = batch['change_percent']
+    volume = np.where(batch['volume'] >= 0, batch['volume'], np.nan).astype(float)
+    has_price = ~np.isnan(price) & (price > 0)
+
+    if indicators is None:
+        indicators = pd.DataFrame()
+    aligned = indicators.reindex(batch['ticker'])
+    realized_vol = _column(aligned, 'realized_vol')
+    atr_pct = _column(aligned, 'atr_pct')
+    volume_spike = _column(aligned, 'volume_spike')
+    rvol = _column(aligned, 'relative_volume')
+    unusual = aligned['unusual_activity'].fillna(False).to_numpy(dtype=bool) \
+        if 'unusual_activity' in aligned else np.zeros(len(batch), dtype=bool)
+
+    # Momentum: the move relative to the ticker's usual range when known
+    with np.errstate(divide='ignore', invalid='ignore'):
+        atr_move = np.where(atr_pct > 0, change / atr_pct, np.nan)
+    momentum = np.where(
+        np.isnan(change), NEUTRAL,
+        np.where(np.isnan(atr_move), _momentum(change, PERCENT_MOVE_BOUNDS), _momentum(atr_move, ATR_MOVE_BOUNDS)))
+
+    # Risk: realized volatility when known, otherwise the share price
+    risk = np.where(
+        ~np.isnan(realized_vol), _bucket(realized_vol, VOL_RISK_BOUNDS, VOL_RISK_LABELS, 'right'),
+        np.where(has_price, _bucket(price, PRICE_RISK_BOUNDS, PRICE_RISK_LABELS, 'right'), UNKNOWN_RISK))
+
+    # Extra signals: traded value and how unusual each move is in this batch
+    dollar_volume = np.where(has_price, price * volume, np.nan)
+    valid_change = change[~np.isnan(change)]
+    if valid_change.size > 1 and valid_change.std() > 0:
+        change_zscore = (change - valid_change.mean()) / valid_change.std()
+    else:
+        change_zscore = np.zeros_like(change)
+
+    frame = pd.DataFrame({
+        'ticker': batch['ticker'],
+        'momentum': momentum,
+        'risk': risk,
+        'dollar_volume': dollar_volume,
+        'change_zscore': change_zscore,
+        'big_mover': np.abs(change) >= BIG_MOVE_PERCENT,
+        'realized_vol': realized_vol,
+        'atr_pct': atr_pct,
+        'volume_spike': volume_spike,
+        'relative_volume': rvol,
+        'unusual_activity': unusual,
+    })
+    for name in aligned.columns.difference(frame.columns, sort=False):
+        frame[name] = aligned[name].to_numpy()
+    return frame
+
+
+def analyze_quote(quote, indicators=None):
+    """analyze_quotes() for a single quote, without building a batch
+
+    indicators is a dict of this ticker's indicator values. Returns the
+    analysis_by_ticker() row; change_zscore is 0 as there is no batch.
+    """
+    indicators = indicators or {}
+    price, change = quote.current_price, quote.change_percent
+    has_price = quote.has_price
+    realized_vol = _number(indicators, 'realized_vol')
+    atr_pct = _number(indicators, 'atr_pct')
+
+    if math.isnan(change):
+        momentum = NEUTRAL
+    elif atr_pct > 0:
+        momentum = _momentum(change / atr_pct, ATR_MOVE_BOUNDS)
+    else:
+        momentum = _momentum(change, PERCENT_MOVE_BOUNDS)
+
+    if not math.isnan(realized_vol):
+        risk = _bucket(realized_vol, VOL_RISK_BOUNDS, VOL_RISK_LABELS, 'right')
+    elif not has_price:
+        risk = UNKNOWN_RISK
+    else:
+        risk = _bucket(price, PRICE_RISK_BOUNDS, PRICE_RISK_LABELS, 'right')
+
+    volume = quote.volume if quote.volume >= 0 else np.nan
+    row = {
+        'momentum': momentum,
+        'risk': risk,
+        'dollar_volume': price * volume if has_price else np.nan,
+        'change_zscore': 0.0,
+        'big_mover': abs(change) >= BIG_MOVE_PERCENT,
+        'realized_vol': realized_vol,
+        'atr_pct': atr_pct,
+        'volume_spike': _number(indicators, 'volume_spike'),
+        'relative_volume': _number(indicators, 'relative_volume'),
+        # NaN is "not known", as fillna(False) has it in the batch
+        'unusual_activity': _flag(indicators.get('unusual_activity')),
+    }
+    for name, value in indicators.items():
+        row.setdefault(name, value)
+    return row
+
+
+def _bucket(value, bounds, labels, side):
+    """The label for where value (a number or an array) falls among bounds
+
+    side='right' puts a value equal to a bound above it, 'left' below it.
+    """
+    if isinstance(value, np.ndarray):
+        return np.asarray(labels)[np.searchsorted(bounds, value, side)]
+    return labels[(bisect_right if side == 'right' else bisect_left)(bounds, value)]
+
+
+def _momentum(move, bounds):
+    """Momentum label of a move; a move must pass a bound to reach the next label"""
+    return _bucket(move, bounds, MOMENTUM_LABELS, 'left')
+
+
+def _number(indicators, name):
+    """An indicator value as a float (NaN when not given)"""
+    value = indicators.get(name)
+    return np.nan if value is None else float(value)
+
+
+def _flag(value):
+    """An indicator value as a bool (False when not given or NaN)"""
+    return value is not None and bool(pd.notna(value) and value)
+
+
+def _column(aligned, name):
+    """An indicator column as floats (all NaN when not given)"""
+    if name in aligned:
+        return aligned[name].to_numpy(dtype=float)
+    return np.full(len(aligned), np.nan)
+
+
+def analysis_by_ticker(frame):
+    """Index an analyze_quotes() result by ticker for the renderers"""
+    return frame.set_index('ticker').to_dict('index')
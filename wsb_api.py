@@ -0,0 +1,203 @@
+import asyncio
+import hashlib
+import json
+import logging
+import math
+from datetime import datetime, timedelta
+from urllib.parse import urlsplit
+
+import numpy as np
+
+from wsb_extract import CASHTAG, KNOWN, MENTION_WEIGHTS, OTHER
+
+logger = logging.getLogger(__name__)
+
+# Rolling window of the /mentions document and bars per /tickers/<T> document
+MENTION_DAYS = 7
+HISTORY_BARS = 60
+TOP_MENTIONS = 50
+
+MAX_HEADERS = 100
+REASONS = {200: 'OK', 304: 'Not Modified', 404: 'Not Found', 405: 'Method Not Allowed', 400: 'Bad Request'}
+
+
+class ApiCache:
+    """Pre-serialized JSON documents keyed by request path
+
+    refresh() renders every document once, with its ETag, and swaps the
+    whole set in a single assignment, so readers on the event loop never
+    see a half-updated cache and never do any work beyond a dict lookup.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self.refresh({})
+
+    def refresh(self, documents):
+        """Replace the cache with documents ({path: JSON-serializable})"""
+        refreshed_at = datetime.now().isoformat(timespec='seconds')
+        documents = dict(documents)
+        documents.setdefault('/health', {'status': 'ok', 'refreshed_at': refreshed_at})
+        documents['/'] = {'endpoints': sorted(documents) + ['/'], 'refreshed_at': refreshed_at}
+        self._entries = {path: _entry(document) for path, document in documents.items()}
+
+    def get(self, path):
+        """(body, etag) for path, or None"""
+        return self._entries.get(path)
+
+
+class ApiServer:
+    """Minimal asyncio HTTP/1.1 server answering GETs from an ApiCache
+
+    Read-only: requests only look up pre-rendered documents (with
+    If-None-Match / 304 support) and never trigger a scrape.
+    """
+
+    def __init__(self, cache, host='127.0.0.1', port=8080):
+        self.cache = cache
+        self.host = host
+        self.port = port
+
+    async def serve(self):
+        """Serve until cancelled (port 0 picks a free port, stored in self.port)"""
+        server = await asyncio.start_server(self._handle, self.host, self.port, backlog=1024)
+        self.port = server.sockets[0].getsockname()[1]
+        logger.info("API serving on http://%s:%d/", self.host, self.port)
+        async with server:
+            await server.serve_forever()
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+
+                headers = {}
+                for _ in range(MAX_HEADERS):
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                parts = request_line.decode('latin-1').split()
+                if len(parts) != 3:
+                    writer.write(self._response(400, b'', None, False))
+                    break
+                method, target, version = parts
+
+                keep_alive = (headers.get('connection', '').lower() != 'close'
+                              if version == 'HTTP/1.1' else headers.get('connection', '').lower() == 'keep-alive')
+                writer.write(self._respond(method, target, headers, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.LimitOverrunError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    def _respond(self, method, target, headers, keep_alive):
+        if method not in ('GET', 'HEAD'):
+            return self._response(405, _error('method not allowed'), None, keep_alive)
+
+        entry = self.cache.get(urlsplit(target).path.rstrip('/') or '/')
+        if entry is None:
+            return self._response(404, _error('not found'), None, keep_alive)
+
+        body, etag = entry
+        if etag in headers.get('if-none-match', ''):
+            return self._response(304, b'', etag, keep_alive)
+        return self._response(200, b'' if method == 'HEAD' else body, etag, keep_alive, len(body))
+
+    def _response(self, status, body, etag, keep_alive, length=None):
+        head = [f"HTTP/1.1 {status} {REASONS[status]}",
+                "Content-Type: application/json",
+                f"Content-Length: {len(body) if length is None else length}",
+                "Cache-Control: no-cache"]
+        if etag:
+            head.append(f"ETag: {etag}")
+        if not keep_alive:
+            head.append("Connection: close")
+        return ('\r\n'.join(head) + '\r\n\r\n').encode('latin-1') + body
+
+
+def build_documents(generated_at, quotes, analysis, mentions=None, load_histories=None, subreddit_weights=None):
+    """API documents for one run
+
+    quotes are the run's ranked Quotes and analysis its analysis_by_ticker()
+    result; mentions is a MentionStore.load() frame and load_histories
+    returns {ticker: OHLCV bars} for a list of tickers (e.g.
+    PriceHistory.history_many). Produces /rankings, /mentions and
+    /tickers/<T> for the ranked and most mentioned tickers.
+    """
+    stamp = generated_at.isoformat(timespec='seconds')
+    rankings = [dict(quote.to_dict(), rank=rank, analysis=analysis.get(quote.ticker, {}))
+                for rank, quote in enumerate(quotes, 1)]
+    daily = rolling_mentions(mentions, generated_at.date(), subreddit_weights)
+
+    totals = {ticker: sum(days.values()) for ticker, days in daily.items()}
+    top = sorted(totals, key=totals.get, reverse=True)[:TOP_MENTIONS]
+    documents = {
+        '/rankings': {'generated_at': stamp, 'tickers': rankings},
+        '/mentions': {'generated_at': stamp, 'days': MENTION_DAYS,
+                      'tickers': [{'ticker': t, 'total': totals[t], 'daily': daily[t]} for t in top]},
+    }
+
+    by_ticker = {row['ticker']: row for row in rankings}
+    tickers = list(dict.fromkeys(list(by_ticker) + top))
+    histories = load_histories(tickers) if load_histories else {}
+    for ticker in tickers:
+        bars = histories.get(ticker)
+        prices = [] if bars is None else [
+            {'date': day.date().isoformat(), 'close': close, 'volume': volume}
+            for day, close, volume in zip(bars.index[-HISTORY_BARS:], bars['close'].iloc[-HISTORY_BARS:],
+                                          bars['volume'].iloc[-HISTORY_BARS:])]
+        documents[f'/tickers/{ticker}'] = {
+            'generated_at': stamp,
+            'ticker': ticker,
+            'ranking': by_ticker.get(ticker),
+            'mentions': daily.get(ticker, {}),
+            'prices': prices,
+        }
+    return documents
+
+
+def rolling_mentions(mentions, today, subreddit_weights=None):
+    """{ticker: {day: weighted mentions}} over the last MENTION_DAYS days"""
+    if mentions is None or mentions.empty:
+        return {}
+    recent = mentions[mentions['day'] > str(today - timedelta(days=MENTION_DAYS))]
+    weighted = (recent[CASHTAG] * MENTION_WEIGHTS[CASHTAG] + recent[KNOWN] * MENTION_WEIGHTS[KNOWN]
+                + recent[OTHER] * MENTION_WEIGHTS[OTHER])
+    if subreddit_weights:
+        weighted = weighted * recent['subreddit'].map(subreddit_weights).fillna(1.0)
+    per_day = weighted.groupby([recent['ticker'], recent['day'].dt.strftime('%Y-%m-%d')]).sum()
+
+    daily = {}
+    for (ticker, day), count in per_day.items():
+        daily.setdefault(ticker, {})[day] = count
+    return daily
+
+
+def _entry(document):
+    body = json.dumps(_clean(document), separators=(',', ':')).encode()
+    return body, '"' + hashlib.sha1(body).hexdigest()[:20] + '"'
+
+
+def _clean(value):
+    """JSON-safe copy: NumPy scalars to Python, NaN to None"""
+    if isinstance(value, dict):
+        return {str(k): _clean(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_clean(v) for v in value]
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+
+def _error(message):
+    return json.dumps({'error': message}).encode()
@@ -0,0 +1,212 @@
+"""Backtest mention-ranking rules against the cached price history
+
+    python wsb_backtest.py --grid cashtag_weight=1,2,3 known_weight=1,2 velocity_weight=0,0.5,1
+    python wsb_backtest.py --horizons 1,5,10 --start 2026-01-01 --output sweep.csv
+
+Joins the mention counts stored by each run (MENTION_HISTORY_DB) with the
+daily bars in PRICE_HISTORY_DIR. Every rule ranks each day's tickers,
+keeps the top ones, and is scored by their forward returns from that day's
+close. Each day uses its last run captured at or before --cutoff (market
+time, default the open), so later runs that saw the day's move are never
+used to pick it. The same scoring is applied to every mentioned ticker as a
+benchmark. Nothing is downloaded.
+"""
+import argparse
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from wsb_extract import CASHTAG, KNOWN, MENTION_WEIGHTS, OTHER, parse_subreddits
+from wsb_history import read_cached_history
+from wsb_mentions import MentionStore
+
+KINDS = (CASHTAG, KNOWN, OTHER)
+
+# The ranking run_daily_scrape uses today: 3/2/1 weights, no velocity,
+# a minimum score of 2 and an 8-ticker report
+DEFAULT_RULE = {
+    'cashtag_weight': float(MENTION_WEIGHTS[CASHTAG]),
+    'known_weight': float(MENTION_WEIGHTS[KNOWN]),
+    'other_weight': float(MENTION_WEIGHTS[OTHER]),
+    'velocity_weight': 0.0,
+    'top_n': 8,
+    'min_score': 2.0,
+}
+DEFAULT_HORIZONS = (1, 5)
+# Decision time (market time): the snapshot a day's picks are made from
+DEFAULT_CUTOFF = '09:30'
+
+# Set in each worker process so the panel is pickled once per process
+_worker_panel = None
+_worker_horizons = None
+
+
+def build_panel(mentions, histories, subreddit_weights=None, horizons=DEFAULT_HORIZONS):
+    """Align stored mention counts with forward returns on trading days
+
+    mentions is a MentionStore.load() frame and histories maps ticker ->
+    OHLCV bars. Mentions captured on a non-trading day count towards the
+    next trading day. Returns a dict of NumPy arrays shaped (days, tickers):
+    one per mention kind (subreddit weights applied) and one forward return
+    array per horizon, plus the day and ticker labels.
+    """
+    if mentions.empty or not histories:
+        raise ValueError("Need both stored mentions and cached price history to backtest")
+
+    close = pd.DataFrame({t: h['close'] for t, h in histories.items()}).sort_index()
+    counts = mentions[list(KINDS)].astype(float)
+    if subreddit_weights:
+        counts = counts.mul(mentions['subreddit'].map(subreddit_weights).fillna(1.0), axis=0)
+
+    position = close.index.searchsorted(mentions['day'])
+    in_range = position < len(close.index)
+    counts = counts[in_range]
+    counts['day'] = close.index[position[in_range]]
+    counts['ticker'] = mentions['ticker'][in_range]
+    grouped = counts.groupby(['day', 'ticker'])[list(KINDS)].sum()
+
+    # Only days with a stored snapshot; gaps would look like zero mentions
+    days = grouped.index.get_level_values('day').unique().sort_values()
+    tickers = grouped.index.get_level_values('ticker').unique().sort_values()
+    panel = {'days': days.to_numpy(), 'tickers': tickers.to_numpy()}
+    for kind in KINDS:
+        panel[kind] = grouped[kind].unstack(fill_value=0.0).reindex(
+            index=days, columns=tickers, fill_value=0.0).to_numpy()
+
+    close = close.reindex(columns=tickers)
+    for horizon in horizons:
+        forward = close.shift(-horizon) / close - 1
+        panel[f'return_{horizon}d'] = forward.reindex(days).to_numpy()
+    return panel
+
+
+def evaluate(panel, rule, horizons=DEFAULT_HORIZONS):
+    """Score one ranking rule; returns the rule plus per-horizon metrics
+
+    The score is the weighted mention count plus velocity_weight times its
+    change since the previous snapshot. Each day the top_n tickers with a
+    weighted count of at least min_score are picked. Metrics per horizon:
+    picks, mean_return, hit_rate (share of positive returns), and
+    excess_return over the mean return of every mentioned ticker.
+    """
+    score = (rule['cashtag_weight'] * panel[CASHTAG] + rule['known_weight'] * panel[KNOWN]
+             + rule['other_weight'] * panel[OTHER])
+    velocity = np.diff(score, axis=0, prepend=score[:1])
+    signal = score + rule['velocity_weight'] * velocity
+
+    eligible = score >= rule['min_score']
+    order = np.argsort(np.where(eligible, -signal, np.inf), axis=1, kind='stable')
+    ranks = np.empty_like(order)
+    np.put_along_axis(ranks, order, np.arange(order.shape[1])[None, :].repeat(order.shape[0], axis=0), axis=1)
+    selected = eligible & (ranks < rule['top_n'])
+    mentioned = score > 0
+
+    result = dict(rule)
+    for horizon in horizons:
+        returns = panel[f'return_{horizon}d']
+        known = ~np.isnan(returns)
+        picked = selected & known
+        universe = mentioned & known
+
+        picks = int(picked.sum())
+        mean_return = float(returns[picked].mean()) if picks else np.nan
+        universe_return = float(returns[universe].mean()) if universe.any() else np.nan
+        result[f'picks_{horizon}d'] = picks
+        result[f'mean_return_{horizon}d'] = mean_return
+        result[f'hit_rate_{horizon}d'] = float((returns[picked] > 0).mean()) if picks else np.nan
+        result[f'excess_return_{horizon}d'] = mean_return - universe_return
+    return result
+
+
+def expand_grid(grid):
+    """Every combination of {parameter: [values]} merged over DEFAULT_RULE"""
+    names = list(grid)
+    return [dict(DEFAULT_RULE, **dict(zip(names, values)))
+            for values in itertools.product(*(grid[name] for name in names))]
+
+
+def sweep(panel, rules, horizons=DEFAULT_HORIZONS, workers=None):
+    """Evaluate many rules, in parallel worker processes when there are several"""
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(rules) < 2:
+        rows = [evaluate(panel, rule, horizons) for rule in rules]
+    else:
+        chunksize = max(1, len(rules) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(panel, horizons)) as pool:
+            rows = list(pool.map(_evaluate_in_worker, rules, chunksize=chunksize))
+
+    results = pd.DataFrame(rows)
+    return results.sort_values(f'excess_return_{horizons[0]}d', ascending=False, na_position='last')
+
+
+def _init_worker(panel, horizons):
+    global _worker_panel, _worker_horizons
+    _worker_panel = panel
+    _worker_horizons = horizons
+
+
+def _evaluate_in_worker(rule):
+    return evaluate(_worker_panel, rule, _worker_horizons)
+
+
+def parse_grid(items):
+    """Parse ['name=1,2,3', ...] into {name: [values]}"""
+    grid = {}
+    for item in items:
+        name, _, values = item.partition('=')
+        if name not in DEFAULT_RULE or not values:
+            raise ValueError(f"Bad grid entry {item!r}; parameters: {', '.join(DEFAULT_RULE)}")
+        cast = int if name == 'top_n' else float
+        grid[name] = [cast(value) for value in values.split(',')]
+    return grid
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backtest WSB mention-ranking rules")
+    parser.add_argument('--db', default=os.getenv('MENTION_HISTORY_DB', 'mention_history.db'),
+                        help="mention history database (default: MENTION_HISTORY_DB or mention_history.db)")
+    parser.add_argument('--prices', default=os.getenv('PRICE_HISTORY_DIR', 'price_history'),
+                        help="price history cache directory (default: PRICE_HISTORY_DIR or price_history)")
+    parser.add_argument('--start', help="first mention day to use (YYYY-MM-DD)")
+    parser.add_argument('--end', help="last mention day to use (YYYY-MM-DD)")
+    parser.add_argument('--cutoff', default=DEFAULT_CUTOFF, metavar='HH:MM',
+                        help=f"use each day's last run at or before this market time (default: {DEFAULT_CUTOFF})")
+    parser.add_argument('--grid', nargs='*', default=[], metavar='PARAM=V1,V2',
+                        help=f"parameter values to sweep ({', '.join(DEFAULT_RULE)})")
+    parser.add_argument('--horizons', default=','.join(map(str, DEFAULT_HORIZONS)),
+                        help="forward return horizons in trading days (default: 1,5)")
+    parser.add_argument('--subreddits', default=os.getenv('SUBREDDITS', 'wallstreetbets:1'),
+                        help="subreddit weights, as in SUBREDDITS")
+    parser.add_argument('--workers', type=int, help="worker processes (default: one per core)")
+    parser.add_argument('--output', help="write all results to this CSV file")
+    args = parser.parse_args()
+
+    horizons = tuple(int(h) for h in args.horizons.split(','))
+    rules = expand_grid(parse_grid(args.grid))
+    if DEFAULT_RULE not in rules:
+        rules.append(dict(DEFAULT_RULE))
+
+    mentions = MentionStore(args.db).load(args.start, args.end, cutoff=args.cutoff)
+    histories = read_cached_history(args.prices, mentions['ticker'].unique())
+    panel = build_panel(mentions, histories, parse_subreddits(args.subreddits), horizons)
+    print(f"Backtesting {len(rules)} rules over {len(panel['days'])} days and {len(panel['tickers'])} tickers "
+          f"({len(histories)} with price history)")
+
+    results = sweep(panel, rules, horizons, args.workers)
+    with pd.option_context('display.width', 200, 'display.max_columns', None):
+        print(results.head(10).to_string(index=False))
+        print("\nCurrent ranking rule:")
+        current = results[(results[list(DEFAULT_RULE)] == pd.Series(DEFAULT_RULE)).all(axis=1)]
+        print(current.to_string(index=False))
+
+    if args.output:
+        results.to_csv(args.output, index=False)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
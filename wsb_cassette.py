@@ -0,0 +1,306 @@
+import json
+import logging
+import os
+import random
+import re
+import time
+from collections import defaultdict, deque
+from datetime import datetime
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+# Bump when the interaction format changes; older cassettes must be re-recorded
+CASSETTE_VERSION = 1
+
+# Query parameters that must never be written to a cassette
+SECRET_PARAMS = re.compile(r'([?&](?:apikey|api_key|token)=)[^&]*', re.IGNORECASE)
+# Query parameters that change on every run (history time ranges)
+VOLATILE_PARAMS = re.compile(r'([?&](?:period1|period2)=)[^&]*')
+
+# Post attributes captured from PRAW listings
+POST_FIELDS = ('id', 'title', 'selftext', 'score', 'num_comments', 'created_utc')
+
+
+class CassetteMiss(Exception):
+    """Raised in replay mode when an interaction was never recorded"""
+
+
+class InjectedFailure(Exception):
+    """Failure injected by the replay harness"""
+
+
+def scrub_url(url):
+    """Remove credentials and volatile parameters so a URL can be stored and matched"""
+    url = SECRET_PARAMS.sub(r'\1REDACTED', url)
+    return VOLATILE_PARAMS.sub(r'\1*', url)
+
+
+class Cassette:
+    """Record every external interaction of WSBScraper, or replay them offline
+
+    Recording wraps the real requests module, PRAW client and Gmail service.
+    Replaying swaps them for local stand-ins that serve the recorded data,
+    optionally adding latency (seconds per call) and random failures
+    (probability per call, seeded so runs stay deterministic).
+    """
+
+    def __init__(self, path, mode, latency=0.0, failure_rate=0.0, seed=0):
+        if mode not in ('record', 'replay'):
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        self.path = path
+        self.mode = mode
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.random = random.Random(seed)
+        self.interactions = []
+        self.settings = {}
+        self._queues = defaultdict(deque)
+
+        if self.replaying:
+            self._load()
+
+    @property
+    def recording(self):
+        return self.mode == 'record'
+
+    @property
+    def replaying(self):
+        return self.mode == 'replay'
+
+    def attach(self, scraper):
+        """Wrap (record) or replace (replay) the scraper's external clients"""
+        if self.recording:
+            self.settings['alpha_vantage'] = bool(scraper.alpha_key)
+            scraper.http = RecordingHttp(self, scraper.http)
+            if scraper.reddit is not None:
+                scraper.reddit = RecordingReddit(self, scraper.reddit)
+            if scraper.gmail_service is not None:
+                scraper.gmail_service = RecordingGmail(self, scraper.gmail_service)
+        else:
+            # Quote lookups must take the same Alpha Vantage/Yahoo path as when recorded
+            scraper.alpha_key = 'REPLAY' if self.settings.get('alpha_vantage') else None
+            scraper.email_to = scraper.email_to or 'replay@localhost'
+            scraper.email_from = scraper.email_from or 'replay@localhost'
+            scraper.http = ReplayHttp(self)
+            scraper.reddit = ReplayReddit(self)
+            scraper.gmail_service = ReplayGmail(self)
+
+    def record(self, kind, key, **payload):
+        self.interactions.append(dict(kind=kind, key=key, **payload))
+
+    def next(self, kind, key):
+        """Return the next recorded interaction for (kind, key) in replay mode"""
+        if self.latency:
+            time.sleep(self.latency)
+        if self.failure_rate and self.random.random() < self.failure_rate:
+            raise InjectedFailure(f"Injected {kind} failure for {key}")
+
+        queue = self._queues[(kind, key)]
+        if not queue:
+            raise CassetteMiss(f"No recorded {kind} interaction for {key}")
+        # Keep serving the last interaction once the recorded ones run out
+        return queue.popleft() if len(queue) > 1 else queue[0]
+
+    def save(self):
+        """Write the recorded interactions to the cassette file"""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path, 'w') as f:
+            json.dump({
+                'version': CASSETTE_VERSION,
+                'recorded_at': datetime.now().isoformat(),
+                'settings': self.settings,
+                'interactions': self.interactions,
+            }, f, indent=1)
+        logger.info("Cassette saved to %s (%d interactions)", self.path, len(self.interactions))
+
+    def _load(self):
+        with open(self.path) as f:
+            data = json.load(f)
+        if data.get('version') != CASSETTE_VERSION:
+            raise ValueError(f"Cassette {self.path} has version {data.get('version')}, "
+                             f"expected {CASSETTE_VERSION}; re-record it")
+        self.settings = data.get('settings', {})
+        self.interactions = data['interactions']
+        for interaction in self.interactions:
+            self._queues[(interaction['kind'], interaction['key'])].append(interaction)
+
+
+# --- HTTP (SwaggyStocks, Alpha Vantage, Yahoo) ---
+
+class ReplayResponse:
+    """Minimal stand-in for requests.Response"""
+
+    def __init__(self, status_code, text):
+        self.status_code = status_code
+        self.text = text
+        self.content = text.encode('utf-8')
+
+    def json(self):
+        return json.loads(self.text)
+
+
+class RecordingHttp:
+    def __init__(self, cassette, http):
+        self.cassette = cassette
+        self.http = http
+
+    def get(self, url, **kwargs):
+        response = self.http.get(url, **kwargs)
+        self.cassette.record('http', scrub_url(url), status=response.status_code, body=response.text)
+        return response
+
+
+class ReplayHttp:
+    def __init__(self, cassette):
+        self.cassette = cassette
+
+    def get(self, url, **kwargs):
+        try:
+            interaction = self.cassette.next('http', scrub_url(url))
+        except InjectedFailure as e:
+            raise requests.ConnectionError(str(e))
+        return ReplayResponse(interaction['status'], interaction['body'])
+
+
+# --- Reddit (PRAW listings) ---
+
+class ReplayPost:
+    def __init__(self, fields):
+        for name in POST_FIELDS:
+            setattr(self, name, fields.get(name))
+
+
+class RecordingReddit:
+    def __init__(self, cassette, reddit):
+        self.cassette = cassette
+        self.reddit = reddit
+
+    def subreddit(self, name):
+        return RecordingSubreddit(self.cassette, name, self.reddit.subreddit(name))
+
+
+class RecordingSubreddit:
+    def __init__(self, cassette, name, subreddit):
+        self.cassette = cassette
+        self.name = name
+        self.subreddit = subreddit
+
+    def hot(self, limit=None):
+        posts = list(self.subreddit.hot(limit=limit))
+        self.cassette.record('reddit', f"{self.name}/hot/{limit}",
+                             posts=[{name: getattr(post, name, None) for name in POST_FIELDS} for post in posts])
+        return iter(posts)
+
+
+class ReplayReddit:
+    def __init__(self, cassette):
+        self.cassette = cassette
+
+    def subreddit(self, name):
+        return ReplaySubreddit(self.cassette, name)
+
+
+class ReplaySubreddit:
+    def __init__(self, cassette, name):
+        self.cassette = cassette
+        self.name = name
+
+    def hot(self, limit=None):
+        interaction = self.cassette.next('reddit', f"{self.name}/hot/{limit}")
+        return iter([ReplayPost(fields) for fields in interaction['posts']])
+
+
+# --- Gmail ---
+# Messages are matched by order: their content embeds the send date.
+
+class RecordingGmail:
+    def __init__(self, cassette, service):
+        self.cassette = cassette
+        self.service = service
+
+    def users(self):
+        return self
+
+    def messages(self):
+        return self
+
+    def send(self, userId, body):
+        return RecordingSend(self.cassette, self.service.users().messages().send(userId=userId, body=body))
+
+    def new_batch_http_request(self, callback):
+        def recording_callback(request_id, response, exception):
+            self.cassette.record('gmail', 'send', response=response,
+                                 error=str(exception) if exception else None)
+            callback(request_id, response, exception)
+        return RecordingBatch(self.service.new_batch_http_request(callback=recording_callback))
+
+
+class RecordingSend:
+    def __init__(self, cassette, request):
+        self.cassette = cassette
+        self.request = request
+
+    def execute(self):
+        response = self.request.execute()
+        self.cassette.record('gmail', 'send', response=response, error=None)
+        return response
+
+
+class RecordingBatch:
+    def __init__(self, batch):
+        self.batch = batch
+
+    def add(self, request, request_id=None):
+        self.batch.add(request.request, request_id=request_id)
+
+    def execute(self):
+        self.batch.execute()
+
+
+class ReplayGmail:
+    def __init__(self, cassette):
+        self.cassette = cassette
+
+    def users(self):
+        return self
+
+    def messages(self):
+        return self
+
+    def send(self, userId, body):
+        return ReplaySend(self.cassette)
+
+    def new_batch_http_request(self, callback):
+        return ReplayBatch(self.cassette, callback)
+
+
+class ReplaySend:
+    def __init__(self, cassette):
+        self.cassette = cassette
+
+    def execute(self):
+        interaction = self.cassette.next('gmail', 'send')
+        if interaction['error']:
+            raise InjectedFailure(interaction['error'])
+        return interaction['response']
+
+
+class ReplayBatch:
+    def __init__(self, cassette, callback):
+        self.cassette = cassette
+        self.callback = callback
+        self.requests = []
+
+    def add(self, request, request_id=None):
+        self.requests.append((request, request_id))
+
+    def execute(self):
+        for request, request_id in self.requests:
+            try:
+                self.callback(request_id, request.execute(), None)
+            except (InjectedFailure, CassetteMiss) as e:
+                self.callback(request_id, None, e)
@@ -0,0 +1,84 @@
+import json
+import logging
+import os
+import re
+import shutil
+import time
+
+logger = logging.getLogger(__name__)
+
+# Run directories older than this are deleted before each run
+DEFAULT_MAX_AGE_HOURS = 24
+
+
+class RunCheckpoint:
+    """JSON outputs of a run's stages under <root>/<run_id>/<stage>.json
+
+    A rerun with the same run ID loads the stages that already completed
+    and only redoes the rest. Files are written atomically, so a crash
+    mid-write leaves the previous checkpoint (or none) behind.
+    """
+
+    def __init__(self, root, run_id):
+        self.root = root
+        self.run_id = run_id
+        self.directory = os.path.join(root, _safe_name(run_id))
+        os.makedirs(self.directory, exist_ok=True)
+
+    def load(self, stage):
+        """Saved output of stage, or None if it has not completed"""
+        path = self._path(stage)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring unreadable checkpoint %s: %s", path, e)
+            return None
+
+    def save(self, stage, data):
+        path = self._path(stage)
+        temporary = f"{path}.tmp"
+        with open(temporary, 'w') as f:
+            json.dump(data, f)
+        os.replace(temporary, path)
+
+    def completed(self):
+        """Names of the stages saved so far"""
+        return sorted(name[:-len('.json')] for name in os.listdir(self.directory) if name.endswith('.json'))
+
+    def _path(self, stage):
+        return os.path.join(self.directory, f"{stage}.json")
+
+
+def send_results(data, recipient):
+    """A loaded 'send' checkpoint as {recipient: {'ok': bool, ...}}
+
+    Subscriber runs save one result per recipient, while single-report runs
+    used to save {'ok': bool} for the EMAIL_TO recipient; a run may resume
+    from either, whichever path it takes this time.
+    """
+    if not data:
+        return {}
+    if isinstance(data.get('ok'), bool):
+        return {recipient: {'ok': data['ok']}}
+    return {email: result for email, result in data.items() if isinstance(result, dict) and 'ok' in result}
+
+
+def expire_checkpoints(root, max_age_hours=DEFAULT_MAX_AGE_HOURS):
+    """Delete run directories not modified within max_age_hours; return how many"""
+    if not os.path.isdir(root):
+        return 0
+    cutoff = time.time() - max_age_hours * 3600
+    removed = 0
+    for name in os.listdir(root):
+        path = os.path.join(root, name)
+        if os.path.isdir(path) and os.path.getmtime(path) < cutoff:
+            shutil.rmtree(path, ignore_errors=True)
+            removed += 1
+    return removed
+
+
+def _safe_name(run_id):
+    return re.sub(r'[^A-Za-z0-9._-]', '_', str(run_id))
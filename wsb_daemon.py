@@ -0,0 +1,122 @@
+import asyncio
+import json
+import logging
+import os
+from datetime import datetime, timedelta
+
+import pytz
+
+# One full report a day at 9:30 AM Buenos Aires time, as before the daemon.
+# Extra intraday jobs are opt-in (SCHEDULE_JOBS), best with REPORT_MODE=auto
+DEFAULT_TIMEZONE = 'America/Argentina/Buenos_Aires'
+# name=HH:MM pairs in the scheduler timezone
+DEFAULT_JOBS = 'daily=09:30'
+HOLIDAYS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'market_holidays.json')
+
+# Longest single sleep, so clock changes and suspends are picked up quickly
+MAX_SLEEP_SECONDS = 300
+
+logger = logging.getLogger(__name__)
+
+
+class MarketCalendar:
+    """Trading days: weekdays that are not listed in the local holiday file
+
+    For a year the file has no holidays for, only weekends are skipped and
+    a warning is logged (once per year) so the file gets extended.
+    """
+
+    def __init__(self, holidays_file=HOLIDAYS_FILE):
+        self.holidays_file = holidays_file
+        self.holidays = set()
+        if os.path.exists(holidays_file):
+            with open(holidays_file) as f:
+                self.holidays = {datetime.strptime(day, '%Y-%m-%d').date()
+                                 for day in json.load(f)['holidays']}
+        self.years = {day.year for day in self.holidays}
+        self._warned_years = set()
+
+    def is_trading_day(self, day):
+        if day.year not in self.years and day.year not in self._warned_years:
+            self._warned_years.add(day.year)
+            logger.warning("No market holidays for %d in %s; only weekends are skipped", day.year,
+                           self.holidays_file, extra={'event': 'holidays_missing', 'year': day.year})
+        return day.weekday() < 5 and day not in self.holidays
+
+
+def parse_jobs(spec):
+    """Parse 'name=HH:MM,name=HH:MM' into (name, time) pairs"""
+    jobs = []
+    for item in spec.split(','):
+        name, at = item.strip().split('=')
+        jobs.append((name.strip(), datetime.strptime(at.strip(), '%H:%M').time()))
+    return jobs
+
+
+class ScheduledJob:
+    def __init__(self, name, at, callback):
+        self.name = name
+        self.at = at
+        self.callback = callback
+
+    def next_run(self, now, timezone, calendar):
+        """Next trading-day trigger strictly after now, in the scheduler timezone"""
+        day = now.astimezone(timezone).date()
+        while True:
+            if calendar.is_trading_day(day):
+                # localize() applies the right UTC offset across DST changes
+                trigger = timezone.localize(datetime.combine(day, self.at))
+                if trigger > now:
+                    return trigger
+            day += timedelta(days=1)
+
+
+class DaemonScheduler:
+    """asyncio scheduler running several daily jobs on market days
+
+    All jobs share one lock, so a job that fires while another run is still
+    in progress is skipped instead of overlapping it. Jobs run in a worker
+    thread so the event loop stays free for other tasks.
+    """
+
+    def __init__(self, calendar=None, timezone=DEFAULT_TIMEZONE):
+        self.calendar = calendar or MarketCalendar()
+        self.timezone = pytz.timezone(timezone)
+        self.jobs = []
+        self._run_lock = asyncio.Lock()
+
+    def add_job(self, name, at, callback):
+        self.jobs.append(ScheduledJob(name, at, callback))
+
+    def next_runs(self):
+        now = datetime.now(pytz.utc)
+        return {job.name: job.next_run(now, self.timezone, self.calendar) for job in self.jobs}
+
+    async def run(self, *services):
+        """Run every job loop, plus any service coroutines, until cancelled"""
+        await asyncio.gather(*(self._job_loop(job) for job in self.jobs), *services)
+
+    async def _job_loop(self, job):
+        while True:
+            trigger = job.next_run(datetime.now(pytz.utc), self.timezone, self.calendar)
+            logger.info("Job '%s' next runs at %s", job.name, trigger.strftime('%Y-%m-%d %H:%M %Z'))
+
+            while True:
+                remaining = (trigger - datetime.now(pytz.utc)).total_seconds()
+                if remaining <= 0:
+                    break
+                await asyncio.sleep(min(remaining, MAX_SLEEP_SECONDS))
+
+            await self._run_job(job)
+
+    async def _run_job(self, job):
+        if self._run_lock.locked():
+            logger.warning("Skipping job '%s': previous run still in progress", job.name)
+            return
+
+        async with self._run_lock:
+            logger.info("Running job '%s'", job.name)
+            try:
+                await asyncio.to_thread(job.callback)
+            except Exception as e:
+                logger.error("Job '%s' failed: %s", job.name, e)
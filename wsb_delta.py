@@ -0,0 +1,118 @@
+import math
+import sqlite3
+from contextlib import closing
+
+import pandas as pd
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshot_runs (
+    run_id TEXT PRIMARY KEY,
+    captured_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS snapshot_runs_captured_at ON snapshot_runs (captured_at);
+CREATE TABLE IF NOT EXISTS snapshots (
+    run_id TEXT NOT NULL,
+    ticker TEXT NOT NULL,
+    rank INTEGER,
+    mentions REAL NOT NULL,
+    price REAL,
+    change_percent REAL,
+    PRIMARY KEY (run_id, ticker)
+);
+"""
+
+# Default thresholds for an intraday delta report
+RANK_JUMP = 3          # places gained in the ranking
+MENTION_SURGE = 2.0    # ratio of current to previous mention score...
+MIN_MENTIONS = 5.0     # ...for tickers with at least this score now
+PRICE_MOVE = 3.0       # % move since the previous snapshot
+
+
+class SnapshotStore:
+    """Per-run snapshots of ranks, mention scores and prices in SQLite
+
+    A run is stored under its run ID (a resumed run replaces its earlier
+    snapshot), and runs are indexed by capture time so the previous one is
+    a single index lookup.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with closing(sqlite3.connect(path, timeout=30)) as db:
+            db.executescript(SCHEMA)
+
+    def record(self, run_id, captured_at, quotes, mentions):
+        """Store a run: its ranked quotes and the mentions of every candidate"""
+        scores = {}
+        for mention in mentions:
+            scores[mention.ticker] = scores.get(mention.ticker, 0.0) + mention.score
+        rows = {ticker: (None, score, None, None) for ticker, score in scores.items()}
+        for rank, quote in enumerate(quotes, 1):
+            rows[quote.ticker] = (rank, scores.get(quote.ticker, 0.0),
+                                  _optional(quote.current_price), _optional(quote.change_percent))
+
+        with closing(sqlite3.connect(self.path, timeout=30)) as db, db:
+            db.execute("DELETE FROM snapshots WHERE run_id = ?", (run_id,))
+            db.execute("INSERT OR REPLACE INTO snapshot_runs VALUES (?, ?)",
+                       (run_id, captured_at.isoformat(timespec='seconds')))
+            db.executemany("INSERT INTO snapshots VALUES (?, ?, ?, ?, ?, ?)",
+                           [(run_id, ticker) + row for ticker, row in rows.items()])
+
+    def previous(self, run_id):
+        """(run_id, captured_at) of the latest other run, or None"""
+        with closing(sqlite3.connect(self.path, timeout=30)) as db:
+            return db.execute("SELECT run_id, captured_at FROM snapshot_runs WHERE run_id != ?"
+                              " ORDER BY captured_at DESC LIMIT 1", (run_id,)).fetchone()
+
+    def load(self, run_id):
+        """One run's snapshot as a DataFrame indexed by ticker"""
+        with closing(sqlite3.connect(self.path, timeout=30)) as db:
+            frame = pd.read_sql_query("SELECT ticker, rank, mentions, price, change_percent FROM snapshots"
+                                      " WHERE run_id = ?", db, params=(run_id,), index_col='ticker')
+        return frame.astype('float64')
+
+
+def compute_delta(previous, current, rank_jump=RANK_JUMP, mention_surge=MENTION_SURGE,
+                  min_mentions=MIN_MENTIONS, price_move=PRICE_MOVE):
+    """What changed between two snapshots (SnapshotStore.load frames)
+
+    Returns a dict of lists of row dicts: new_entrants (ranked now, not
+    before), rank_jumps, mention_surges and price_moves. Every list is
+    empty when nothing crosses its threshold.
+    """
+    joined = current.join(previous, how='left', rsuffix='_previous')
+    ranked = joined[joined['rank'].notna()]
+
+    new_entrants = ranked[ranked['rank_previous'].isna()]
+    rank_change = ranked['rank_previous'] - ranked['rank']
+    rank_jumps = ranked.assign(rank_change=rank_change)[rank_change >= rank_jump]
+
+    # Tickers with no previous score (absent or zero) surge once they reach min_mentions
+    had_mentions = joined['mentions_previous'] > 0
+    surge = joined['mentions'] / joined['mentions_previous'].where(had_mentions)
+    mention_surges = joined.assign(surge=surge)[
+        (joined['mentions'] >= min_mentions) & ((surge >= mention_surge) | ~had_mentions)]
+
+    move = (ranked['price'] / ranked['price_previous'] - 1) * 100
+    price_moves = ranked.assign(move_percent=move)[move.abs() >= price_move]
+
+    return {
+        'new_entrants': _rows(new_entrants.sort_values('rank')),
+        'rank_jumps': _rows(rank_jumps.sort_values('rank_change', ascending=False)),
+        'mention_surges': _rows(mention_surges.sort_values('mentions', ascending=False)),
+        'price_moves': _rows(price_moves.reindex(price_moves['move_percent'].abs().sort_values(ascending=False).index)),
+    }
+
+
+def has_changes(delta):
+    return any(delta.values())
+
+
+def _rows(frame):
+    return [dict({'ticker': ticker}, **{k: (None if isinstance(v, float) and math.isnan(v) else v)
+                                        for k, v in row.items()})
+            for ticker, row in frame.to_dict('index').items()]
+
+
+def _optional(value):
+    return None if math.isnan(value) else value
@@ -0,0 +1,222 @@
+import csv
+import gzip
+import io
+import json
+import math
+import os
+
+import pandas as pd
+
+# One row per candidate; CSV and Parquet columns in this order
+FIELDS = [
+    'run_id', 'captured_at', 'ticker', 'sources', 'weight', 'cashtag', 'status', 'rank', 'rejection_reason',
+    'current_price', 'previous_close', 'change_percent', 'volume', 'market_cap', 'quote_source',
+    'momentum', 'risk', 'dollar_volume', 'change_zscore', 'big_mover', 'realized_vol', 'atr_pct',
+    'volume_spike', 'relative_volume', 'unusual_activity', 'bullish_ratio', 'sentiment_mentions',
+    'options_calls', 'options_puts', 'options_bullish_ratio',
+]
+QUOTE_FIELDS = ['current_price', 'previous_close', 'change_percent', 'volume', 'market_cap']
+ANALYSIS_FIELDS = FIELDS[FIELDS.index('momentum'):]
+
+# Why a candidate did not make the rankings
+NO_PRICE = 'no_price'              # quoted, but no usable price came back
+NOT_PRICED = 'not_priced'          # queued, but the run had enough tickers first
+LOW_CONFIDENCE = 'low_confidence'  # neither a known ticker nor a cashtag
+
+COMPRESSIONS = ('none', 'gzip', 'zstd')
+# Rows handed to the sinks per write
+CHUNK_ROWS = 500
+BUFFER_BYTES = 1 << 16
+
+
+def candidate_rows(run_id, captured_at, quotes, mentions, analysis, attempted, known_tickers):
+    """Yield one export row per candidate of a run
+
+    quotes are the ranked Quotes, mentions every scraped Mention, analysis
+    the analysis_by_ticker() result and attempted the tickers a quote was
+    requested for. Ranked fallback tickers without mentions are included.
+    """
+    stamp = captured_at.isoformat(timespec='seconds')
+    by_ticker = {}
+    for mention in mentions:
+        entry = by_ticker.setdefault(mention.ticker, {'sources': [], 'weight': 0.0, 'cashtag': False})
+        if mention.source not in entry['sources']:
+            entry['sources'].append(mention.source)
+        entry['weight'] += mention.score
+        entry['cashtag'] = entry['cashtag'] or mention.cashtag
+
+    ranks = {quote.ticker: (rank, quote) for rank, quote in enumerate(quotes, 1)}
+    attempted = set(attempted)
+    for ticker in list(by_ticker) + [t for t in ranks if t not in by_ticker]:
+        entry = by_ticker.get(ticker, {'sources': [], 'weight': 0.0, 'cashtag': False})
+        rank, quote = ranks.get(ticker, (None, None))
+        if quote is not None:
+            reason = None
+        elif ticker in attempted:
+            reason = NO_PRICE
+        elif ticker in known_tickers or entry['cashtag']:
+            reason = NOT_PRICED
+        else:
+            reason = LOW_CONFIDENCE
+
+        row = {
+            'run_id': run_id,
+            'captured_at': stamp,
+            'ticker': ticker,
+            'sources': '+'.join(entry['sources']) or 'fallback',
+            'weight': entry['weight'],
+            'cashtag': entry['cashtag'],
+            'status': 'ranked' if quote is not None else 'rejected',
+            'rank': rank,
+            'rejection_reason': reason,
+            'quote_source': quote.source if quote else None,
+        }
+        quote_fields = quote.to_dict() if quote else {}
+        ticker_analysis = analysis.get(ticker, {}) if quote else {}
+        for name in QUOTE_FIELDS:
+            row[name] = quote_fields.get(name)
+        for name in ANALYSIS_FIELDS:
+            row[name] = _plain(ticker_analysis.get(name))
+        yield row
+
+
+class NdjsonSink:
+    """JSON Lines appended to one file across runs"""
+
+    def __init__(self, path, compression='none'):
+        self.path = path
+        self._file = _open_text(path, compression)
+
+    def write(self, rows):
+        self._file.write(''.join(json.dumps(row, separators=(',', ':'), ensure_ascii=False) + '\n' for row in rows))
+
+    def close(self):
+        self._file.close()
+
+
+class CsvSink:
+    """CSV appended to one file across runs (header written once)"""
+
+    def __init__(self, path, compression='none'):
+        self.path = path
+        new = not os.path.exists(path) or os.path.getsize(path) == 0
+        self._file = _open_text(path, compression)
+        self._writer = csv.DictWriter(self._file, fieldnames=FIELDS)
+        if new:
+            self._writer.writeheader()
+
+    def write(self, rows):
+        self._writer.writerows(rows)
+
+    def close(self):
+        self._file.close()
+
+
+class ParquetSink:
+    """One Parquet file per run under a directory (<run_id>.parquet)
+
+    Parquet files cannot be appended to, so rows are buffered and written
+    once on close (not at all if nothing was written); compression is
+    Parquet's own column codec.
+    """
+
+    def __init__(self, directory, run_id, compression='none'):
+        os.makedirs(directory, exist_ok=True)
+        safe_id = ''.join(c if c.isalnum() or c in '._-' else '_' for c in str(run_id))
+        self.path = os.path.join(directory, f"{safe_id}.parquet")
+        self.compression = None if compression == 'none' else compression
+        self._rows = []
+
+    def write(self, rows):
+        self._rows.extend(rows)
+
+    def close(self):
+        if not self._rows:
+            return
+        frame = pd.DataFrame(self._rows, columns=FIELDS)
+        frame.to_parquet(self.path, index=False, compression=self.compression)
+
+
+class RunExporter:
+    """Stream rows to several sinks in chunks of CHUNK_ROWS"""
+
+    def __init__(self, sinks):
+        self.sinks = sinks
+
+    def export(self, rows):
+        """Write every row to every sink, close the sinks and return the row count"""
+        count = 0
+        chunk = []
+        try:
+            for row in rows:
+                chunk.append(row)
+                if len(chunk) >= CHUNK_ROWS:
+                    self._write(chunk)
+                    count += len(chunk)
+                    chunk = []
+            if chunk:
+                self._write(chunk)
+                count += len(chunk)
+        finally:
+            for sink in self.sinks:
+                sink.close()
+        return count
+
+    def _write(self, chunk):
+        for sink in self.sinks:
+            sink.write(chunk)
+
+
+def parse_sinks(spec, run_id, compression='none'):
+    """Sinks from "ndjson:<file>,csv:<file>,parquet:<directory>" (EXPORT_SINKS)
+
+    If a sink cannot be built, the ones already opened are closed before
+    the error is raised.
+    """
+    if compression not in COMPRESSIONS:
+        raise ValueError(f"Unknown export compression {compression!r}; use one of {', '.join(COMPRESSIONS)}")
+    sinks = []
+    try:
+        for item in filter(None, (part.strip() for part in spec.split(','))):
+            kind, _, path = item.partition(':')
+            if not path:
+                raise ValueError(f"Export sink {item!r} needs a path (kind:path)")
+            if kind == 'ndjson':
+                sinks.append(NdjsonSink(path, compression))
+            elif kind == 'csv':
+                sinks.append(CsvSink(path, compression))
+            elif kind == 'parquet':
+                sinks.append(ParquetSink(path, run_id, compression))
+            else:
+                raise ValueError(f"Unknown export sink {kind!r}; use ndjson, csv or parquet")
+    except Exception:
+        for sink in sinks:
+            sink.close()
+        raise
+    return sinks
+
+
+def _open_text(path, compression):
+    """Buffered text file opened for appending (compressed files gain members)"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    if compression == 'gzip':
+        return io.TextIOWrapper(io.BufferedWriter(gzip.open(path, 'ab'), BUFFER_BYTES), encoding='utf-8', newline='')
+    if compression == 'zstd':
+        try:
+            import zstandard
+        except ImportError:
+            raise RuntimeError("zstd export compression needs the zstandard package") from None
+        raw = zstandard.ZstdCompressor().stream_writer(open(path, 'ab'), closefd=True)
+        return io.TextIOWrapper(io.BufferedWriter(raw, BUFFER_BYTES), encoding='utf-8', newline='')
+    return open(path, 'a', buffering=BUFFER_BYTES, encoding='utf-8', newline='')
+
+
+def _plain(value):
+    """JSON/CSV-safe scalar: NumPy to Python, NaN to None"""
+    if hasattr(value, 'item'):
+        value = value.item()
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    return value
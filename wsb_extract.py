@@ -0,0 +1,335 @@
+import re
+from collections import Counter
+from itertools import accumulate, compress, count, repeat
+
+from wsb_options import OPTION_POSITION, OPTION_QUANTITY, POSITION_AFTER, OptionPosition, OptionsFlow
+
+# $TICKER format (high confidence) and standalone tickers (medium confidence)
+DOLLAR_TICKER = re.compile(r'\$([A-Z]{2,5})\b')
+STANDALONE_TICKER = re.compile(r'\b([A-Z]{3,5})\b')
+# The same, each optionally followed by an options position ("GME 30C 6/21"),
+# so positions come out of the same scan as the tickers when they are wanted
+DOLLAR_POSITION = re.compile(r'\$([A-Z]{2,5})\b' + OPTION_POSITION)
+STANDALONE_POSITION = re.compile(OPTION_QUANTITY + r'([A-Z]{3,5})\b' + OPTION_POSITION)
+# Every position has a strike, so texts without a digit use the plain scans
+DIGIT = re.compile(r'\d')
+
+# Word fragments that make an unknown standalone ticker unlikely
+NOISE_FRAGMENTS = ('THE', 'AND', 'FOR')
+
+# Mention kinds and their default ranking weights
+CASHTAG = 'cashtag'
+KNOWN = 'known'
+OTHER = 'other'
+MENTION_WEIGHTS = {CASHTAG: 3, KNOWN: 2, OTHER: 1}
+
+# Real symbols that are also everyday words: only counted where the text
+# around them reads like ticker talk (see TickerDisambiguator)
+AMBIGUOUS_TICKERS = frozenset({'ALL', 'ARE', 'CAN', 'NOW', 'OPEN', 'F', 'GE', 'IT'})
+
+# Context scoring: words looked at on each side of a mention, and the
+# score at which an ambiguous word is taken as a ticker
+CONTEXT_TOKENS = 6
+WINDOW_TOKENS = 2 * CONTEXT_TOKENS + 1
+PADDING = [''] * CONTEXT_TOKENS
+ACCEPT_SCORE = 2.0
+CASHTAG_SCORE = 3.0
+SHOUTING_SHARE = 0.7
+SHOUTING_PENALTY = 2.0
+STRIKE_SCORE = 2.0       # 30c, 450p
+PRICE_SCORE = 1.5        # $12.50
+PERCENT_SCORE = 1.0      # 8%
+COMPANY_SCORE = 2.0
+
+# Context words are split on spaces and stripped of this punctuation;
+# words starting with NUMBER_START may be strikes, prices or percentages
+PUNCTUATION = '.,!?;:()[]"\'*~'
+NUMBER_START = frozenset('$0123456789')
+STRIKE = re.compile(r'\d+(?:\.\d+)?[cp]')
+UPPERCASE_BYTES = bytes(range(ord('A'), ord('Z') + 1))
+LOWERCASE_BYTES = bytes(range(ord('a'), ord('z') + 1))
+
+# Word right before / right after the mention, and anywhere in the window
+PREVIOUS_WORDS = {
+    'buy': 2.0, 'bought': 2.0, 'buying': 2.0, 'sell': 1.5, 'sold': 1.5, 'selling': 1.5, 'long': 1.5,
+    'short': 1.5, 'shorting': 1.5, 'holding': 1.0, 'ticker': 2.0,
+    'i': -2.0, 'you': -2.0, 'we': -2.0, 'they': -2.0, 'he': -2.0, 'she': -2.0, 'to': -1.0, 'will': -1.5,
+    'would': -1.5, 'could': -1.5, 'should': -1.5, 'is': -1.0, 'are': -1.0, 'was': -1.0, 'were': -1.0,
+    'not': -1.0, 'the': -1.0, 'a': -1.0, 'for': -0.5,
+}
+NEXT_WORDS = {
+    'calls': 3.0, 'puts': 3.0, 'call': 2.0, 'put': 2.0, 'shares': 3.0, 'stock': 2.5, 'earnings': 2.5,
+    'options': 2.0, 'leaps': 2.5, 'position': 1.5, 'gang': 2.0, 'holders': 2.0, 'bulls': 1.5, 'bears': 1.5,
+    'i': -2.0, 'you': -2.0, 'we': -2.0, 'they': -2.0, 'the': -1.0, 'of': -1.5, 'be': -2.0, 'that': -1.5,
+    'this': -1.0, 'a': -1.0, 'about': -1.0,
+}
+WINDOW_WORDS = {
+    'calls': 1.5, 'puts': 1.5, 'shares': 1.5, 'stock': 1.0, 'ticker': 1.5, 'earnings': 1.5, 'strike': 1.5,
+    'expiry': 1.0, 'dte': 1.5, 'options': 1.0, 'yolo': 1.0, 'dd': 1.0, 'pt': 1.0, 'squeeze': 1.0,
+    'dividend': 1.5, 'guidance': 1.0, 'revenue': 1.0,
+}
+# Per-ticker overrides: grammar that gives the everyday word away, and
+# company names and products that give the ticker away
+PREVIOUS_BY_TICKER = {
+    'OPEN': {'market': -2.5, 'at': -1.5},
+    'NOW': {'right': -2.5, 'until': -2.0, 'by': -1.5},
+    'IT': {'buy': 0.0, 'sell': 0.0, 'do': -1.5},
+}
+NEXT_BY_TICKER = {
+    'ALL': {'in': -2.0, 'time': -2.0, 'day': -1.0, 'my': -1.5, 'these': -1.5},
+    'ARE': {'going': -1.5, 'so': -1.0},
+    'CAN': {'someone': -2.0, 'anyone': -2.0, 'confirm': -1.5},
+    'NOW': {'or': -2.0, 'is': -1.0, 'im': -1.5},
+    'OPEN': {'interest': -3.0, 'market': -2.0, 'up': -1.5},
+    'IT': {'is': -1.5, 'was': -1.5, 'will': -1.0, 'goes': -1.5},
+}
+COMPANY_WORDS = {
+    'ALL': ('allstate', 'insurance', 'insurer'),
+    'ARE': ('alexandria', 'reit'),
+    'CAN': ('canaan', 'bitcoin', 'miner', 'mining', 'asic'),
+    'NOW': ('servicenow', 'saas'),
+    'OPEN': ('opendoor', 'ibuyer', 'housing', 'homes'),
+    'F': ('ford', 'lightning', 'mach', 'farley'),
+    'GE': ('aerospace', 'vernova', 'healthcare', 'electric'),
+    'IT': ('gartner', 'consulting'),
+}
+
+
+class TickerDisambiguator:
+    """Decide whether an ambiguous word (ALL, IT, F...) is used as a ticker
+
+    Looks at the original-case text around each all-caps word: a cashtag,
+    the words right before and after it, ticker talk, company names,
+    strikes and prices among the CONTEXT_TOKENS words on each side, and
+    whether the whole passage is shouted. A text holding one of the words
+    is split into words once, with a running total of their window scores,
+    so a decision is a difference of two totals and two lookups in
+    per-ticker tables built up front. No model call.
+    """
+
+    def __init__(self, ambiguous=AMBIGUOUS_TICKERS):
+        self.ambiguous = frozenset(ambiguous)
+        # One scan over the raw text skips the texts without any of them
+        self.pattern = re.compile(
+            '(?:' + '|'.join(sorted(self.ambiguous, key=len, reverse=True)) + r')\b') if self.ambiguous else None
+        # Per word (stripped of punctuation) that is one of them: the ticker,
+        # whether it is a cashtag, its base score and its word tables. A
+        # cashtag's "$" stands between it and the previous word.
+        self._words = {}
+        for ticker in self.ambiguous:
+            next_words = dict(NEXT_WORDS, **NEXT_BY_TICKER.get(ticker, {}))
+            companies = frozenset(COMPANY_WORDS.get(ticker, ()))
+            self._words[ticker] = (ticker, False, 0.0, dict(PREVIOUS_WORDS, **PREVIOUS_BY_TICKER.get(ticker, {})),
+                                   next_words, companies)
+            self._words['$' + ticker] = (ticker, True, CASHTAG_SCORE, {}, next_words, companies)
+        self._companies = frozenset(word for ticker in self.ambiguous for word in COMPANY_WORDS.get(ticker, ()))
+
+    def mentions(self, text):
+        """Yield (ticker, cashtag, end) for each ticker use of an ambiguous word in text"""
+        if self.pattern.search(text) is None:
+            return
+        # Other whitespace becomes spaces, so the words line up with the text
+        spaced = text
+        if '\n' in spaced or '\t' in spaced or '\r' in spaced:
+            spaced = spaced.replace('\n', ' ').replace('\t', ' ').replace('\r', ' ')
+        raw = spaced.split(' ')
+        stripped = list(map(str.strip, raw, repeat(PUNCTUATION)))
+        found = self._words
+        hits = list(compress(count(), map(found.__contains__, stripped)))
+        if not hits:
+            return
+
+        # Padded so that word i sits at i + CONTEXT_TOKENS, with a full
+        # window around it; totals[i] is the window score of the words
+        # before padded[i]
+        padded = PADDING + list(map(str.lower, stripped)) + PADDING
+        totals, companies = self._window_totals(padded, spaced)
+        offsets = None
+        for i in hits:
+            ticker, cashtag, score, previous_words, next_words, company_words = found[stripped[i]]
+            score += (previous_words.get(padded[i + CONTEXT_TOKENS - 1], 0.0)
+                      + next_words.get(padded[i + CONTEXT_TOKENS + 1], 0.0)
+                      + totals[i + WINDOW_TOKENS] - totals[i])
+            if companies:
+                score += COMPANY_SCORE * sum(word in company_words for word in padded[i:i + WINDOW_TOKENS])
+
+            if score < ACCEPT_SCORE:
+                continue
+            # An all-caps word in an all-caps passage says little; only a
+            # borderline score is worth checking for that
+            if (not cashtag and score < ACCEPT_SCORE + SHOUTING_PENALTY
+                    and _shouted(' '.join(raw[max(0, i - CONTEXT_TOKENS):i + CONTEXT_TOKENS + 1]))):
+                continue
+            if offsets is None:
+                offsets = list(accumulate(map(len, raw), initial=0))
+            word = raw[i]
+            start = offsets[i] + i + len(word) - len(word.lstrip(PUNCTUATION))
+            yield ticker, cashtag, start + len(stripped[i])
+
+    def _window_totals(self, words, text):
+        """Running total of the words' window scores (one longer than words),
+        and the words again if any of them is a company name"""
+        scores = list(map(WINDOW_WORDS.get, words, repeat(0.0)))
+        if any(map(text.__contains__, '0123456789')):
+            for i, word in enumerate(words):
+                if word[:1] in NUMBER_START:
+                    scores[i] += _number_score(word)
+        totals = list(accumulate(scores, initial=0.0))
+        return totals, (words if not self._companies.isdisjoint(words) else None)
+
+
+class TickerExtractor:
+    """Count weighted ticker mentions in Reddit text"""
+
+    def __init__(self, known_tickers, common_words, ambiguous=AMBIGUOUS_TICKERS):
+        self.known_tickers = known_tickers
+        self.common_words = common_words
+        # Ambiguous words are left to the disambiguator, which needs the
+        # original case, so the uppercased scans below skip them
+        self.disambiguator = TickerDisambiguator(ambiguous)
+        self.ambiguous = self.disambiguator.ambiguous
+        # Decision table for standalone words: KNOWN, OTHER or None (skip),
+        # filled in the first time each word is seen
+        self._standalone_kinds = {}
+
+    def count_mentions(self, texts, mentions=None, cashtags=None, kinds=None, options=None, spans=None):
+        """Add weighted mentions found in texts to a Counter and return it
+
+        If a cashtags set is given, tickers written as $TICKER are added to it.
+        If a kinds Counter is given, the unweighted counts are added to it
+        keyed by (ticker, CASHTAG | KNOWN | OTHER). If an options dict is
+        given, the options positions of counted tickers are tallied into it
+        as {ticker: OptionsFlow}. If a spans list is given, one list per text
+        of the (start, end, ticker) of each counted mention is appended to it
+        (a $TICKER counted as cashtag and word is one span, "$" included).
+        """
+        mentions = Counter() if mentions is None else mentions
+        known = self.known_tickers
+        common = self.common_words
+        ambiguous = self.ambiguous
+        disambiguator = self.disambiguator if ambiguous else None
+        standalone_kinds = self._standalone_kinds
+        cashtag_weight = MENTION_WEIGHTS[CASHTAG]
+
+        for text in texts:
+            positions = options is not None and DIGIT.search(text) is not None
+            if positions:
+                dollar_pattern, standalone_pattern = DOLLAR_POSITION, STANDALONE_POSITION
+            else:
+                dollar_pattern, standalone_pattern = DOLLAR_TICKER, STANDALONE_TICKER
+            found = None
+            if spans is not None:
+                found = []
+                spans.append(found)
+
+            if disambiguator:
+                for ticker, cashtag, end in disambiguator.mentions(text):
+                    kind = CASHTAG if cashtag else KNOWN
+                    mentions[ticker] += MENTION_WEIGHTS[kind]
+                    if cashtag and cashtags is not None:
+                        cashtags.add(ticker)
+                    if kinds is not None:
+                        kinds[ticker, kind] += 1
+                    if positions:
+                        # Anchored at the word's end: no rescan of the text
+                        position = POSITION_AFTER.match(text, end)
+                        if position:
+                            _add_option(options, ticker, *position.groups())
+                    if found is not None:
+                        found.append((end - len(ticker) - cashtag, end, ticker))
+
+            text = text.upper()
+
+            # Spans need the matches; plain counting makes do with findall
+            for ticker in (dollar_pattern.finditer(text) if found is not None else dollar_pattern.findall(text)):
+                if found is not None:
+                    match = ticker
+                    ticker = match.groups() if positions else match.group(1)
+                if positions:
+                    ticker, *position = ticker
+                if ticker in ambiguous:
+                    continue
+                if ticker in known or (ticker not in common and len(ticker) >= 3):
+                    mentions[ticker] += cashtag_weight  # Weight $TICKER format highest
+                    if cashtags is not None:
+                        cashtags.add(ticker)
+                    if kinds is not None:
+                        kinds[ticker, CASHTAG] += 1
+                    # Longer tickers' positions are taken by the standalone scan
+                    if positions and position[1] and len(ticker) < 3:
+                        _add_option(options, ticker, *position)
+                    if found is not None:
+                        found.append((match.start(), match.end(1), ticker))
+
+            for ticker in (standalone_pattern.finditer(text) if found is not None else standalone_pattern.findall(text)):
+                if found is not None:
+                    match = ticker
+                    ticker = match.groups() if positions else match.group(1)
+                if positions:
+                    quantity, ticker, *position = ticker
+                try:
+                    kind = standalone_kinds[ticker]
+                except KeyError:
+                    kind = standalone_kinds[ticker] = self._standalone_kind(ticker)
+                if kind is None:
+                    continue
+                mentions[ticker] += MENTION_WEIGHTS[kind]  # Known tickers get priority
+                if kinds is not None:
+                    kinds[ticker, kind] += 1
+                if positions and position[1]:
+                    if quantity and not position[4]:
+                        position[4] = quantity
+                    _add_option(options, ticker, *position)
+                if found is not None:
+                    start, end = match.span(2 if positions else 1)
+                    # The word of a $TICKER already has the cashtag's span
+                    if text[start - 1:start] != '$':
+                        found.append((start, end, ticker))
+
+        return mentions
+
+    def _standalone_kind(self, word):
+        if word in self.ambiguous:
+            return None  # the disambiguator's call
+        if word in self.known_tickers:
+            return KNOWN
+        if word in self.common_words or any(fragment in word for fragment in NOISE_FRAGMENTS):
+            return None
+        return OTHER
+
+
+def _add_option(options, ticker, early_expiry, strike, side, expiry, quantity):
+    position = OptionPosition.parse(ticker, strike, side, expiry or early_expiry or '', quantity or '')
+    flow = options.get(ticker)
+    if flow is None:
+        flow = options[ticker] = OptionsFlow()
+    flow.add(position)
+
+
+def _shouted(passage):
+    """Whether a passage is mostly capitals"""
+    raw = passage.encode()
+    upper = len(raw) - len(raw.translate(None, UPPERCASE_BYTES))
+    lower = len(raw) - len(raw.translate(None, LOWERCASE_BYTES))
+    return upper + lower >= 10 and upper >= SHOUTING_SHARE * (upper + lower)
+
+
+def _number_score(token):
+    """Score of a strike (30c), price ($12) or percent (8%) token; 0 otherwise"""
+    if token[0] == '$':
+        return PRICE_SCORE if token[1:2].isdigit() else 0.0
+    if token[-1] == '%':
+        return PERCENT_SCORE
+    if STRIKE.fullmatch(token):
+        return STRIKE_SCORE
+    return 0.0
+
+
+def parse_subreddits(spec):
+    """Parse 'name:weight,name:weight' into {subreddit: weight} (weight defaults to 1)"""
+    subreddits = {}
+    for item in spec.split(','):
+        name, _, weight = item.strip().partition(':')
+        if name:
+            subreddits[name.strip()] = float(weight) if weight else 1.0
+    return subreddits
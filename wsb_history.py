@@ -0,0 +1,283 @@
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytz
+
+from wsb_daemon import MarketCalendar
+
+MARKET_TIMEZONE = pytz.timezone('America/New_York')
+OHLCV_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+
+logger = logging.getLogger(__name__)
+
+# Rolling windows (trading days)
+VOLATILITY_WINDOW = 20
+ATR_WINDOW = 14
+VOLUME_WINDOW = 20
+
+# Relative volume at which activity is flagged as unusual
+UNUSUAL_RELATIVE_VOLUME = 2.0
+
+# Regular session, used to time-adjust intraday relative volume
+SESSION_OPEN = (9, 30)
+SESSION_MINUTES = 390
+# A day's bar is final this long after the close; until then it is partial
+BAR_SETTLE_MINUTES = 30
+# How long a result with today's partial bar is reused before refetching
+PARTIAL_BAR_TTL = timedelta(minutes=15)
+
+
+class PriceHistory:
+    """Daily OHLCV per ticker cached as Parquet files and updated incrementally
+
+    The first lookup of a ticker downloads `lookback_days` of daily bars from
+    the Yahoo chart API; later lookups only fetch the days after the last
+    cached bar. Only bars of closed sessions are written to disk: while the
+    market is open, today's partial bar is returned but not persisted, and
+    is refetched once it is PARTIAL_BAR_TTL old. Otherwise a ticker whose
+    cache covers the last closed session needs no request and is served
+    from memory until the next session closes.
+    """
+
+    def __init__(self, cache_dir, http, chart_url, metrics=None, lookback_days=365, max_workers=8):
+        self.cache_dir = cache_dir
+        self.http = http
+        self.chart_url = chart_url
+        self.metrics = metrics
+        self.lookback_days = lookback_days
+        self.max_workers = max_workers
+        self.calendar = MarketCalendar()
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+        # ticker -> (last closed session, expiry or None, bars); empty bars
+        # remember failed lookups
+        self._memo = {}
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def history(self, ticker):
+        """Up-to-date daily bars for one ticker (DataFrame indexed by date)"""
+        with self._lock_for(ticker):
+            now = self._now()
+            closed_day, live = self._session_state(now)
+            memo = self._memo.get(ticker)
+            if memo and memo[0] == closed_day and (memo[1] is None or now < memo[1]):
+                self._count('hit')
+                return memo[2]
+
+            cached = self._load(ticker)
+            if not live and not cached.empty and cached.index[-1].date() >= closed_day:
+                self._count('hit')
+                self._memo[ticker] = (closed_day, None, cached)
+                return cached
+
+            self._count('miss')
+            if cached.empty:
+                start = now - timedelta(days=self.lookback_days)
+            else:
+                start = MARKET_TIMEZONE.localize(datetime.combine(cached.index[-1].date(), datetime.min.time()))
+
+            fresh = self._download(ticker, start)
+            if fresh.empty:
+                self._memo[ticker] = (closed_day, now + PARTIAL_BAR_TTL if live else None, cached)
+                return cached
+
+            combined = pd.concat([cached, fresh]) if not cached.empty else fresh
+            combined = combined[~combined.index.duplicated(keep='last')].sort_index()
+            closed = combined[combined.index <= pd.Timestamp(closed_day)]
+            if not closed.equals(cached):
+                closed.to_parquet(self._path(ticker))
+            partial = len(closed) < len(combined)
+            self._memo[ticker] = (closed_day, now + PARTIAL_BAR_TTL if partial or live else None, combined)
+            return combined
+
+    def history_many(self, tickers):
+        """Up-to-date bars for several tickers, fetched concurrently"""
+        tickers = list(dict.fromkeys(tickers))
+        if not tickers:
+            return {}
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(tickers))) as pool:
+            frames = pool.map(self._safe_history, tickers)
+        return {ticker: frame for ticker, frame in zip(tickers, frames) if not frame.empty}
+
+    def indicators(self, tickers):
+        """Volatility and volume indicators per ticker (see compute_indicators)"""
+        return compute_indicators(self.history_many(tickers))
+
+    def relative_volume(self, tickers, current_volumes=None):
+        """Relative volume and unusual-activity flags (see relative_volume())"""
+        return relative_volume(self.history_many(tickers), current_volumes, session_fraction())
+
+    def _safe_history(self, ticker):
+        try:
+            return self.history(ticker)
+        except Exception as e:
+            logger.warning("Price history failed for %s: %s", ticker, e, extra={'event': 'history_error', 'ticker': ticker})
+            return pd.DataFrame(columns=OHLCV_COLUMNS)
+
+    def _download(self, ticker, start):
+        url = (f"{self.chart_url}/{ticker}?interval=1d"
+               f"&period1={int(start.timestamp())}&period2={int(time.time())}")
+        headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'}
+
+        if self.metrics:
+            with self.metrics.http('yahoo_history') as call:
+                response = self.http.get(url, headers=headers, timeout=15)
+                call['status'] = response.status_code
+        else:
+            response = self.http.get(url, headers=headers, timeout=15)
+
+        if response.status_code != 200:
+            return pd.DataFrame(columns=OHLCV_COLUMNS)
+
+        result = response.json()['chart']['result'][0]
+        timestamps = result.get('timestamp') or []
+        if not timestamps:
+            return pd.DataFrame(columns=OHLCV_COLUMNS)
+
+        quote = result['indicators']['quote'][0]
+        index = pd.to_datetime(timestamps, unit='s', utc=True).tz_convert(MARKET_TIMEZONE.zone).normalize().tz_localize(None)
+        frame = pd.DataFrame({column: quote.get(column) for column in OHLCV_COLUMNS}, index=index, dtype='float64')
+        frame.index.name = 'date'
+        return frame.dropna(subset=['close'])
+
+    def _load(self, ticker):
+        path = self._path(ticker)
+        if os.path.exists(path):
+            return pd.read_parquet(path)
+        return pd.DataFrame(columns=OHLCV_COLUMNS, dtype='float64')
+
+    def _path(self, ticker):
+        return os.path.join(self.cache_dir, f"{ticker}.parquet")
+
+    def _now(self):
+        return datetime.now(MARKET_TIMEZONE)
+
+    def _session_state(self, now):
+        """(last session whose bar is final, whether today's session is live)
+
+        A session is live from the open until BAR_SETTLE_MINUTES after the
+        close; its bar is partial until then.
+        """
+        today = now.date()
+        trading_today = self.calendar.is_trading_day(today)
+        opened = now.replace(hour=SESSION_OPEN[0], minute=SESSION_OPEN[1], second=0, microsecond=0)
+        final = opened + timedelta(minutes=SESSION_MINUTES + BAR_SETTLE_MINUTES)
+        if trading_today and now >= final:
+            return today, False
+        day = today - timedelta(days=1) if trading_today else today
+        while not self.calendar.is_trading_day(day):
+            day -= timedelta(days=1)
+        return day, trading_today and now >= opened
+
+    def _lock_for(self, ticker):
+        with self._locks_guard:
+            return self._locks.setdefault(ticker, threading.Lock())
+
+    def _count(self, result):
+        if self.metrics:
+            if result == 'hit':
+                self.metrics.cache_hit('price_history')
+            else:
+                self.metrics.cache_miss('price_history')
+
+
+def read_cached_history(cache_dir, tickers=None):
+    """Cached bars straight from disk, without downloading anything
+
+    Returns ticker -> OHLCV DataFrame for every requested ticker (or every
+    cached ticker when tickers is None) that has a cache file.
+    """
+    if tickers is None:
+        tickers = [name[:-len('.parquet')] for name in os.listdir(cache_dir) if name.endswith('.parquet')]
+    histories = {}
+    for ticker in tickers:
+        path = os.path.join(cache_dir, f"{ticker}.parquet")
+        if os.path.exists(path):
+            histories[ticker] = pd.read_parquet(path)
+    return histories
+
+
+def compute_indicators(histories):
+    """Realized volatility, ATR and volume spike ratio for many tickers at once
+
+    histories maps ticker -> OHLCV DataFrame. The bars are aligned into wide
+    (date x ticker) frames so every rolling computation runs over all tickers
+    in one vectorized pass. Returns a DataFrame indexed by ticker with:
+      realized_vol  annualized std of daily log returns over 20 days, in %
+      atr_pct       14-day average true range as % of the last close
+      volume_spike  last volume / average volume of the previous 20 days
+    """
+    columns = ['realized_vol', 'atr_pct', 'volume_spike']
+    if not histories:
+        return pd.DataFrame(columns=columns, dtype='float64')
+
+    close = pd.DataFrame({t: h['close'] for t, h in histories.items()})
+    high = pd.DataFrame({t: h['high'] for t, h in histories.items()})
+    low = pd.DataFrame({t: h['low'] for t, h in histories.items()})
+    volume = pd.DataFrame({t: h['volume'] for t, h in histories.items()})
+
+    log_returns = np.log(close / close.shift(1))
+    realized_vol = log_returns.rolling(VOLATILITY_WINDOW, min_periods=5).std() * np.sqrt(252) * 100
+
+    previous_close = close.shift(1)
+    true_range = np.maximum(high - low, np.maximum((high - previous_close).abs(), (low - previous_close).abs()))
+    atr_pct = true_range.rolling(ATR_WINDOW, min_periods=5).mean() / close * 100
+
+    average_volume = volume.shift(1).rolling(VOLUME_WINDOW, min_periods=5).mean()
+    volume_spike = volume / average_volume
+
+    # Each ticker's latest available value (tickers may end on different days)
+    return pd.DataFrame({
+        'realized_vol': realized_vol.ffill().iloc[-1],
+        'atr_pct': atr_pct.ffill().iloc[-1],
+        'volume_spike': volume_spike.ffill().iloc[-1],
+    })
+
+
+def session_fraction(now=None):
+    """Fraction of the regular session elapsed (1.0 outside market hours)"""
+    now = now or datetime.now(MARKET_TIMEZONE)
+    opened = now.replace(hour=SESSION_OPEN[0], minute=SESSION_OPEN[1], second=0, microsecond=0)
+    elapsed = (now - opened).total_seconds() / 60
+    if now.weekday() >= 5 or elapsed <= 0 or elapsed >= SESSION_MINUTES:
+        return 1.0
+    # The first minutes trade heavily; don't let a tiny fraction blow up the ratio
+    return max(elapsed / SESSION_MINUTES, 0.1)
+
+
+def relative_volume(histories, current_volumes=None, session_fraction=1.0):
+    """Today's volume against the 20-day average for many tickers at once
+
+    current_volumes maps ticker -> live volume from the quote; tickers
+    without one use their last bar. The average covers the 20 sessions
+    before today, and during market hours it is scaled by the elapsed part
+    of the session. Returns a DataFrame indexed by ticker with
+    average_volume, current_volume, relative_volume and unusual_activity.
+    """
+    columns = ['average_volume', 'current_volume', 'relative_volume', 'unusual_activity']
+    if not histories:
+        return pd.DataFrame(columns=columns)
+
+    volume = pd.DataFrame({t: h['volume'] for t, h in histories.items()}).sort_index()
+    today = pd.Timestamp(datetime.now(MARKET_TIMEZONE).date())
+
+    past = volume[volume.index < today]
+    average_volume = past.tail(VOLUME_WINDOW).mean()
+    current_volume = volume.ffill().iloc[-1]
+    if current_volumes:
+        live = pd.Series(current_volumes, dtype='float64').reindex(volume.columns)
+        current_volume = live.where(live > 0, current_volume)
+
+    ratio = current_volume / (average_volume * session_fraction)
+    return pd.DataFrame({
+        'average_volume': average_volume,
+        'current_volume': current_volume,
+        'relative_volume': ratio,
+        'unusual_activity': ratio >= UNUSUAL_RELATIVE_VOLUME,
+    })
@@ -0,0 +1,349 @@
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import closing
+
+from wsb_options import OptionsFlow
+from wsb_pipeline import CASHTAG, KNOWN
+from wsb_records import Mention, Quote
+from wsb_sentiment import TickerSentiment
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    batch TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    key TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    available_at REAL NOT NULL,
+    lease_owner TEXT,
+    lease_expires REAL,
+    result TEXT,
+    error TEXT,
+    UNIQUE (batch, kind, key)
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, available_at);
+"""
+
+# Job kinds
+SCRAPE_SWAGGY = 'scrape_swaggy'
+SCRAPE_SUBREDDIT = 'scrape_subreddit'
+QUOTE = 'quote'
+
+# Tickers priced per quote job
+QUOTE_CHUNK = 5
+
+
+class JobQueue:
+    """SQLite job queue with leases, heartbeats and retries
+
+    A worker leases a job for lease_seconds and must heartbeat to keep it.
+    Jobs whose lease expires (crashed or stalled worker) become available
+    again; failed jobs are retried with exponential backoff until
+    max_attempts. Every state change is a single transaction, so any
+    number of worker processes can share one database file, as long as
+    they run on the same host: SQLite's WAL mode and locking do not work
+    over network filesystems such as NFS or SMB.
+    """
+
+    def __init__(self, path, backoff=2.0):
+        self.path = path
+        self.backoff = backoff
+        with closing(self._connect()) as db:
+            mode = db.execute("PRAGMA journal_mode=WAL").fetchone()[0]
+            if mode != 'wal':
+                logger.warning("Job queue %s could not use WAL mode (journal_mode=%s); keep it on a local disk",
+                               path, mode)
+            db.executescript(SCHEMA)
+
+    def submit(self, batch, kind, key, payload, max_attempts=3):
+        """Add a job (ignored if the batch already has one with this kind and key)"""
+        with closing(self._connect()) as db:
+            db.execute(
+                "INSERT OR IGNORE INTO jobs (batch, kind, key, payload, max_attempts, available_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (batch, kind, key, json.dumps(payload), max_attempts, time.time()))
+
+    def lease(self, worker_id, lease_seconds=60, batch=None):
+        """Claim the oldest available job; returns a job dict or None"""
+        now = time.time()
+        with closing(self._connect()) as db:
+            db.execute("BEGIN IMMEDIATE")
+            # Leases that expired on their last attempt end the job
+            db.execute("UPDATE jobs SET status = 'failed', error = 'lease expired', lease_owner = NULL"
+                       " WHERE status = 'leased' AND lease_expires < ? AND attempts >= max_attempts", (now,))
+            query = ("SELECT id, batch, kind, key, payload, attempts FROM jobs"
+                     " WHERE ((status = 'pending' AND available_at <= ?) OR (status = 'leased' AND lease_expires < ?))")
+            params = [now, now]
+            if batch:
+                query += " AND batch = ?"
+                params.append(batch)
+            row = db.execute(query + " ORDER BY id LIMIT 1", params).fetchone()
+            if row is None:
+                db.execute("COMMIT")
+                return None
+            db.execute("UPDATE jobs SET status = 'leased', lease_owner = ?, lease_expires = ?, attempts = attempts + 1"
+                       " WHERE id = ?", (worker_id, now + lease_seconds, row[0]))
+            db.execute("COMMIT")
+
+        job_id, batch, kind, key, payload, attempts = row
+        return {'id': job_id, 'batch': batch, 'kind': kind, 'key': key,
+                'payload': json.loads(payload), 'attempt': attempts + 1}
+
+    def heartbeat(self, job_id, worker_id, lease_seconds=60):
+        """Extend a lease; returns False if the worker no longer holds it"""
+        return self._update(
+            "UPDATE jobs SET lease_expires = ? WHERE id = ? AND lease_owner = ? AND status = 'leased'",
+            (time.time() + lease_seconds, job_id, worker_id))
+
+    def complete(self, job_id, worker_id, result):
+        """Store a result; returns False if the lease was lost meanwhile"""
+        return self._update(
+            "UPDATE jobs SET status = 'done', result = ?, error = NULL, lease_owner = NULL"
+            " WHERE id = ? AND lease_owner = ? AND status = 'leased'",
+            (json.dumps(result), job_id, worker_id))
+
+    def fail(self, job_id, worker_id, error):
+        """Release a failed job for a retry with backoff, or fail it for good"""
+        return self._update(
+            "UPDATE jobs SET status = CASE WHEN attempts >= max_attempts THEN 'failed' ELSE 'pending' END,"
+            " available_at = ? * (1 << attempts) + ?, error = ?, lease_owner = NULL"
+            " WHERE id = ? AND lease_owner = ? AND status = 'leased'",
+            (self.backoff, time.time(), str(error), job_id, worker_id))
+
+    def counts(self, batch):
+        """{status: number of jobs} for a batch"""
+        with closing(self._connect()) as db:
+            return dict(db.execute("SELECT status, COUNT(*) FROM jobs WHERE batch = ? GROUP BY status", (batch,)))
+
+    def results(self, batch, kind):
+        """{key: result} of a batch's finished jobs of one kind, sorted by key"""
+        with closing(self._connect()) as db:
+            rows = db.execute("SELECT key, result FROM jobs WHERE batch = ? AND kind = ? AND status = 'done'"
+                              " ORDER BY key", (batch, kind)).fetchall()
+        return {key: json.loads(result) for key, result in rows}
+
+    def _update(self, query, params):
+        with closing(self._connect()) as db, db:
+            return db.execute(query, params).rowcount == 1
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30, isolation_level=None)
+
+
+class JobWorker:
+    """Lease jobs from a JobQueue and run them with a WSBScraper
+
+    Handlers call the scraper in strict mode, so a failed fetch raises and
+    the job is retried instead of completing with an empty result.
+    """
+
+    def __init__(self, queue, scraper, worker_id=None, lease_seconds=60, poll=1.0, quote_delay=0.2):
+        self.queue = queue
+        self.scraper = scraper
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self.lease_seconds = lease_seconds
+        self.poll = poll
+        self.quote_delay = quote_delay
+        self.handlers = {
+            SCRAPE_SWAGGY: self._scrape_swaggy,
+            SCRAPE_SUBREDDIT: self._scrape_subreddit,
+            QUOTE: self._quote,
+        }
+
+    def run_forever(self):
+        """Process jobs until interrupted"""
+        logger.info("Worker %s waiting for jobs in %s", self.worker_id, self.queue.path)
+        while True:
+            if not self.run_once():
+                time.sleep(self.poll)
+
+    def run_once(self, batch=None):
+        """Lease and process one job; returns False if none was available"""
+        job = self.queue.lease(self.worker_id, self.lease_seconds, batch)
+        if job is None:
+            return False
+
+        done = threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat, args=(job, done), daemon=True)
+        heartbeat.start()
+        try:
+            result = self.handlers[job['kind']](job['payload'])
+        except Exception as e:
+            logger.warning("Job %s:%s failed (attempt %d): %s", job['kind'], job['key'], job['attempt'], e,
+                           extra={'event': 'job_failed'})
+            self.queue.fail(job['id'], self.worker_id, e)
+        else:
+            if not self.queue.complete(job['id'], self.worker_id, result):
+                logger.warning("Job %s:%s finished after its lease was lost; result dropped", job['kind'], job['key'],
+                               extra={'event': 'job_lease_lost'})
+        finally:
+            done.set()
+            heartbeat.join()
+        return True
+
+    def _heartbeat(self, job, done):
+        while not done.wait(self.lease_seconds / 3):
+            if not self.queue.heartbeat(job['id'], self.worker_id, self.lease_seconds):
+                return
+
+    def _scrape_swaggy(self, payload):
+        tickers = self.scraper.scrape_swaggy_stocks(strict=True)
+        return {'tickers': tickers,
+                'sentiment': {t: s.to_dict() for t, s in self.scraper.swaggy_sentiment.items()}}
+
+    def _scrape_subreddit(self, payload):
+        cashtags, kinds, sentiment, options = set(), Counter(), {}, {}
+        mentions = self.scraper._scrape_subreddit(payload['subreddit'], cashtags, None, kinds, sentiment, options,
+                                                  strict=True)
+        return {'mentions': dict(mentions), 'cashtags': sorted(cashtags),
+                'kinds': [[ticker, kind, count] for (ticker, kind), count in kinds.items()],
+                'sentiment': {t: s.to_dict() for t, s in sentiment.items()},
+                'options': {t: f.to_dict() for t, f in options.items()}}
+
+    def _quote(self, payload):
+        quotes = []
+        for ticker in payload['tickers']:
+            quotes.append(self.scraper.get_stock_data(ticker, strict=True).to_dict())
+            time.sleep(self.quote_delay)  # Be nice to APIs
+        return {'quotes': quotes}
+
+
+class Coordinator:
+    """Fan a run's scrape and quote work out to workers through a JobQueue
+
+    Drop-in replacement for ScrapeQuotePipeline (same run(), results,
+    attempted and mentions). Scrape jobs go out first, one per source;
+    their results are merged in sorted order, so the candidate list does
+    not depend on which worker finished first. Candidates are then priced
+    in rank order, in rounds of QUOTE_CHUNK-sized jobs just large enough to
+    fill the report, until `target` are valid or `max_attempts` were tried.
+    The coordinator processes jobs itself while it waits, so a run
+    completes even with no workers attached.
+    """
+
+    def __init__(self, queue, scraper, target=8, max_attempts=15, timeout=600, poll=0.5):
+        self.queue = queue
+        self.scraper = scraper
+        self.target = target
+        self.max_attempts = max_attempts
+        self.timeout = timeout
+        self.poll = poll
+        self.batch = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+        self.helper = JobWorker(queue, scraper, worker_id=f"coordinator-{self.batch}")
+
+        self.attempted = []
+        self.results = {}
+        self.mentions = []
+
+    def run(self, fallback_tickers):
+        """Scrape and price through the queue; return the valid quotes found"""
+        scraper = self.scraper
+        deadline = time.monotonic() + self.timeout
+
+        with scraper._stage('scrape_jobs'):
+            self.queue.submit(self.batch, SCRAPE_SWAGGY, 'swaggystocks', {})
+            for name in sorted(scraper.subreddits):
+                self.queue.submit(self.batch, SCRAPE_SUBREDDIT, name, {'subreddit': name})
+            self._wait(deadline)
+        candidates = self._merge_scrapes()
+
+        # Known tickers first, then cashtags, each by score; then the popular fallbacks
+        ordered = sorted(candidates, key=lambda ticker: candidates[ticker] + (ticker,))
+        ordered += [t for t in fallback_tickers if t not in candidates]
+        ordered = ordered[:self.max_attempts]
+
+        valid = []
+        with scraper._stage('quote_jobs'):
+            while len(self.attempted) < len(ordered) and len(valid) < self.target:
+                start = len(self.attempted)
+                tickers = ordered[start:start + self.target - len(valid)]
+                for offset in range(0, len(tickers), QUOTE_CHUNK):
+                    chunk = tickers[offset:offset + QUOTE_CHUNK]
+                    self.queue.submit(self.batch, QUOTE, f"{start + offset:05d}", {'tickers': chunk})
+                self.attempted.extend(tickers)
+                finished = self._wait(deadline)
+                valid = self._valid_quotes()
+                if not finished:
+                    break
+
+        scraper.metrics.increment('valid_tickers', len(valid))
+        scraper.metrics.increment('invalid_tickers', len(self.attempted) - len(valid))
+        logger.info("Job batch %s: %s", self.batch, self.queue.counts(self.batch))
+        return valid[:self.target]
+
+    def _valid_quotes(self):
+        """Priced quotes of the attempted tickers, in rank order"""
+        quotes = {}
+        for result in self.queue.results(self.batch, QUOTE).values():
+            for data in result['quotes']:
+                quotes[data['ticker']] = Quote.from_dict(data)
+        return [quotes[t] for t in self.attempted if t in quotes and quotes[t].has_price]
+
+    def _wait(self, deadline):
+        """Help process the batch until nothing is pending or leased; False on timeout"""
+        while time.monotonic() < deadline:
+            counts = self.queue.counts(self.batch)
+            if not counts.get('pending') and not counts.get('leased'):
+                return True
+            if not self.helper.run_once(self.batch):
+                time.sleep(self.poll)
+        logger.warning("Job batch %s timed out: %s", self.batch, self.queue.counts(self.batch), extra={'event': 'job_timeout'})
+        return False
+
+    def _merge_scrapes(self):
+        """Combine scrape results deterministically; return {candidate: (priority, -score)}"""
+        scraper = self.scraper
+        candidates = {}
+
+        swaggy = self.queue.results(self.batch, SCRAPE_SWAGGY).get('swaggystocks', {})
+        swaggy_tickers = sorted(swaggy.get('tickers', []))
+        scraper.swaggy_sentiment = {t: TickerSentiment.from_dict(s) for t, s in swaggy.get('sentiment', {}).items()}
+        for ticker in swaggy_tickers:
+            self.mentions.append(Mention(ticker, 'swaggystocks'))
+            if ticker in scraper.known_tickers:
+                candidates[ticker] = (KNOWN, 0.0)
+
+        # Subreddit results come back sorted by name
+        ticker_mentions = Counter()
+        cashtags = set()
+        breakdown, kinds, sentiment, options = {}, {}, {}, {}
+        for name, result in self.queue.results(self.batch, SCRAPE_SUBREDDIT).items():
+            weight = scraper.subreddits[name]
+            breakdown[name] = Counter(result['mentions'])
+            kinds[name] = Counter({(ticker, kind): count for ticker, kind, count in result['kinds']})
+            cashtags.update(result['cashtags'])
+            for ticker in sorted(result['mentions']):
+                ticker_mentions[ticker] += result['mentions'][ticker] * weight
+            for ticker, data in sorted(result['sentiment'].items()):
+                sentiment.setdefault(ticker, TickerSentiment()).merge(TickerSentiment.from_dict(data))
+            for ticker, data in sorted(result.get('options', {}).items()):
+                options.setdefault(ticker, OptionsFlow()).merge(OptionsFlow.from_dict(data))
+        scraper.reddit_breakdown = breakdown
+        scraper.reddit_kinds = kinds
+        scraper.reddit_sentiment = sentiment
+        scraper.reddit_options = options
+
+        ranked = sorted(ticker_mentions.items(), key=lambda item: (-item[1], item[0]))
+        reddit_tickers = [ticker for ticker, score in ranked[:15] if score >= 2][:10]
+        for ticker in reddit_tickers:
+            cashtag = ticker in cashtags
+            self.mentions.append(Mention(ticker, 'reddit', ticker_mentions[ticker], cashtag))
+            if ticker in scraper.known_tickers:
+                candidates[ticker] = (KNOWN, -ticker_mentions[ticker])
+            elif cashtag:
+                candidates[ticker] = (CASHTAG, -ticker_mentions[ticker])
+
+        self.results = {'swaggystocks': swaggy_tickers, 'reddit': reddit_tickers}
+        return candidates
@@ -0,0 +1,188 @@
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+# Attributes every LogRecord has; anything else was passed in extra=
+RECORD_ATTRIBUTES = frozenset(logging.LogRecord('', 0, '', 0, '', None, None).__dict__) | {'message', 'asctime'}
+# Leading keys of a JSON event, in this order
+EVENT_KEYS = ('ts', 'level', 'logger', 'event', 'run_id', 'stage', 'ticker', 'latency_ms', 'message')
+
+LOG_MAX_BYTES = 10 * 1024 * 1024
+LOG_BACKUPS = 5
+
+# Run ID of the current run (runs never overlap) and the stage of each thread
+_run = {'run_id': None}
+_local = threading.local()
+_listener = None
+
+
+def set_run(run_id):
+    """Tag every later event with this run ID"""
+    _run['run_id'] = run_id
+
+
+@contextmanager
+def log_stage(name):
+    """Tag events emitted by this thread inside the block with a stage name"""
+    previous = getattr(_local, 'stage', None)
+    _local.stage = name
+    try:
+        yield
+    finally:
+        _local.stage = previous
+
+
+class ContextFilter(logging.Filter):
+    """Fill in run_id and stage on records that do not set them"""
+
+    def filter(self, record):
+        if getattr(record, 'run_id', None) is None:
+            record.run_id = _run['run_id']
+        if getattr(record, 'stage', None) is None:
+            record.stage = getattr(_local, 'stage', None)
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Keep a fixed share of high-volume events, by their event name
+
+    rates maps an event name to the share kept (0.1 keeps every tenth).
+    Sampling is by count rather than at random, so a run of N events keeps
+    N * rate of them. Warnings and errors are never dropped.
+    """
+
+    def __init__(self, rates):
+        super().__init__()
+        self.rates = rates
+        self._seen = {}
+        # Filters run in the emitting threads
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self.rates.get(getattr(record, 'event', None))
+        if rate is None:
+            return True
+        with self._lock:
+            seen = self._seen.get(record.event, 0) + 1
+            self._seen[record.event] = seen
+        return int(seen * rate) != int((seen - 1) * rate)
+
+
+class RecordQueueHandler(logging.handlers.QueueHandler):
+    """Queue records for the listener without formatting them first
+
+    The stock prepare() formats each record in the emitting thread and
+    drops its exc_info. Here only the message arguments are merged (they
+    may change once the call returns), so the listener's formatters do the
+    work and still see the exception and the extras.
+    """
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: timestamp, level, context, message and extras"""
+
+    def format(self, record):
+        event = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname.lower(),
+            'logger': record.name,
+            'event': getattr(record, 'event', None),
+            'run_id': getattr(record, 'run_id', None),
+            'stage': getattr(record, 'stage', None),
+            'ticker': getattr(record, 'ticker', None),
+            'latency_ms': getattr(record, 'latency_ms', None),
+            'message': record.getMessage(),
+        }
+        event = {key: value for key, value in event.items() if value is not None}
+        for key, value in record.__dict__.items():
+            if key not in RECORD_ATTRIBUTES and key not in event and value is not None:
+                event[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            event['exception'] = record.exc_text
+        return json.dumps(event, default=str, ensure_ascii=False)
+
+
+def parse_sampling(spec):
+    """{event: rate} from "quote=0.1,reddit_ticker=0.5" (LOG_SAMPLE)"""
+    rates = {}
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        event, _, rate = item.partition('=')
+        rate = float(rate)
+        if not 0 <= rate <= 1:
+            raise ValueError(f"Log sampling rate for {event!r} must be between 0 and 1")
+        rates[event.strip()] = rate
+    return rates
+
+
+def setup_logging(level=None, fmt=None, path=None, sample=None, max_bytes=None, backups=None):
+    """Route all logging through a queue to console and file handlers
+
+    Callers only put records on an unbounded queue; a QueueListener thread
+    formats and writes them, so no emitting thread waits on stdout or disk.
+    Settings default to LOG_LEVEL (INFO), LOG_FORMAT (text | json, for the
+    console), LOG_FILE (JSON, rotated at LOG_MAX_BYTES with LOG_BACKUPS old
+    files; empty disables it) and LOG_SAMPLE. Calling it again is a no-op.
+    """
+    global _listener
+    if _listener is not None:
+        return _listener
+
+    level = (level or os.getenv('LOG_LEVEL', 'INFO')).upper()
+    fmt = fmt or os.getenv('LOG_FORMAT', 'text')
+    path = os.getenv('LOG_FILE', '') if path is None else path
+    sample = os.getenv('LOG_SAMPLE', '') if sample is None else sample
+    max_bytes = max_bytes or int(os.getenv('LOG_MAX_BYTES', str(LOG_MAX_BYTES)))
+    backups = backups or int(os.getenv('LOG_BACKUPS', str(LOG_BACKUPS)))
+    if fmt not in ('text', 'json'):
+        raise ValueError(f"Unknown LOG_FORMAT {fmt!r}; use text or json")
+
+    console = logging.StreamHandler(sys.stdout)
+    console.setFormatter(JsonFormatter() if fmt == 'json' else logging.Formatter('%(message)s'))
+    handlers = [console]
+    if path:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        rotating = logging.handlers.RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups,
+                                                        encoding='utf-8')
+        rotating.setFormatter(JsonFormatter())
+        handlers.append(rotating)
+
+    # Context and sampling run in the emitting thread, so dropped events
+    # never reach the queue
+    records = queue.SimpleQueue()
+    handler = RecordQueueHandler(records)
+    handler.addFilter(ContextFilter())
+    rates = parse_sampling(sample)
+    if rates:
+        handler.addFilter(SamplingFilter(rates))
+
+    root = logging.getLogger()
+    root.setLevel(level)
+    root.addHandler(handler)
+    # Chatty client libraries only report problems
+    for name in ('urllib3', 'prawcore', 'googleapiclient'):
+        logging.getLogger(name).setLevel(max(logging.WARNING, root.level))
+
+    _listener = logging.handlers.QueueListener(records, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+    return _listener
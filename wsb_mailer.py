@@ -0,0 +1,154 @@
+import base64
+import json
+import logging
+import os
+import random
+import time
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+from googleapiclient.errors import HttpError
+
+logger = logging.getLogger(__name__)
+
+# HTTP statuses worth retrying (rate limits and transient server errors)
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+def build_raw_message(to, sender, subject, html_content, text_content=None):
+    """Build a base64url encoded MIME message ready for the Gmail API
+
+    text_content, if given, is attached as the plain-text alternative.
+    """
+    message = MIMEMultipart('alternative')
+    message['to'] = to
+    message['from'] = sender
+    message['subject'] = subject
+
+    if text_content:
+        message.attach(MIMEText(text_content, 'plain'))
+    message.attach(MIMEText(html_content, 'html'))
+
+    return base64.urlsafe_b64encode(message.as_bytes()).decode()
+
+
+def load_subscribers(path, default_email=None):
+    """Load subscribers and their watchlists from a JSON file
+
+    The file holds a list of {"email": ..., "watchlist": [...]} objects. An
+    empty or missing watchlist means the default report. default_email (the
+    EMAIL_TO address) is added with the default report if not already listed.
+    """
+    subscribers = {}
+
+    if path and os.path.exists(path):
+        with open(path) as f:
+            entries = json.load(f)
+
+        for entry in entries:
+            email = entry.get('email', '').strip()
+            if not email:
+                continue
+            watchlist = [t.strip().upper() for t in entry.get('watchlist', []) if t.strip()]
+            subscribers[email] = watchlist
+
+    if default_email and default_email not in subscribers:
+        subscribers[default_email] = []
+
+    return subscribers
+
+
+def group_by_watchlist(subscribers):
+    """Group subscriber emails by distinct watchlist so each report is rendered once"""
+    groups = {}
+    for email, watchlist in subscribers.items():
+        key = tuple(sorted(set(watchlist)))
+        groups.setdefault(key, []).append(email)
+    return groups
+
+
+class BatchMailer:
+    """Send many Gmail messages through batched HTTP requests with retries"""
+
+    def __init__(self, gmail_service, batch_size=10, max_retries=3, backoff=2.0, pause=1.0):
+        self.gmail_service = gmail_service
+        # Gmail throttles concurrent sends per user, so batch_size caps how
+        # many send requests are in flight at once
+        self.batch_size = max(1, min(batch_size, 100))
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.pause = pause
+
+    def send(self, messages):
+        """Send {recipient: raw_message} and return per-recipient results"""
+        results = {
+            recipient: {'ok': False, 'message_id': None, 'error': None, 'attempts': 0}
+            for recipient in messages
+        }
+
+        pending = list(messages)
+        attempt = 0
+
+        while pending and attempt <= self.max_retries:
+            if attempt:
+                # Exponential backoff with jitter before retrying failures
+                time.sleep(self.backoff * 2 ** (attempt - 1) + random.uniform(0, 1))
+
+            retry = []
+            for start in range(0, len(pending), self.batch_size):
+                if start:
+                    time.sleep(self.pause)
+                chunk = pending[start:start + self.batch_size]
+                retry.extend(self._send_chunk(chunk, messages, results))
+
+            pending = retry
+            attempt += 1
+
+        sent = sum(1 for r in results.values() if r['ok'])
+        logger.info("Batch send finished: %d/%d delivered", sent, len(results))
+        return results
+
+    def _send_chunk(self, chunk, messages, results):
+        """Send one Gmail batch request and return the recipients to retry"""
+        retry = []
+        answered = set()
+
+        def callback(request_id, response, exception):
+            answered.add(request_id)
+            result = results[request_id]
+            result['attempts'] += 1
+
+            if exception is None:
+                result['ok'] = True
+                result['message_id'] = response.get('id')
+                result['error'] = None
+            else:
+                result['error'] = str(exception)
+                if self._is_retryable(exception):
+                    retry.append(request_id)
+
+        batch = self.gmail_service.new_batch_http_request(callback=callback)
+        for recipient in chunk:
+            request = self.gmail_service.users().messages().send(
+                userId='me', body={'raw': messages[recipient]})
+            batch.add(request, request_id=recipient)
+
+        try:
+            batch.execute()
+        except Exception as e:
+            # The whole batch failed (network error, auth error...): every
+            # recipient without a callback is retried
+            logger.warning("Gmail batch request failed: %s", e, extra={'event': 'email_error'})
+            for recipient in chunk:
+                if recipient not in answered:
+                    results[recipient]['attempts'] += 1
+                    results[recipient]['error'] = str(e)
+                    retry.append(recipient)
+
+        return retry
+
+    def _is_retryable(self, exception):
+        """Check if a per-message error is worth retrying"""
+        if isinstance(exception, HttpError):
+            return exception.resp.status in RETRYABLE_STATUS
+        return True
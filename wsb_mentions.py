@@ -0,0 +1,83 @@
+import sqlite3
+from contextlib import closing
+
+import pandas as pd
+
+from wsb_extract import CASHTAG, KNOWN, OTHER
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS mention_counts (
+    captured_at TEXT NOT NULL,
+    day TEXT NOT NULL,
+    subreddit TEXT NOT NULL,
+    ticker TEXT NOT NULL,
+    cashtag INTEGER NOT NULL DEFAULT 0,
+    known INTEGER NOT NULL DEFAULT 0,
+    other INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (captured_at, subreddit, ticker)
+);
+CREATE INDEX IF NOT EXISTS mention_counts_day ON mention_counts (day, ticker);
+"""
+
+
+class MentionStore:
+    """SQLite history of raw ticker mention counts, one snapshot per run
+
+    Counts are stored unweighted per subreddit and mention kind (cashtag,
+    known ticker, other standalone ticker), so any weighting rule can be
+    re-applied to past runs later.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with closing(self._connect()) as db:
+            db.executescript(SCHEMA)
+
+    def record(self, captured_at, kinds_by_subreddit):
+        """Store one run's counts; kinds_by_subreddit maps subreddit -> kinds Counter"""
+        rows = {}
+        for subreddit, kinds in kinds_by_subreddit.items():
+            for (ticker, kind), count in kinds.items():
+                row = rows.setdefault((subreddit, ticker), {CASHTAG: 0, KNOWN: 0, OTHER: 0})
+                row[kind] += count
+
+        stamp = captured_at.isoformat(timespec='seconds')
+        day = captured_at.date().isoformat()
+        with closing(self._connect()) as db, db:
+            db.executemany(
+                "INSERT OR REPLACE INTO mention_counts VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(stamp, day, subreddit, ticker, row[CASHTAG], row[KNOWN], row[OTHER])
+                 for (subreddit, ticker), row in rows.items()])
+        return len(rows)
+
+    def load(self, start=None, end=None, latest_per_day=True, cutoff=None):
+        """Stored counts as a DataFrame (optionally only each day's last run)
+
+        start and end are inclusive ISO dates. cutoff ('HH:MM', market
+        time) ignores runs captured later in their day, so "each day's last
+        run" is the last one at or before it. Columns: captured_at, day,
+        subreddit, ticker, cashtag, known, other.
+        """
+        # captured_at is an ISO timestamp in market time: HH:MM at 12..16
+        at_cutoff = " AND substr(captured_at, 12, 5) <= ?" if cutoff else ""
+        query = "SELECT * FROM mention_counts WHERE 1 = 1" + at_cutoff
+        params = [cutoff] if cutoff else []
+        if start:
+            query += " AND day >= ?"
+            params.append(str(start))
+        if end:
+            query += " AND day <= ?"
+            params.append(str(end))
+        if latest_per_day:
+            query += (" AND captured_at = (SELECT MAX(captured_at) FROM mention_counts AS latest"
+                      " WHERE latest.day = mention_counts.day" + at_cutoff.replace('captured_at', 'latest.captured_at') + ")")
+            if cutoff:
+                params.append(cutoff)
+
+        with closing(self._connect()) as db:
+            frame = pd.read_sql_query(query, db, params=params)
+        frame['day'] = pd.to_datetime(frame['day'])
+        return frame
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
@@ -0,0 +1,220 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+
+class RunMetrics:
+    """Collect stage timings, HTTP latencies, cache hits and counters for one run"""
+
+    def __init__(self):
+        self.started_at = datetime.now()
+        self.stages = defaultdict(lambda: {'seconds': 0.0, 'calls': 0})
+        self.http_calls = defaultdict(list)
+        self.caches = defaultdict(lambda: {'hits': 0, 'misses': 0})
+        self.counters = Counter()
+        # Stages and HTTP calls may be recorded from several threads
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name):
+        """Time a stage; repeated calls (one per ticker...) accumulate"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                stage = self.stages[name]
+                stage['seconds'] += elapsed
+                stage['calls'] += 1
+
+    @contextmanager
+    def http(self, provider):
+        """Time one HTTP call; set call['status'] to the response status code"""
+        call = {'status': None}
+        start = time.perf_counter()
+        try:
+            yield call
+        except Exception:
+            call['status'] = 'error'
+            raise
+        finally:
+            self.observe_http(provider, time.perf_counter() - start, call['status'])
+
+    def observe_http(self, provider, seconds, status=None):
+        """Record one HTTP call latency for a provider"""
+        with self._lock:
+            self.http_calls[provider].append((seconds, status))
+
+    def cache_hit(self, name):
+        with self._lock:
+            self.caches[name]['hits'] += 1
+
+    def cache_miss(self, name):
+        with self._lock:
+            self.caches[name]['misses'] += 1
+
+    def increment(self, name, amount=1):
+        with self._lock:
+            self.counters[name] += amount
+
+    def report(self):
+        """Machine-readable summary of the run"""
+        http = {}
+        for provider, calls in self.http_calls.items():
+            latencies = sorted(seconds for seconds, _ in calls)
+            http[provider] = {
+                'calls': len(calls),
+                'errors': sum(1 for _, status in calls if status == 'error' or (isinstance(status, int) and status >= 400)),
+                'total_seconds': round(sum(latencies), 4),
+                'mean_seconds': round(sum(latencies) / len(latencies), 4),
+                'p50_seconds': round(latencies[len(latencies) // 2], 4),
+                'max_seconds': round(latencies[-1], 4),
+            }
+
+        caches = {}
+        for name, cache in self.caches.items():
+            lookups = cache['hits'] + cache['misses']
+            caches[name] = dict(cache, hit_rate=round(cache['hits'] / lookups, 4) if lookups else None)
+
+        return {
+            'started_at': self.started_at.isoformat(),
+            'stages': {name: {'seconds': round(s['seconds'], 4), 'calls': s['calls']}
+                       for name, s in self.stages.items()},
+            'http': http,
+            'caches': caches,
+            'counters': dict(self.counters),
+        }
+
+    def write_json(self, directory):
+        """Write the run report to a timestamped JSON file and return its path"""
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"run_{self.started_at.strftime('%Y%m%d_%H%M%S')}.json")
+        with open(path, 'w') as f:
+            json.dump(self.report(), f, indent=2)
+        return path
+
+
+class PrometheusExporter:
+    """Accumulate run metrics across runs and expose them in Prometheus text format"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.runs = 0
+        self.last_run = None
+        self.http_totals = defaultdict(lambda: {'count': 0, 'errors': 0, 'seconds': 0.0})
+        self.cache_totals = defaultdict(lambda: {'hits': 0, 'misses': 0})
+        self.counter_totals = Counter()
+        self._server = None
+
+    def add_run(self, metrics):
+        """Fold a finished RunMetrics into the cumulative totals"""
+        report = metrics.report()
+        with self._lock:
+            self.runs += 1
+            self.last_run = report
+            self.last_run_timestamp = time.time()
+            for provider, stats in report['http'].items():
+                totals = self.http_totals[provider]
+                totals['count'] += stats['calls']
+                totals['errors'] += stats['errors']
+                totals['seconds'] += stats['total_seconds']
+            for name, cache in report['caches'].items():
+                self.cache_totals[name]['hits'] += cache['hits']
+                self.cache_totals[name]['misses'] += cache['misses']
+            self.counter_totals.update(report['counters'])
+
+    def render(self):
+        """Render all metrics in the Prometheus text exposition format"""
+        with self._lock:
+            lines = [
+                '# HELP wsb_runs_total Completed scrape runs.',
+                '# TYPE wsb_runs_total counter',
+                f'wsb_runs_total {self.runs}',
+            ]
+
+            if self.last_run:
+                lines += [
+                    '# HELP wsb_last_run_timestamp_seconds Unix time the last run finished.',
+                    '# TYPE wsb_last_run_timestamp_seconds gauge',
+                    f'wsb_last_run_timestamp_seconds {self.last_run_timestamp:.0f}',
+                    '# HELP wsb_stage_duration_seconds Stage duration in the last run.',
+                    '# TYPE wsb_stage_duration_seconds gauge',
+                ]
+                for name, stage in self.last_run['stages'].items():
+                    lines.append(f'wsb_stage_duration_seconds{{stage="{name}"}} {stage["seconds"]}')
+
+            lines += [
+                '# HELP wsb_http_request_duration_seconds HTTP latency per provider.',
+                '# TYPE wsb_http_request_duration_seconds summary',
+            ]
+            for provider, totals in self.http_totals.items():
+                lines.append(f'wsb_http_request_duration_seconds_sum{{provider="{provider}"}} {totals["seconds"]:.4f}')
+                lines.append(f'wsb_http_request_duration_seconds_count{{provider="{provider}"}} {totals["count"]}')
+            lines += [
+                '# HELP wsb_http_errors_total Failed HTTP calls per provider.',
+                '# TYPE wsb_http_errors_total counter',
+            ]
+            for provider, totals in self.http_totals.items():
+                lines.append(f'wsb_http_errors_total{{provider="{provider}"}} {totals["errors"]}')
+
+            lines += [
+                '# HELP wsb_cache_lookups_total Cache lookups by result.',
+                '# TYPE wsb_cache_lookups_total counter',
+            ]
+            for name, cache in self.cache_totals.items():
+                lines.append(f'wsb_cache_lookups_total{{cache="{name}",result="hit"}} {cache["hits"]}')
+                lines.append(f'wsb_cache_lookups_total{{cache="{name}",result="miss"}} {cache["misses"]}')
+
+            lines += [
+                '# HELP wsb_events_total Run counters (valid and invalid tickers...).',
+                '# TYPE wsb_events_total counter',
+            ]
+            for name, value in sorted(self.counter_totals.items()):
+                lines.append(f'wsb_events_total{{event="{name}"}} {value}')
+
+        return '\n'.join(lines) + '\n'
+
+    def serve(self, port, host='127.0.0.1'):
+        """Serve /metrics from a background thread and return the port
+
+        Only local scrapers can connect unless host is set to an outside
+        interface (or '' for all). Port 0 picks a free port.
+        """
+        exporter = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path != '/metrics':
+                    self.send_error(404)
+                    return
+                body = exporter.render().encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        port = self._server.server_address[1]
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        logger.info("Prometheus metrics available at http://%s:%d/metrics", host or '0.0.0.0', port)
+        return port
+
+    def close(self):
+        """Stop serving /metrics"""
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
@@ -0,0 +1,105 @@
+import math
+import re
+
+import pandas as pd
+
+CALL = 'call'
+PUT = 'put'
+
+# Regex pieces for option positions in uppercased text, spliced around the
+# ticker patterns of wsb_extract so positions are parsed in the same scan:
+#   10x GME 30c 6/21    SPY 450P 0DTE    SPY 0DTE 450P    TSLA 7/19 250C x5    $AMC $5 CALLS
+# Quantity or word boundary before the ticker (an optional quantity group
+# followed by \b is slower, as every position of the text tries the group).
+# A bare year ("2025 SPY 450c") is not a quantity
+OPTION_QUANTITY = r'(?:\b(?!(?:19|20)\d\d\s)(\d{1,4})X?\s+\$?|\b)'
+POSITION = (r'(?:\s+(\d{1,2}/\d{1,2}(?:/\d{2,4})?|\d{1,3}\s?DTE))?'
+            r'\s+\$?(\d{1,5}(?:\.\d{1,2})?)\s?(C|P|CALLS?|PUTS?)\b'
+            r'(?:\s+(\d{1,2}/\d{1,2}(?:/\d{2,4})?|\d{1,3}\s?DTE)\b)?'
+            r'(?:\s+X(\d{1,4})\b)?')
+# The lookahead lets the common case, a ticker with no position, bail out early
+OPTION_POSITION = r'(?:(?=\s+\$?\d)' + POSITION + ')?'
+# The same position anchored right after a word of the original-case text
+POSITION_AFTER = re.compile(POSITION, re.IGNORECASE)
+
+
+class OptionPosition:
+    """One options position mentioned in a post"""
+
+    __slots__ = ('ticker', 'strike', 'side', 'expiry', 'quantity')
+
+    def __init__(self, ticker, strike, side, expiry=None, quantity=1):
+        self.ticker = ticker
+        self.strike = float(strike)
+        self.side = side
+        self.expiry = expiry
+        self.quantity = int(quantity)
+
+    @classmethod
+    def parse(cls, ticker, strike, side, expiry='', quantity=''):
+        """Position from the regex groups (uppercased text, empty when absent)"""
+        return cls(ticker, strike, PUT if side.upper().startswith('P') else CALL,
+                   expiry.upper().replace(' ', '') or None, int(quantity) if quantity else 1)
+
+    def to_dict(self):
+        return {'ticker': self.ticker, 'strike': self.strike, 'side': self.side,
+                'expiry': self.expiry, 'quantity': self.quantity}
+
+    def __repr__(self):
+        return f"OptionPosition({self.ticker!r}, {self.strike:g}{self.side[0]}, expiry={self.expiry!r}, x{self.quantity})"
+
+
+class OptionsFlow:
+    """Running call/put tally of one ticker's options positions"""
+
+    __slots__ = ('calls', 'puts', 'call_contracts', 'put_contracts')
+
+    def __init__(self, calls=0, puts=0, call_contracts=0, put_contracts=0):
+        self.calls = calls
+        self.puts = puts
+        self.call_contracts = call_contracts
+        self.put_contracts = put_contracts
+
+    def add(self, position):
+        if position.side == CALL:
+            self.calls += 1
+            self.call_contracts += position.quantity
+        else:
+            self.puts += 1
+            self.put_contracts += position.quantity
+
+    def merge(self, other):
+        self.calls += other.calls
+        self.puts += other.puts
+        self.call_contracts += other.call_contracts
+        self.put_contracts += other.put_contracts
+        return self
+
+    @property
+    def positions(self):
+        return self.calls + self.puts
+
+    @property
+    def bullish_ratio(self):
+        """Share of positions that are calls (NaN if none)"""
+        return self.calls / self.positions if self.positions else math.nan
+
+    def to_dict(self):
+        return {'calls': self.calls, 'puts': self.puts, 'call_contracts': self.call_contracts,
+                'put_contracts': self.put_contracts}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['calls'], data['puts'], data['call_contracts'], data['put_contracts'])
+
+    def __repr__(self):
+        return f"OptionsFlow(calls={self.calls}, puts={self.puts})"
+
+
+def options_frame(flows):
+    """Flows as a DataFrame indexed by ticker (options_calls, options_puts, options_bullish_ratio)"""
+    return pd.DataFrame({
+        'options_calls': {ticker: flow.calls for ticker, flow in flows.items()},
+        'options_puts': {ticker: flow.puts for ticker, flow in flows.items()},
+        'options_bullish_ratio': {ticker: flow.bullish_ratio for ticker, flow in flows.items()},
+    }, columns=['options_calls', 'options_puts', 'options_bullish_ratio'], dtype='float64')
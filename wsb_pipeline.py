@@ -0,0 +1,153 @@
+import queue
+import threading
+import time
+
+from wsb_records import Mention
+
+# Candidate priorities: lower values are priced first
+KNOWN = 0      # known tickers found by the scrapers
+CASHTAG = 1    # unknown tickers written as $TICKER
+FALLBACK = 2   # popular tickers used to fill the report
+_DONE = 99     # sentinel telling a quote worker to exit
+
+
+class ScrapeQuotePipeline:
+    """Stream scraped candidates into the quote stage through a bounded queue
+
+    SwaggyStocks and Reddit are scraped in parallel producer threads that
+    emit candidates as soon as they are found, while quote workers price
+    the high-confidence ones (known tickers, cashtags). Quoting stops once
+    `target` valid tickers are collected or `max_attempts` tickers were
+    tried; producers then stop emitting and nothing else is priced.
+
+    With overlap=False (used when profiling, as only one cProfile profiler
+    can be active at a time, and when replaying a cassette, so interactions
+    are served in the same order every run) the stages run one after
+    another with a single quote worker and an unbounded queue.
+    """
+
+    def __init__(self, scraper, target=8, max_attempts=15, queue_size=32, quote_workers=2,
+                 quote_delay=0.2, overlap=True):
+        self.scraper = scraper
+        self.target = target
+        self.max_attempts = max_attempts
+        self.overlap = overlap
+        self.quote_workers = max(1, quote_workers) if overlap else 1
+        self.quote_delay = quote_delay
+
+        self.candidates = queue.PriorityQueue(maxsize=queue_size if overlap else 0)
+        self.stop = threading.Event()
+        self._lock = threading.Lock()
+        self._seen = set()
+        self._sequence = 0
+
+        self.attempted = []
+        self.valid = []
+        self.results = {}
+        self.mentions = []
+
+    def emit(self, ticker, source, cashtag=False, score=1.0, record=True):
+        """Offer a scraped ticker to the quote stage; returns False once stopped
+
+        With record=False the ticker is only offered for quoting and no
+        Mention is recorded (early per-subreddit candidates whose merged
+        counts are emitted later).
+        """
+        if record:
+            with self._lock:
+                self.mentions.append(Mention(ticker, source, score, cashtag))
+
+        if ticker in self.scraper.known_tickers:
+            priority = KNOWN
+        elif cashtag:
+            priority = CASHTAG
+        else:
+            # Low-confidence tickers are not worth a quote request
+            return not self.stop.is_set()
+        return self._offer(ticker, priority, source)
+
+    def run(self, fallback_tickers):
+        """Run scrapers and quote workers; return the valid quotes found"""
+        producers = [
+            threading.Thread(target=self._produce, name='swaggystocks',
+                             args=('swaggystocks', 'scrape_swaggy_stocks', self.scraper.scrape_swaggy_stocks)),
+            threading.Thread(target=self._produce, name='reddit',
+                             args=('reddit', 'scrape_reddit_wsb', self.scraper.scrape_reddit_wsb)),
+        ]
+        workers = [threading.Thread(target=self._quote_worker, name=f'quotes-{i}')
+                   for i in range(self.quote_workers)]
+
+        if self.overlap:
+            for thread in producers + workers:
+                thread.start()
+            for thread in producers:
+                thread.join()
+        else:
+            for thread in producers:
+                thread.start()
+                thread.join()
+            for thread in workers:
+                thread.start()
+
+        # Scraping is done: top up with popular tickers, then let workers drain
+        for ticker in fallback_tickers:
+            if not self._offer(ticker, FALLBACK, 'fallback'):
+                break
+        for _ in workers:
+            self._put((_DONE, 0, None, None))
+
+        for thread in workers:
+            thread.join()
+
+        return self.valid
+
+    def _produce(self, name, stage, scrape):
+        with self.scraper._stage(stage):
+            self.results[name] = scrape(
+                emit=lambda ticker, cashtag=False, score=1.0, record=True: self.emit(ticker, name, cashtag, score, record))
+
+    def _offer(self, ticker, priority, source):
+        with self._lock:
+            if ticker in self._seen:
+                return not self.stop.is_set()
+            self._seen.add(ticker)
+            self._sequence += 1
+            item = (priority, self._sequence, ticker, source)
+        return self._put(item)
+
+    def _put(self, item):
+        """Put into the bounded queue without blocking forever once stopped"""
+        while not self.stop.is_set():
+            try:
+                self.candidates.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _quote_worker(self):
+        while not self.stop.is_set():
+            try:
+                priority, _, ticker, source = self.candidates.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if priority == _DONE:
+                return
+
+            with self._lock:
+                if self.stop.is_set():
+                    return
+                self.attempted.append(ticker)
+                if len(self.attempted) >= self.max_attempts:
+                    # This is the last ticker anyone may try
+                    self.stop.set()
+
+            data = self.scraper.price_candidate(ticker, source)
+
+            with self._lock:
+                if data and len(self.valid) < self.target:
+                    self.valid.append(data)
+                if len(self.valid) >= self.target:
+                    self.stop.set()
+
+            time.sleep(self.quote_delay)  # Be nice to APIs
@@ -0,0 +1,88 @@
+import cProfile
+import io
+import logging
+import os
+import pstats
+import time
+import tracemalloc
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+
+class StageProfiler:
+    """CPU profiles and tracemalloc snapshots per run_daily_scrape stage
+
+    Only created when --profile is passed, so normal runs pay nothing.
+    Each run writes to its own timestamped subdirectory of output_dir:
+    one <stage>.prof file (open with pstats or snakeviz), one
+    <stage>_allocations.txt and a summary.txt covering every stage.
+    """
+
+    def __init__(self, output_dir, top=15):
+        self.output_dir = output_dir
+        self.top = top
+        self.run_dir = None
+        self.profiles = {}
+        self.wall = defaultdict(float)
+        self.allocations = defaultdict(lambda: defaultdict(lambda: [0, 0]))
+
+    def start_run(self):
+        """Reset per-stage state and start tracing allocations"""
+        self.run_dir = os.path.join(self.output_dir, datetime.now().strftime('%Y%m%d_%H%M%S'))
+        self.profiles = {}
+        self.wall.clear()
+        self.allocations.clear()
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(10)
+
+    @contextmanager
+    def stage(self, name):
+        """Profile one stage; repeated calls are merged into the same profile"""
+        profile = self.profiles.setdefault(name, cProfile.Profile())
+        before = tracemalloc.take_snapshot()
+        start = time.perf_counter()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            self.wall[name] += time.perf_counter() - start
+            after = tracemalloc.take_snapshot()
+            for diff in after.compare_to(before, 'lineno'):
+                frame = diff.traceback[0]
+                entry = self.allocations[name][f"{frame.filename}:{frame.lineno}"]
+                entry[0] += diff.size_diff
+                entry[1] += diff.count_diff
+
+    def finish_run(self):
+        """Write per-stage profile files and the summary, then stop tracing"""
+        if self.run_dir is None:
+            return None
+        os.makedirs(self.run_dir, exist_ok=True)
+        summary = [f"Profile of run {os.path.basename(self.run_dir)}", ""]
+
+        for name, profile in self.profiles.items():
+            profile.dump_stats(os.path.join(self.run_dir, f"{name}.prof"))
+
+            top_allocations = sorted(self.allocations[name].items(), key=lambda item: item[1][0], reverse=True)[:self.top]
+            with open(os.path.join(self.run_dir, f"{name}_allocations.txt"), 'w') as f:
+                for location, (size, count) in top_allocations:
+                    f.write(f"{size / 1024:+10.1f} KiB {count:+8d} blocks  {location}\n")
+
+            stream = io.StringIO()
+            pstats.Stats(profile, stream=stream).sort_stats('cumulative').print_stats(self.top)
+
+            summary.append(f"=== {name}: {self.wall[name]:.3f}s wall ===")
+            summary.append("Top allocations:")
+            summary += [f"  {size / 1024:+10.1f} KiB  {location}" for location, (size, _) in top_allocations[:5]]
+            summary.append(stream.getvalue())
+
+        with open(os.path.join(self.run_dir, 'summary.txt'), 'w') as f:
+            f.write('\n'.join(summary))
+
+        tracemalloc.stop()
+        logger.info("Profiles written to %s", self.run_dir)
+        return self.run_dir
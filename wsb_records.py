@@ -0,0 +1,115 @@
+import math
+
+import numpy as np
+
+NAN = float('nan')
+# Volume is an integer column; -1 marks a missing value
+MISSING_VOLUME = -1
+
+# Structured dtype for batches of quotes (one row per ticker)
+QUOTE_DTYPE = np.dtype([
+    ('ticker', 'U8'),
+    ('current_price', 'f8'),
+    ('previous_close', 'f8'),
+    ('change_percent', 'f8'),
+    ('volume', 'i8'),
+    ('market_cap', 'f8'),
+    ('source', 'U16'),  # longest is 'alpha_vantage'
+])
+
+
+class Quote:
+    """Compact quote record with typed numeric fields
+
+    Missing prices and market caps are NaN and missing volume is
+    MISSING_VOLUME, so numeric code never sees strings like 'N/A'.
+    source is 'alpha_vantage', 'yahoo', 'placeholder', 'emergency' or
+    'missing'.
+    """
+
+    __slots__ = ('ticker', 'current_price', 'previous_close', 'change_percent', 'volume', 'market_cap', 'source')
+
+    def __init__(self, ticker, current_price=NAN, previous_close=NAN, change_percent=NAN,
+                 volume=MISSING_VOLUME, market_cap=NAN, source='missing'):
+        self.ticker = ticker
+        self.current_price = float(current_price)
+        self.previous_close = float(previous_close)
+        self.change_percent = float(change_percent)
+        self.volume = int(volume)
+        self.market_cap = float(market_cap)
+        self.source = source
+
+    @classmethod
+    def missing(cls, ticker):
+        """Quote for a ticker without any price data"""
+        return cls(ticker)
+
+    @property
+    def has_price(self):
+        return not math.isnan(self.current_price) and self.current_price > 0
+
+    @property
+    def rank_change(self):
+        """Change percent for sorting; missing values sort last"""
+        return -math.inf if math.isnan(self.change_percent) else self.change_percent
+
+    def to_dict(self):
+        """JSON-friendly dict with None for missing values"""
+        return {
+            'ticker': self.ticker,
+            'current_price': _optional(self.current_price),
+            'previous_close': _optional(self.previous_close),
+            'change_percent': _optional(self.change_percent),
+            'volume': None if self.volume == MISSING_VOLUME else self.volume,
+            'market_cap': _optional(self.market_cap),
+            'source': self.source,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            data['ticker'],
+            _number(data.get('current_price')),
+            _number(data.get('previous_close')),
+            _number(data.get('change_percent')),
+            MISSING_VOLUME if data.get('volume') is None else data['volume'],
+            _number(data.get('market_cap')),
+            data.get('source', 'missing'),
+        )
+
+    def __repr__(self):
+        return f"Quote({self.ticker!r}, price={self.current_price}, change={self.change_percent}, source={self.source!r})"
+
+
+class Mention:
+    """A scraped ticker candidate: where it came from and how strongly"""
+
+    __slots__ = ('ticker', 'source', 'score', 'cashtag')
+
+    def __init__(self, ticker, source, score=1.0, cashtag=False):
+        self.ticker = ticker
+        self.source = source
+        self.score = float(score)
+        self.cashtag = cashtag
+
+    def to_dict(self):
+        return {'ticker': self.ticker, 'source': self.source, 'score': self.score, 'cashtag': self.cashtag}
+
+    def __repr__(self):
+        return f"Mention({self.ticker!r}, source={self.source!r}, score={self.score})"
+
+
+def quotes_to_array(quotes):
+    """Pack quotes into a structured NumPy array for batch processing"""
+    return np.array([
+        (q.ticker, q.current_price, q.previous_close, q.change_percent, q.volume, q.market_cap, q.source)
+        for q in quotes
+    ], dtype=QUOTE_DTYPE)
+
+
+def _optional(value):
+    return None if math.isnan(value) else value
+
+
+def _number(value):
+    return NAN if value is None else value
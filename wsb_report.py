@@ -0,0 +1,346 @@
+import math
+from string import Template
+
+import numpy as np
+
+# Sparkline length: daily closes and per-run-day mentions
+SPARK_POINTS = 30
+SPARK_BARS = '▁▂▃▄▅▆▇█'
+
+REPORT_SIZE = 8
+
+STYLE = """
+                body { font-family: Arial, sans-serif; line-height: 1.6; color: #333; }
+                .header { background-color: #1f2937; color: white; padding: 20px; text-align: center; }
+                .content { padding: 20px; }
+                .ticker-card {
+                    border: 1px solid #ddd;
+                    border-radius: 8px;
+                    margin: 10px 0;
+                    padding: 15px;
+                    background-color: #f9f9f9;
+                }
+                .ticker-name { font-size: 18px; font-weight: bold; color: #1f2937; }
+                .price { font-size: 16px; margin: 5px 0; }
+                .positive { color: #059669; }
+                .negative { color: #dc2626; }
+                .neutral { color: #6b7280; }
+                .spark { margin-top: 5px; color: #6b7280; font-size: 12px; }
+                .spark-line { font-family: monospace; font-size: 14px; letter-spacing: 1px; }
+                .mentions { color: #2563eb; }
+                .insights { background-color: #e0f2fe; padding: 15px; border-radius: 8px; margin-top: 20px; }
+                .footer { text-align: center; color: #6b7280; font-size: 12px; margin-top: 30px; }
+"""
+
+# Templates are compiled once at import; the CSS is substituted into the
+# head right away, so a render only fills in the timestamp and the cards
+HTML_HEAD = Template(Template("""
+        <!DOCTYPE html>
+        <html>
+        <head>
+            <meta charset="UTF-8">
+            <title>WSB Daily Stock Report</title>
+            <style>$style</style>
+        </head>
+        <body>
+            <div class="header">
+                <h1>🔥 WSB DAILY STOCK REPORT 🔥</h1>
+                <p>📅 $$timestamp</p>
+            </div>
+
+            <div class="content">
+                <h2>🎯 Top Trending Tickers Today:</h2>
+        """).substitute(style=STYLE))
+
+HTML_CARD = Template("""
+                <div class="ticker-card">
+                    <div class="ticker-name">$rank. $$$ticker</div>
+                    <div class="price">💰 Price: $price <span class="$change_class">($change)</span></div>
+                    <div>📊 Momentum: $momentum</div>
+                    <div>⚠️ Risk Level: $risk</div>
+                    $extra
+                </div>
+            """)
+HTML_VOLUME = Template('<div>📊 Relative Volume: $volume</div>')
+HTML_SENTIMENT = Template('<div>🗣️ WSB Sentiment: $sentiment</div>')
+HTML_OPTIONS = Template('<div>🎰 Options Flow: $options</div>')
+# Unicode block sparklines rather than inline SVG or data-URI images,
+# which Gmail and other webmail clients strip from messages
+HTML_SPARKS = Template('<div class="spark"><span class="spark-line $price_trend">$price_spark</span> price · '
+                       '<span class="spark-line mentions">$mentions_spark</span> mentions</div>')
+
+HTML_TAIL = Template("""
+                <div class="insights">
+                    <h3>📈 Quick Insights:</h3>
+                    <ul>
+                        <li>Monitor stocks with 🚀 Strong Bullish momentum</li>
+                        <li>🔥 High Risk stocks = Higher potential rewards</li>
+                        <li>$volume_insight</li>
+                        <li>Always use proper position sizing!</li>
+                    </ul>
+
+                    <p><strong>💡 Remember: This is not financial advice. Always DYOR!</strong></p>
+                </div>
+
+                <div class="footer">
+                    <p><em>Next update at the next scheduled market run</em></p>
+                    <p>Generated by WSB Scraper v1.0</p>
+                </div>
+            </div>
+        </body>
+        </html>
+        """)
+
+TEXT_HEAD = Template("WSB DAILY STOCK REPORT - $timestamp\n\nTop Trending Tickers Today:\n")
+TEXT_CARD = Template("\n$rank. $$$ticker  $price ($change)\n   Momentum: $momentum | Risk: $risk\n$extra")
+TEXT_TAIL = Template("\nQuick insights:\n- $volume_insight\n\nThis is not financial advice. Always DYOR!\n")
+
+MARKDOWN_HEAD = Template("# 🔥 WSB Daily Stock Report\n\n📅 $timestamp\n\n## 🎯 Top Trending Tickers Today\n")
+MARKDOWN_CARD = Template("\n### $rank. \\$$$ticker — $price ($change)\n\n"
+                         "- 📊 Momentum: $momentum\n- ⚠️ Risk Level: $risk\n$extra")
+MARKDOWN_TAIL = Template("\n## 📈 Quick Insights\n\n- $volume_insight\n\n"
+                         "**💡 Remember: This is not financial advice. Always DYOR!**\n")
+
+DELTA_STYLE = """
+                body { font-family: Arial, sans-serif; line-height: 1.6; color: #333; }
+                .header { background-color: #1f2937; color: white; padding: 20px; text-align: center; }
+                .content { padding: 20px; }
+                .section { border: 1px solid #ddd; border-radius: 8px; margin: 10px 0; padding: 15px; background-color: #f9f9f9; }
+                .footer { text-align: center; color: #6b7280; font-size: 12px; margin-top: 30px; }
+"""
+
+# The short intraday report of what changed since the last snapshot
+DELTA_HEAD = Template(Template("""
+        <!DOCTYPE html>
+        <html>
+        <head>
+            <meta charset="UTF-8">
+            <title>WSB Intraday Update</title>
+            <style>$style</style>
+        </head>
+        <body>
+            <div class="header">
+                <h1>⚡ WSB INTRADAY UPDATE ⚡</h1>
+                <p>📅 $$timestamp · changes since $$since</p>
+            </div>
+
+            <div class="content">
+        """).substitute(style=DELTA_STYLE))
+DELTA_SECTION = Template("""
+                <div class="section">
+                    <h3>$title</h3>
+                    <ul>$items</ul>
+                </div>
+            """)
+DELTA_TAIL = """
+                <div class="footer">
+                    <p><em>💡 Not financial advice. The full report goes out with the day's first run.</em></p>
+                    <p>Generated by WSB Scraper v1.0</p>
+                </div>
+            </div>
+        </body>
+        </html>
+        """
+
+
+class SparklineCache:
+    """Price and mention sparklines per ticker, memoized for one day
+
+    get() loads the history of every ticker not drawn yet in one batch
+    call per source and draws them all; the memo is dropped when the day
+    changes so each day's sparklines pick up that day's data.
+    """
+
+    def __init__(self, points=SPARK_POINTS):
+        self.points = points
+        self._day = None
+        self._memo = {}
+
+    def get(self, tickers, day, load_prices=None, load_mentions=None):
+        """{ticker: sparklines dict}; load_* map a ticker list to {ticker: values}"""
+        if day != self._day:
+            self._day = day
+            self._memo = {}
+        missing = [t for t in dict.fromkeys(tickers) if t not in self._memo]
+        if missing:
+            prices = load_prices(missing) if load_prices else {}
+            mentions = load_mentions(missing) if load_mentions else {}
+            for ticker in missing:
+                price_values = _tail(prices.get(ticker), self.points)
+                mention_values = _tail(mentions.get(ticker), self.points)
+                rising = len(price_values) > 1 and price_values[-1] >= price_values[0]
+                self._memo[ticker] = {
+                    'price_trend': 'positive' if rising else 'negative',
+                    'price_text': sparkline_text(price_values),
+                    'mentions_text': sparkline_text(mention_values),
+                }
+        return {t: self._memo[t] for t in tickers}
+
+
+def sparkline_text(values):
+    """Unicode block sparkline of values ('' for fewer than two points)"""
+    if len(values) < 2:
+        return ''
+    levels = np.rint(_scaled(values) * (len(SPARK_BARS) - 1)).astype(int)
+    return ''.join(SPARK_BARS[level] for level in levels)
+
+
+def mention_series(daily):
+    """rolling_mentions() output as {ticker: [mentions per run day]}, zeros filled"""
+    days = sorted({day for counts in daily.values() for day in counts})
+    return {ticker: [counts.get(day, 0.0) for day in days] for ticker, counts in daily.items()}
+
+
+def report_cards(tickers_data, analysis, sparklines=None):
+    """Display fields of each report card, shared by every output format"""
+    sparklines = sparklines or {}
+    cards = []
+    for rank, data in enumerate(tickers_data[:REPORT_SIZE], 1):
+        ticker_analysis = analysis[data.ticker]
+
+        volume = ''
+        rvol = ticker_analysis.get('relative_volume', math.nan)
+        if not math.isnan(rvol):
+            volume = f"{rvol:.1f}x" + (" 🚨 Unusual activity" if ticker_analysis['unusual_activity'] else "")
+
+        sentiment = ''
+        bullish_ratio = ticker_analysis.get('bullish_ratio', math.nan)
+        if not math.isnan(bullish_ratio):
+            mood = "🐂" if bullish_ratio >= 0.5 else "🐻"
+            sentiment = f"{mood} {bullish_ratio:.0%} bullish ({int(ticker_analysis['sentiment_mentions'])} mentions)"
+
+        options = ''
+        calls = ticker_analysis.get('options_calls', math.nan)
+        if not math.isnan(calls):
+            puts = ticker_analysis['options_puts']
+            options = f"{int(calls)} calls / {int(puts)} puts ({ticker_analysis['options_bullish_ratio']:.0%} bullish)"
+
+        cards.append(dict(
+            sparklines.get(data.ticker) or {'price_trend': 'neutral', 'price_text': '', 'mentions_text': ''},
+            rank=rank,
+            ticker=data.ticker,
+            price=f"${data.current_price:.2f}" if data.has_price else "N/A",
+            change="N/A" if math.isnan(data.change_percent) else f"{data.change_percent:+.2f}%",
+            # NaN compares false both ways
+            change_class="positive" if data.change_percent > 0 else "negative" if data.change_percent < 0 else "neutral",
+            momentum=ticker_analysis['momentum'],
+            risk=ticker_analysis['risk'],
+            volume=volume,
+            sentiment=sentiment,
+            options=options,
+        ))
+    return cards
+
+
+def volume_insight(unusual):
+    if not unusual:
+        return "Check volume spikes for confirmation"
+    top_unusual = sorted(unusual.items(), key=lambda item: item[1], reverse=True)[:5]
+    return "🚨 Unusual volume: " + ", ".join(f"${t} {rvol:.1f}x" for t, rvol in top_unusual)
+
+
+def render_html(cards, timestamp, insight):
+    parts = [HTML_HEAD.substitute(timestamp=timestamp)]
+    for card in cards:
+        extra = []
+        if card['volume']:
+            extra.append(HTML_VOLUME.substitute(card))
+        if card['sentiment']:
+            extra.append(HTML_SENTIMENT.substitute(card))
+        if card['options']:
+            extra.append(HTML_OPTIONS.substitute(card))
+        if card['price_text'] or card['mentions_text']:
+            extra.append(HTML_SPARKS.substitute(card, price_spark=card['price_text'] or '-',
+                                                mentions_spark=card['mentions_text'] or '-'))
+        parts.append(HTML_CARD.substitute(card, extra='\n                    '.join(extra)))
+    parts.append(HTML_TAIL.substitute(volume_insight=insight))
+    return ''.join(parts)
+
+
+def render_text(cards, timestamp, insight):
+    parts = [TEXT_HEAD.substitute(timestamp=timestamp)]
+    for card in cards:
+        extra = ''
+        if card['volume']:
+            extra += f"   Relative volume: {card['volume']}\n"
+        if card['sentiment']:
+            extra += f"   Sentiment: {card['sentiment']}\n"
+        if card['options']:
+            extra += f"   Options flow: {card['options']}\n"
+        if card['price_text'] or card['mentions_text']:
+            extra += f"   Price {card['price_text'] or '-'}  Mentions {card['mentions_text'] or '-'}\n"
+        parts.append(TEXT_CARD.substitute(card, extra=extra))
+    parts.append(TEXT_TAIL.substitute(volume_insight=insight))
+    return ''.join(parts)
+
+
+def render_markdown(cards, timestamp, insight):
+    # Escape $ so Markdown renderers with math support leave prices alone
+    insight = insight.replace('$', '\\$')
+    parts = [MARKDOWN_HEAD.substitute(timestamp=timestamp)]
+    for card in cards:
+        extra = ''
+        if card['volume']:
+            extra += f"- 📊 Relative Volume: {card['volume']}\n"
+        if card['sentiment']:
+            extra += f"- 🗣️ WSB Sentiment: {card['sentiment']}\n"
+        if card['options']:
+            extra += f"- 🎰 Options Flow: {card['options']}\n"
+        if card['price_text'] or card['mentions_text']:
+            extra += f"- 📈 Price `{card['price_text'] or '-'}` · Mentions `{card['mentions_text'] or '-'}`\n"
+        parts.append(MARKDOWN_CARD.substitute(card, price=card['price'].replace('$', '\\$'), extra=extra))
+    parts.append(MARKDOWN_TAIL.substitute(volume_insight=insight))
+    return ''.join(parts)
+
+
+def render_delta(delta, timestamp, since):
+    """HTML report of a wsb_delta.compute_delta() result; empty sections are left out"""
+    def price(row, key='price'):
+        return "N/A" if row[key] is None else f"${row[key]:.2f}"
+
+    sections = [
+        ("🆕 New in the Rankings", [
+            f"#{int(row['rank'])} ${row['ticker']} at {price(row)}"
+            for row in delta['new_entrants']]),
+        ("⬆️ Rank Jumps", [
+            f"${row['ticker']}: #{int(row['rank_previous'])} → #{int(row['rank'])}"
+            for row in delta['rank_jumps']]),
+        ("🗣️ Mention Surges", [
+            f"${row['ticker']}: {row['mentions']:.0f} mentions"
+            + ("" if row['mentions_previous'] is None else f" (was {row['mentions_previous']:.0f})")
+            for row in delta['mention_surges']]),
+        ("💥 Price Moves", [
+            f"${row['ticker']}: {price(row, 'price_previous')} → {price(row)} ({row['move_percent']:+.2f}%)"
+            for row in delta['price_moves']]),
+    ]
+
+    parts = [DELTA_HEAD.substitute(timestamp=timestamp, since=since)]
+    for title, lines in sections:
+        if lines:
+            parts.append(DELTA_SECTION.substitute(title=title, items=''.join(f"<li>{line}</li>" for line in lines)))
+    parts.append(DELTA_TAIL)
+    return ''.join(parts)
+
+
+RENDERERS = {'html': render_html, 'text': render_text, 'markdown': render_markdown}
+
+
+def render_report(cards, timestamp, unusual=None, formats=('html', 'text', 'markdown')):
+    """{format: document} rendered from the same cards"""
+    insight = volume_insight(unusual)
+    return {name: RENDERERS[name](cards, timestamp, insight) for name in formats}
+
+
+def _tail(values, points):
+    if values is None:
+        return np.empty(0)
+    values = np.asarray(values, dtype='float64')[-points:]
+    return values[~np.isnan(values)]
+
+
+def _scaled(values):
+    """values mapped onto 0..1 (flat series sit in the middle)"""
+    low, high = values.min(), values.max()
+    if high == low:
+        return np.full(len(values), 0.5)
+    return (values - low) / (high - low)
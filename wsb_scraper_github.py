@@ -1,44 +1,160 @@
+import argparse
 import requests
 from bs4 import BeautifulSoup
 import praw
 import pandas as pd
 import json
+import logging
+import threading
 import time
-from datetime import datetime
+from datetime import datetime, timedelta
 import pytz
 import os
 from dotenv import load_dotenv
 import re
 from collections import Counter
-import base64
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from googleapiclient.discovery import build
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
+from wsb_mailer import BatchMailer, build_raw_message, group_by_watchlist, load_subscribers
+from wsb_analysis import analysis_by_ticker, analyze_quote, analyze_quotes
+from wsb_api import MENTION_DAYS, rolling_mentions, build_documents
+from wsb_cassette import Cassette, RecordingReddit
+from wsb_checkpoint import DEFAULT_MAX_AGE_HOURS, RunCheckpoint, expire_checkpoints, send_results
+from wsb_delta import SnapshotStore, compute_delta, has_changes
+from wsb_export import RunExporter, candidate_rows, parse_sinks
+from wsb_extract import TickerExtractor, parse_subreddits
+from wsb_jobs import Coordinator, JobQueue, JobWorker
+from wsb_logging import log_stage, set_run, setup_logging
+from wsb_history import MARKET_TIMEZONE, PriceHistory, compute_indicators, relative_volume, session_fraction
+from wsb_mentions import MentionStore
+from wsb_metrics import RunMetrics
+from wsb_pipeline import ScrapeQuotePipeline
+from wsb_profiling import StageProfiler
+from wsb_records import NAN, Mention, Quote
+from wsb_report import REPORT_SIZE, SparklineCache, mention_series, render_delta, render_report, report_cards
+from wsb_options import OptionsFlow, options_frame
+from wsb_sentiment import SentimentScorer, TickerSentiment, sentiment_frame
+
+logger = logging.getLogger(__name__)
 
 # For GitHub Actions, we'll set environment variables directly
 # No need to load .env file in cloud environment
 
+def create_reddit():
+    """A Reddit client with the credentials from the environment"""
+    return praw.Reddit(
+        client_id=os.getenv('REDDIT_CLIENT_ID'),
+        client_secret=os.getenv('REDDIT_CLIENT_SECRET'),
+        username=os.getenv('REDDIT_USERNAME'),
+        password=os.getenv('REDDIT_PASSWORD'),
+        user_agent='WSB_Scraper_1.0'
+    )
+
 class WSBScraper:
-    def __init__(self):
-        # Initialize Reddit API
-        self.reddit = praw.Reddit(
-            client_id=os.getenv('REDDIT_CLIENT_ID'),
-            client_secret=os.getenv('REDDIT_CLIENT_SECRET'),
-            username=os.getenv('REDDIT_USERNAME'),
-            password=os.getenv('REDDIT_PASSWORD'),
-            user_agent='WSB_Scraper_1.0'
-        )
-        
-        # Initialize Gmail
-        self.setup_gmail()
+    def __init__(self, cassette=None, gmail=True):
+        # HTTP session and quote API key (swapped out by record/replay cassettes);
+        # the session keeps connections alive between requests and runs
+        self.http = requests.Session()
+        self.alpha_key = os.getenv('ALPHA_VANTAGE_API_KEY')
+        self.yahoo_chart_url = os.getenv('YAHOO_CHART_URL', 'https://query1.finance.yahoo.com/v8/finance/chart')
+        
+        if cassette and cassette.replaying:
+            # Offline replay: the cassette provides Reddit and Gmail stand-ins
+            self.reddit = None
+            self.gmail_service = None
+        else:
+            # Initialize Reddit API
+            self.reddit = create_reddit()
+            
+            # Initialize Gmail (job workers never send email, so they skip the OAuth setup)
+            self.gmail_service = None
+            if gmail:
+                self.setup_gmail()
         
         # Email settings
         self.email_to = os.getenv('EMAIL_TO')
         self.email_from = os.getenv('EMAIL_FROM')
         
+        self.cassette = cassette
+        if cassette:
+            cassette.attach(self)
+        
+        # Subreddits to scrape with their ranking weights, e.g.
+        # SUBREDDITS="wallstreetbets:1,stocks:0.6,options:0.6,pennystocks:0.4,investing:0.5"
+        self.subreddits = parse_subreddits(os.getenv('SUBREDDITS', 'wallstreetbets:1'))
+        self.reddit_max_concurrency = int(os.getenv('REDDIT_MAX_CONCURRENCY', '5'))
+        self._reddit_clients = threading.local()
+        self.reddit_breakdown = {}
+        self.reddit_kinds = {}
+        self.reddit_sentiment = {}
+        self.swaggy_sentiment = {}
+        self.reddit_options = {}
+        
+        # Raw mention counts of every run, for wsb_backtest.py (MENTION_HISTORY_DB="" disables it)
+        mention_db = os.getenv('MENTION_HISTORY_DB', 'mention_history.db')
+        self.mention_store = MentionStore(mention_db) if mention_db else None
+        
+        # Per-run ranking snapshots (SNAPSHOT_DB="" disables them) and the report
+        # they drive: REPORT_MODE=full (default), delta, or auto (the day's first
+        # run gets the full report, later runs only what changed since)
+        snapshot_db = os.getenv('SNAPSHOT_DB', 'mention_history.db')
+        self.snapshot_store = SnapshotStore(snapshot_db) if snapshot_db else None
+        self.report_mode = os.getenv('REPORT_MODE', 'full')
+        self.delta_thresholds = {
+            'rank_jump': int(os.getenv('DELTA_RANK_JUMP', '3')),
+            'mention_surge': float(os.getenv('DELTA_MENTION_SURGE', '2.0')),
+            'min_mentions': float(os.getenv('DELTA_MIN_MENTIONS', '5')),
+            'price_move': float(os.getenv('DELTA_PRICE_MOVE', '3.0')),
+        }
+        
+        # Daily OHLCV cache for volatility-based risk (PRICE_HISTORY_DIR="" disables it);
+        # a replay must not depend on what the on-disk cache holds
+        history_dir = os.getenv('PRICE_HISTORY_DIR', 'price_history')
+        history_workers = int(os.getenv('PRICE_HISTORY_WORKERS', '16'))
+        self.price_history = (PriceHistory(history_dir, self.http, self.yahoo_chart_url, max_workers=history_workers)
+                              if history_dir and not (cassette and cassette.replaying) else None)
+        
+        # Parallel quote workers in the scrape/quote pipeline
+        self.quote_workers = int(os.getenv('QUOTE_WORKERS', '2'))
+        
+        # Shared job queue: runs fan scrape and quote jobs out to `--worker` processes
+        job_queue_db = os.getenv('JOB_QUEUE_DB')
+        self.job_queue = JobQueue(job_queue_db) if job_queue_db else None
+        
+        # Stage checkpoints for resuming failed runs (CHECKPOINT_DIR="" disables them)
+        self.checkpoint_dir = os.getenv('CHECKPOINT_DIR', 'checkpoints')
+        self.checkpoint_max_age = float(os.getenv('CHECKPOINT_MAX_AGE_HOURS', str(DEFAULT_MAX_AGE_HOURS)))
+        
+        # Report rendering: sparklines are memoized per market day, and the
+        # Markdown report goes to REPORT_MARKDOWN_FILE (the GitHub Actions job
+        # summary when running there)
+        self.sparklines = SparklineCache()
+        self.report_markdown_file = os.getenv('REPORT_MARKDOWN_FILE', os.getenv('GITHUB_STEP_SUMMARY'))
+        
+        # Per-candidate export of every run, e.g.
+        # EXPORT_SINKS="ndjson:exports/candidates.ndjson.gz,parquet:exports/runs"
+        # with EXPORT_COMPRESSION=none|gzip|zstd
+        self.export_sinks = os.getenv('EXPORT_SINKS', '')
+        self.export_compression = os.getenv('EXPORT_COMPRESSION', 'none')
+        
+        # Optional JSON file with per-subscriber watchlists
+        self.subscribers_file = os.getenv('SUBSCRIBERS_FILE')
+        
+        # Run instrumentation (JSON run reports go to METRICS_DIR if set)
+        self.metrics = RunMetrics()
+        self.metrics_dir = os.getenv('METRICS_DIR')
+        self.exporter = None
+        
+        # In-memory documents for the read-only HTTP API (set when API_PORT is)
+        self.api_cache = None
+        
+        # Set by --profile; None keeps profiling completely out of the run
+        self.profiler = None
+        
         # Stock ticker pattern
         self.ticker_pattern = re.compile(r'\$([A-Z]{1,5})\b|\b([A-Z]{1,5})\b')
         
@@ -105,8 +221,13 @@ class WSBScraper:
             'WEN', 'GPRO', 'IONQ', 'RGTI', 'QBTS', 'QUBT', 'LAES', 'HOLO', 'AEO', 'F', 'GE',
             # Add more common WSB tickers
             'SPCE', 'COIN', 'RBLX', 'ABNB', 'ZM', 'PTON', 'MRNA', 'PFE', 'BABA', 'NIO', 'XPEV',
-            'LI', 'LCID', 'RIVN', 'NKLA', 'QS', 'CHPT', 'BLNK', 'PLUG', 'FCEL', 'CLNE', 'BE'
+            'LI', 'LCID', 'RIVN', 'NKLA', 'QS', 'CHPT', 'BLNK', 'PLUG', 'FCEL', 'CLNE', 'BE',
+            # Symbols that are also words; Reddit text only counts them in ticker context
+            'ALL', 'ARE', 'CAN', 'NOW', 'OPEN', 'IT'
         }
+        
+        self.extractor = TickerExtractor(self.known_tickers, self.common_words)
+        self.sentiment_scorer = SentimentScorer()
 
     def setup_gmail(self):
         """Initialize Gmail API using service account credentials (for GitHub Actions)"""
@@ -128,10 +249,10 @@ class WSBScraper:
                         credentials = credentials.with_subject(self.email_from)
                     
                     self.gmail_service = build('gmail', 'v1', credentials=credentials)
-                    print("Gmail API initialized with service account")
+                    logger.info("Gmail API initialized with service account")
                     return
                 except Exception as e:
-                    print(f"Service account auth failed: {e}")
+                    logger.warning("Service account auth failed: %s", e)
             
             # Fallback to OAuth flow
             SCOPES = ['https://www.googleapis.com/auth/gmail.send']
@@ -153,100 +274,230 @@ class WSBScraper:
                     token.write(creds.to_json())
             
             self.gmail_service = build('gmail', 'v1', credentials=creds)
-            print("Gmail API initialized with OAuth")
+            logger.info("Gmail API initialized with OAuth")
             
         except Exception as e:
-            print(f"Error setting up Gmail: {e}")
+            logger.error("Error setting up Gmail: %s", e)
             self.gmail_service = None
 
-    def scrape_swaggy_stocks(self):
-        """Scrape trending tickers from SwaggyStocks with better extraction"""
+    def scrape_swaggy_stocks(self, emit=None, strict=False):
+        """Scrape trending tickers from SwaggyStocks with better extraction
+
+        Errors are logged and give no tickers, unless strict is set (job
+        workers), in which case they are raised so the job is retried.
+        """
         try:
             url = "https://swaggystocks.com/dashboard/wallstreetbets/ticker-sentiment"
             headers = {
                 'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
             }
             
-            response = requests.get(url, headers=headers, timeout=15)
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            found_tickers = set()
-            
-            # Method 1: Look for known ticker patterns in text
-            page_text = soup.get_text().upper()
-            
-            # Extract potential tickers
-            potential_tickers = re.findall(r'\b[A-Z]{1,5}\b', page_text)
-            
-            for ticker in potential_tickers:
-                # Prioritize known valid tickers
-                if ticker in self.known_tickers:
-                    found_tickers.add(ticker)
-                # For unknown tickers, apply strict filtering
-                elif (len(ticker) >= 3 and len(ticker) <= 5 and 
-                      ticker not in self.common_words and
-                      not ticker.isdigit()):
-                    found_tickers.add(ticker)
-            
-            # Method 2: Look for specific SwaggyStocks elements (adapt as needed)
-            # Try to find elements that might contain ticker data
-            for element in soup.find_all(['div', 'span', 'td', 'th']):
-                text = element.get_text().strip().upper()
-                if (text and 2 <= len(text) <= 5 and 
-                    text.isalpha() and 
-                    text in self.known_tickers):
-                    found_tickers.add(text)
+            with self.metrics.http('swaggystocks') as call:
+                response = self.http.get(url, headers=headers, timeout=15)
+                call['status'] = response.status_code
+            
+            sentiment = {}
+            result_tickers = self.parse_swaggy_html(response.content, sentiment)
+            self.swaggy_sentiment = sentiment
+            logger.info("SwaggyStocks found tickers: %s", result_tickers, extra={'event': 'swaggy_tickers'})
             
-            result_tickers = list(found_tickers)[:10]
-            print(f"SwaggyStocks found tickers: {result_tickers}")
+            # Stream candidates to the quote stage
+            if emit:
+                for ticker in result_tickers:
+                    emit(ticker)
             return result_tickers
             
         except Exception as e:
-            print(f"Error scraping SwaggyStocks: {e}")
+            if strict:
+                raise
+            logger.error("Error scraping SwaggyStocks: %s", e, extra={'event': 'scrape_error', 'source': 'swaggystocks'})
             return []
 
-    def scrape_reddit_wsb(self):
-        """Scrape trending tickers from Reddit WSB with improved filtering"""
+    def parse_swaggy_html(self, content, sentiment=None):
+        """Extract up to 10 tickers from a SwaggyStocks page
+
+        If a sentiment dict is given, table rows labelled Bullish or Bearish
+        are added to it as one-vote TickerSentiment tallies.
+        """
+        soup = BeautifulSoup(content, 'html.parser')
+        
+        found_tickers = set()
+        
+        # Method 1: Look for known ticker patterns in text
+        page_text = soup.get_text().upper()
+        
+        # Extract potential tickers
+        potential_tickers = re.findall(r'\b[A-Z]{1,5}\b', page_text)
+        
+        for ticker in potential_tickers:
+            # Words like ALL or IT are only taken from ticker cells below
+            if ticker in self.extractor.ambiguous:
+                continue
+            # Prioritize known valid tickers
+            if ticker in self.known_tickers:
+                found_tickers.add(ticker)
+            # For unknown tickers, apply strict filtering
+            elif (len(ticker) >= 3 and len(ticker) <= 5 and 
+                  ticker not in self.common_words and
+                  not ticker.isdigit()):
+                found_tickers.add(ticker)
+        
+        # Method 2: Look for specific SwaggyStocks elements (adapt as needed)
+        # Try to find elements that might contain ticker data
+        for element in soup.find_all(['div', 'span', 'td', 'th']):
+            raw = element.get_text().strip()
+            text = raw.upper()
+            # Ambiguous tickers (F, ALL, ...) only from a cell of their own in capitals
+            if text in self.extractor.ambiguous:
+                if raw == text and text in self.known_tickers:
+                    found_tickers.add(text)
+            elif (2 <= len(text) <= 5 and 
+                  text.isalpha() and 
+                  text in self.known_tickers):
+                found_tickers.add(text)
+        
+        # Method 3: Keep the page's sentiment labels for ticker rows
+        if sentiment is not None:
+            for row in soup.find_all('tr'):
+                cells = [cell.get_text(strip=True).upper() for cell in row.find_all(['td', 'th'])]
+                if not cells or cells[0] not in found_tickers:
+                    continue
+                label = ' '.join(cells[1:])
+                tally = sentiment.setdefault(cells[0], TickerSentiment())
+                if 'BULLISH' in label:
+                    tally.add(1.0)
+                elif 'BEARISH' in label:
+                    tally.add(-1.0)
+        
+        return list(found_tickers)[:10]
+
+    def scrape_reddit_wsb(self, emit=None):
+        """Scrape trending tickers from the configured subreddits concurrently"""
         try:
-            subreddit = self.reddit.subreddit('wallstreetbets')
-            
-            # Get hot posts
-            hot_posts = list(subreddit.hot(limit=30))
+            # One listing request per subreddit, fetched in parallel so extra
+            # subreddits add almost nothing to wall-clock time (each worker
+            # thread with a Reddit client of its own, see _thread_reddit)
+            cashtags = set()
+            kinds = {name: Counter() for name in self.subreddits}
+            sentiment = {name: {} for name in self.subreddits}
+            options = {name: {} for name in self.subreddits}
+            workers = max(1, min(len(self.subreddits), self.reddit_max_concurrency))
+            if self.cassette and self.cassette.replaying:
+                workers = 1  # Subreddits in order, so injected failures land on the same ones
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                breakdown = dict(zip(self.subreddits, pool.map(
+                    lambda name: self._scrape_subreddit(name, cashtags, emit, kinds[name], sentiment[name], options[name]),
+                    self.subreddits)))
             
+            # Merge into one ranking using the per-subreddit weights
             ticker_mentions = Counter()
+            for name, mentions in breakdown.items():
+                weight = self.subreddits[name]
+                for ticker, count in mentions.items():
+                    ticker_mentions[ticker] += count * weight
+            self.reddit_breakdown = breakdown
+            self.reddit_kinds = kinds
             
-            for post in hot_posts:
-                # Extract tickers from title and selftext
-                text = f"{post.title} {post.selftext}".upper()
-                
-                # Look for $TICKER format (high confidence)
-                dollar_tickers = re.findall(r'\$([A-Z]{2,5})\b', text)
-                for ticker in dollar_tickers:
-                    if ticker in self.known_tickers or (ticker not in self.common_words and len(ticker) >= 3):
-                        ticker_mentions[ticker] += 3  # Weight $TICKER format highest
-                
-                # Look for standalone tickers (medium confidence)
-                standalone_tickers = re.findall(r'\b([A-Z]{3,5})\b', text)
-                for ticker in standalone_tickers:
-                    if ticker in self.known_tickers:
-                        ticker_mentions[ticker] += 2  # Known tickers get priority
-                    elif (ticker not in self.common_words and 
-                          len(ticker) >= 3 and 
-                          not any(word in ticker for word in ['THE', 'AND', 'FOR'])):
-                        ticker_mentions[ticker] += 1
-            
-            # Get top mentioned tickers with minimum threshold
-            top_tickers = [ticker for ticker, count in ticker_mentions.most_common(15) if count >= 2]
-            
-            print(f"Reddit WSB found tickers: {top_tickers[:10]}")
+            # Bullish/bearish tallies summed over all subreddits
+            merged_sentiment = {}
+            for tallies in sentiment.values():
+                for ticker, tally in tallies.items():
+                    merged_sentiment.setdefault(ticker, TickerSentiment()).merge(tally)
+            self.reddit_sentiment = merged_sentiment
+            
+            # Call/put positions summed over all subreddits
+            merged_options = {}
+            for flows in options.values():
+                for ticker, flow in flows.items():
+                    merged_options.setdefault(ticker, OptionsFlow()).merge(flow)
+            self.reddit_options = merged_options
+            
+            # Get top mentioned tickers with minimum threshold (ties by name,
+            # so the ranking does not depend on which subreddit finished first)
+            ranked = sorted(ticker_mentions.items(), key=lambda item: (-item[1], item[0]))
+            top_tickers = [ticker for ticker, count in ranked[:15] if count >= 2]
+            
+            # The one recorded mention per ticker, with its merged score
+            if emit:
+                for ticker in top_tickers[:10]:
+                    emit(ticker, ticker in cashtags, ticker_mentions[ticker])
+            
+            for ticker in top_tickers[:10]:
+                sources = ', '.join(f"{name}={mentions[ticker]}" for name, mentions in breakdown.items() if mentions[ticker])
+                logger.info("  %s: %.1f (%s)", ticker, ticker_mentions[ticker], sources,
+                            extra={'event': 'reddit_ticker', 'ticker': ticker, 'mentions': ticker_mentions[ticker]})
+            logger.info("Reddit found tickers: %s", top_tickers[:10], extra={'event': 'reddit_tickers'})
             return top_tickers[:10]
             
         except Exception as e:
-            print(f"Error scraping Reddit: {e}")
+            logger.error("Error scraping Reddit: %s", e, extra={'event': 'scrape_error', 'source': 'reddit'})
             return []
 
-    def get_stock_data(self, ticker):
-        """Get stock data using multiple APIs"""
+    def _thread_reddit(self):
+        """The calling thread's Reddit client
+
+        praw.Reddit is not thread-safe, so each thread scraping subreddits
+        gets a client of its own, created on first use (and recorded like the
+        main one when recording). Replay and test stand-ins are shared.
+        """
+        reddit = self.reddit
+        recording = isinstance(reddit, RecordingReddit)
+        if not isinstance(reddit.reddit if recording else reddit, praw.Reddit):
+            return reddit
+        client = getattr(self._reddit_clients, 'reddit', None)
+        if client is None:
+            client = create_reddit()
+            if recording:
+                client = RecordingReddit(reddit.cassette, client)
+            self._reddit_clients.reddit = client
+        return client
+
+    def _scrape_subreddit(self, name, cashtags, emit=None, kinds=None, sentiment=None, options=None, strict=False):
+        """Count ticker mentions (and score their sentiment and options positions) in one subreddit's hot posts
+
+        Errors give an empty count, or are raised when strict is set.
+        """
+        try:
+            subreddit = self._thread_reddit().subreddit(name)
+            
+            # Get hot posts
+            with self.metrics.http('reddit'):
+                hot_posts = list(subreddit.hot(limit=30))
+            
+            # Extract tickers from title and selftext
+            found_cashtags = set()
+            texts = [f"{post.title} {post.selftext}" for post in hot_posts]
+            spans = [] if sentiment is not None else None
+            mentions = self.extractor.count_mentions(texts, cashtags=found_cashtags, kinds=kinds, options=options,
+                                                     spans=spans)
+            cashtags.update(found_cashtags)
+            if sentiment is not None:
+                self.sentiment_scorer.score_texts(texts, spans, sentiment)
+            
+            # Offer this subreddit's strong candidates for quoting without
+            # waiting for the others; their mentions are recorded once merged
+            if emit:
+                weight = self.subreddits[name]
+                for ticker, count in mentions.most_common(15):
+                    if count * weight >= 2:
+                        emit(ticker, ticker in found_cashtags, count * weight, record=False)
+            
+            return mentions
+            
+        except Exception as e:
+            if strict:
+                raise
+            logger.error("Error scraping r/%s: %s", name, e, extra={'event': 'scrape_error', 'source': f"r/{name}"})
+            return Counter()
+
+    def get_stock_data(self, ticker, strict=False):
+        """Get stock data using multiple APIs
+
+        With strict set, a lookup error (network or parsing) that left the
+        ticker without a price is raised instead of falling back to a
+        placeholder or an empty quote, so a job worker can retry it.
+        """
+        failure = None
         try:
             # Clean the ticker
             clean_ticker = re.sub(r'[^A-Z]', '', ticker.upper())
@@ -257,11 +508,12 @@ class WSBScraper:
             # Try multiple data sources
             
             # Method 1: Alpha Vantage (if API key available)
-            alpha_key = os.getenv('ALPHA_VANTAGE_API_KEY')
-            if alpha_key:
+            if self.alpha_key:
                 try:
-                    url = f"https://www.alphavantage.co/query?function=GLOBAL_QUOTE&symbol={clean_ticker}&apikey={alpha_key}"
-                    response = requests.get(url, timeout=10)
+                    url = f"https://www.alphavantage.co/query?function=GLOBAL_QUOTE&symbol={clean_ticker}&apikey={self.alpha_key}"
+                    with self.metrics.http('alpha_vantage') as call:
+                        response = self.http.get(url, timeout=10)
+                        call['status'] = response.status_code
                     data = response.json()
                     
                     if 'Global Quote' in data and data['Global Quote']:
@@ -271,25 +523,23 @@ class WSBScraper:
                         change_pct = float(quote.get('10. change percent', '0').replace('%', ''))
                         
                         if current_price > 0:
-                            return {
-                                'ticker': clean_ticker,
-                                'current_price': current_price,
-                                'previous_close': previous_close,
-                                'change_percent': change_pct,
-                                'volume': int(quote.get('06. volume', 0)),
-                                'market_cap': 'N/A'
-                            }
+                            return Quote(clean_ticker, current_price, previous_close, change_pct,
+                                         volume=int(quote.get('06. volume', 0)), source='alpha_vantage')
                 except Exception as e:
-                    print(f"Alpha Vantage failed for {clean_ticker}: {e}")
+                    failure = e
+                    logger.warning("Alpha Vantage failed for %s: %s", clean_ticker, e,
+                                   extra={'event': 'quote_error', 'ticker': clean_ticker, 'source': 'alpha_vantage'})
             
             # Method 2: Yahoo Finance (backup)
             try:
-                url = f"https://query1.finance.yahoo.com/v8/finance/chart/{clean_ticker}"
+                url = f"{self.yahoo_chart_url}/{clean_ticker}"
                 headers = {
                     'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
                 }
                 
-                response = requests.get(url, headers=headers, timeout=10)
+                with self.metrics.http('yahoo') as call:
+                    response = self.http.get(url, headers=headers, timeout=10)
+                    call['status'] = response.status_code
                 
                 # Check if response is valid JSON
                 if response.status_code == 200 and response.text.strip():
@@ -305,287 +555,531 @@ class WSBScraper:
                         if current_price and current_price > 0:
                             change_pct = ((current_price - previous_close) / previous_close * 100) if previous_close else 0
                             
-                            return {
-                                'ticker': clean_ticker,
-                                'current_price': current_price,
-                                'previous_close': previous_close,
-                                'change_percent': change_pct,
-                                'volume': meta.get('regularMarketVolume', 0),
-                                'market_cap': meta.get('marketCap', 'N/A')
-                            }
+                            return Quote(clean_ticker, current_price, previous_close, change_pct,
+                                         volume=meta.get('regularMarketVolume') or 0,
+                                         market_cap=meta.get('marketCap') or NAN, source='yahoo')
             except Exception as e:
-                print(f"Yahoo Finance failed for {clean_ticker}: {e}")
+                failure = e
+                logger.warning("Yahoo Finance failed for %s: %s", clean_ticker, e,
+                               extra={'event': 'quote_error', 'ticker': clean_ticker, 'source': 'yahoo'})
+            
+            if strict and failure is not None:
+                raise failure
             
             # Method 3: Simple validation - if it's a known ticker, create placeholder data
-            if clean_ticker in self.known_tickers:
-                return {
-                    'ticker': clean_ticker,
-                    'current_price': 100.0,  # Placeholder
-                    'previous_close': 99.0,   # Placeholder
-                    'change_percent': 1.0,    # Placeholder
-                    'volume': 1000000,        # Placeholder
-                    'market_cap': 'N/A'
-                }
+            # (not for word-like symbols such as ALL or IT, which may be plain words)
+            if clean_ticker in self.known_tickers and clean_ticker not in self.extractor.ambiguous:
+                return Quote(clean_ticker, 100.0, 99.0, 1.0, volume=1000000, source='placeholder')
             
             return self._create_empty_stock_data(clean_ticker)
             
         except Exception as e:
-            print(f"Error getting data for {ticker}: {e}")
+            if strict:
+                raise
+            logger.error("Error getting data for %s: %s", ticker, e, extra={'event': 'quote_error', 'ticker': ticker})
             return self._create_empty_stock_data(ticker)
 
     def _create_empty_stock_data(self, ticker):
-        """Helper method to create empty stock data structure"""
-        return {
-            'ticker': ticker,
-            'current_price': 'N/A',
-            'previous_close': 'N/A', 
-            'change_percent': 0,
-            'volume': 'N/A',
-            'market_cap': 'N/A'
-        }
+        """Helper method to create a quote without price data"""
+        return Quote.missing(ticker)
 
     def analyze_ticker(self, ticker_data):
-        """Provide basic analysis for a ticker"""
-        ticker = ticker_data['ticker']
-        price = ticker_data['current_price']
-        change = ticker_data['change_percent']
-        
-        # Basic momentum analysis
-        if change > 5:
-            momentum = "🚀 Strong Bullish"
-        elif change > 2:
-            momentum = "📈 Bullish"
-        elif change > -2:
-            momentum = "➡️ Neutral"
-        elif change > -5:
-            momentum = "📉 Bearish"
-        else:
-            momentum = "🔴 Strong Bearish"
-        
-        # Risk assessment based on price and volatility
-        if isinstance(price, (int, float)):
-            if price < 5:
-                risk = "🔥 High Risk/High Reward"
-            elif price < 20:
-                risk = "⚡ Medium-High Risk"
-            elif price < 50:
-                risk = "⚖️ Medium Risk"
-            else:
-                risk = "🛡️ Lower Risk"
-        else:
-            risk = "❓ Unknown Risk"
-        
-        return {
-            'momentum': momentum,
-            'risk': risk
-        }
+        """Provide basic analysis for a single ticker (prefer analyze_quotes for batches)"""
+        return analyze_quote(ticker_data)
+
+    def create_email_content(self, tickers_data, analysis=None, unusual=None):
+        """Create formatted HTML email content (create_report renders every format)"""
+        return self.create_report(tickers_data, analysis, unusual, formats=('html',))['html']
+
+    def create_report(self, tickers_data, analysis=None, unusual=None, formats=('html', 'text', 'markdown')):
+        """Render the report as {format: document} for html, text and markdown
 
-    def create_email_content(self, tickers_data):
-        """Create formatted HTML email content"""
+        analysis maps ticker -> analyze_quotes() row; it is computed here
+        only if the caller has not already analyzed the run. unusual maps
+        candidate tickers with unusual activity to their relative volume.
+        The card fields are built once and every format renders from them.
+        """
+        if analysis is None:
+            analysis = analysis_by_ticker(analyze_quotes(tickers_data[:REPORT_SIZE]))
         
         buenos_aires_tz = pytz.timezone('America/Argentina/Buenos_Aires')
         current_time = datetime.now(buenos_aires_tz).strftime("%Y-%m-%d %H:%M:%S %Z")
         
-        # HTML email template
-        html_content = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <meta charset="UTF-8">
-            <title>WSB Daily Stock Report</title>
-            <style>
-                body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; }}
-                .header {{ background-color: #1f2937; color: white; padding: 20px; text-align: center; }}
-                .content {{ padding: 20px; }}
-                .ticker-card {{ 
-                    border: 1px solid #ddd; 
-                    border-radius: 8px; 
-                    margin: 10px 0; 
-                    padding: 15px; 
-                    background-color: #f9f9f9; 
-                }}
-                .ticker-name {{ font-size: 18px; font-weight: bold; color: #1f2937; }}
-                .price {{ font-size: 16px; margin: 5px 0; }}
-                .positive {{ color: #059669; }}
-                .negative {{ color: #dc2626; }}
-                .neutral {{ color: #6b7280; }}
-                .insights {{ background-color: #e0f2fe; padding: 15px; border-radius: 8px; margin-top: 20px; }}
-                .footer {{ text-align: center; color: #6b7280; font-size: 12px; margin-top: 30px; }}
-            </style>
-        </head>
-        <body>
-            <div class="header">
-                <h1>🔥 WSB DAILY STOCK REPORT 🔥</h1>
-                <p>📅 {current_time}</p>
-            </div>
-            
-            <div class="content">
-                <h2>🎯 Top Trending Tickers Today:</h2>
-        """
-        
-        for i, data in enumerate(tickers_data[:8], 1):
-            analysis = self.analyze_ticker(data)
-            
-            price_str = f"${data['current_price']:.2f}" if isinstance(data['current_price'], (int, float)) else "N/A"
-            change_str = f"{data['change_percent']:+.2f}%" if isinstance(data['change_percent'], (int, float)) else "N/A"
-            
-            # Determine color class for change
-            change_class = "positive" if data['change_percent'] > 0 else "negative" if data['change_percent'] < 0 else "neutral"
-            
-            html_content += f"""
-                <div class="ticker-card">
-                    <div class="ticker-name">{i}. ${data['ticker']}</div>
-                    <div class="price">💰 Price: {price_str} <span class="{change_class}">({change_str})</span></div>
-                    <div>📊 Momentum: {analysis['momentum']}</div>
-                    <div>⚠️ Risk Level: {analysis['risk']}</div>
-                </div>
-            """
-        
-        html_content += f"""
-                <div class="insights">
-                    <h3>📈 Quick Insights:</h3>
-                    <ul>
-                        <li>Monitor stocks with 🚀 Strong Bullish momentum</li>
-                        <li>🔥 High Risk stocks = Higher potential rewards</li>
-                        <li>Check volume spikes for confirmation</li>
-                        <li>Always use proper position sizing!</li>
-                    </ul>
-                    
-                    <p><strong>💡 Remember: This is not financial advice. Always DYOR!</strong></p>
-                </div>
-                
-                <div class="footer">
-                    <p><em>Generated automatically by WSB Scraper</em></p>
-                    <p>Running from GitHub Actions</p>
-                </div>
-            </div>
-        </body>
-        </html>
-        """
+        sparklines = self.report_sparklines([data.ticker for data in tickers_data[:REPORT_SIZE]])
+        cards = report_cards(tickers_data, analysis, sparklines)
+        return render_report(cards, current_time, unusual, formats)
+
+    def report_sparklines(self, tickers):
+        """Price and mention sparklines for tickers, drawn once per market day"""
+        now = datetime.now(MARKET_TIMEZONE)
+        load_prices = load_mentions = None
+        if self.price_history:
+            def load_prices(tickers):
+                return {t: bars['close'].to_numpy() for t, bars in self.price_history.history_many(tickers).items()}
+        if self.mention_store:
+            def load_mentions(tickers):
+                frame = self.mention_store.load(start=(now - timedelta(days=MENTION_DAYS)).date())
+                return mention_series(rolling_mentions(frame, now.date(), self.subreddits))
         
-        return html_content
+        try:
+            return self.sparklines.get(tickers, now.date(), load_prices, load_mentions)
+        except Exception as e:
+            logger.error("Error drawing sparklines: %s", e)
+            return {}
+
+    def create_delta_email(self, delta, since):
+        """Create the short HTML report of what changed since the snapshot taken at since"""
+        buenos_aires_tz = pytz.timezone('America/Argentina/Buenos_Aires')
+        current_time = datetime.now(buenos_aires_tz).strftime("%Y-%m-%d %H:%M:%S %Z")
+        return render_delta(delta, current_time, since)
 
-    def send_email(self, html_content):
-        """Send email using Gmail API"""
+    def write_markdown_report(self, markdown):
+        """Write the Markdown report to REPORT_MARKDOWN_FILE, if set"""
+        if not self.report_markdown_file:
+            return
+        try:
+            with open(self.report_markdown_file, 'w', encoding='utf-8') as f:
+                f.write(markdown)
+            logger.info("Markdown report written to %s", self.report_markdown_file)
+        except OSError as e:
+            logger.error("Error writing Markdown report: %s", e)
+
+    def send_email(self, html_content, subject=None, text_content=None):
+        """Send email using Gmail API (subject defaults to the daily report's)"""
         if not self.gmail_service:
-            print("Gmail service not initialized")
+            logger.error("Gmail service not initialized")
             return False
             
         try:
-            # Create message
-            message = MIMEMultipart('alternative')
-            message['to'] = self.email_to
-            message['from'] = self.email_from
-            message['subject'] = f"🔥 WSB Daily Stock Report - {datetime.now().strftime('%Y-%m-%d')}"
-            
-            # Add HTML content
-            html_part = MIMEText(html_content, 'html')
-            message.attach(html_part)
-            
-            # Encode message
-            raw = base64.urlsafe_b64encode(message.as_bytes())
-            raw = raw.decode()
+            # Create and encode message
+            raw = build_raw_message(self.email_to, self.email_from, subject or self._email_subject(), html_content,
+                                    text_content)
             
             # Send message
-            send_result = self.gmail_service.users().messages().send(
-                userId='me', body={'raw': raw}).execute()
+            with self.metrics.http('gmail'):
+                send_result = self.gmail_service.users().messages().send(
+                    userId='me', body={'raw': raw}).execute()
             
-            print(f"Email sent successfully! Message ID: {send_result['id']}")
+            logger.info("Email sent successfully! Message ID: %s", send_result['id'], extra={'event': 'email_sent'})
             return True
             
         except Exception as e:
-            print(f"Error sending email: {e}")
+            logger.error("Error sending email: %s", e, extra={'event': 'email_error'})
             return False
 
-    def run_daily_scrape(self):
-        """Main function to run the daily scrape"""
-        print(f"Starting daily scrape at {datetime.now()}")
+    def _email_subject(self):
+        """Subject line shared by every daily report"""
+        return f"🔥 WSB Daily Stock Report - {datetime.now().strftime('%Y-%m-%d')}"
+
+    def send_subscriber_reports(self, tickers_data, analysis=None, unusual=None, skip=()):
+        """Send personalized reports to every subscriber using Gmail batch requests
+
+        Subscribers in skip (already sent by an earlier attempt) are left out.
+        """
+        if not self.gmail_service:
+            logger.error("Gmail service not initialized")
+            return {}
         
-        # Get tickers from both sources
-        swaggy_tickers = self.scrape_swaggy_stocks()
-        reddit_tickers = self.scrape_reddit_wsb()
+        subscribers = load_subscribers(self.subscribers_file, default_email=self.email_to)
+        subscribers = {email: watchlist for email, watchlist in subscribers.items() if email not in skip}
+        groups = group_by_watchlist(subscribers)
+        logger.info("Sending reports to %d subscribers (%d distinct watchlists)", len(subscribers), len(groups))
         
-        # Prioritize valid tickers from scraped results
-        valid_scraped_tickers = []
-        all_scraped = swaggy_tickers + reddit_tickers
+        # Price every watchlist ticker missing from today's results only once
+        quotes = {data.ticker: data for data in tickers_data}
+        for watchlist in groups:
+            for ticker in watchlist:
+                if ticker in quotes:
+                    self.metrics.cache_hit('watchlist_quotes')
+                else:
+                    self.metrics.cache_miss('watchlist_quotes')
+                    quotes[ticker] = self.get_stock_data(ticker)
         
-        # First, get all known valid tickers from scraped results
-        for ticker in all_scraped:
-            if ticker in self.known_tickers:
-                valid_scraped_tickers.append(ticker)
-                print(f"✓ Found known ticker: {ticker}")
+        # Analyze each quote once (reusing the run's analysis) and share it
+        # between all watchlist renders
+        analysis = dict(analysis or {})
+        unanalyzed = [quote for ticker, quote in quotes.items() if ticker not in analysis]
+        if unanalyzed:
+            analysis.update(analysis_by_ticker(analyze_quotes(unanalyzed)))
         
-        # Remove duplicates while preserving order
-        valid_scraped_tickers = list(dict.fromkeys(valid_scraped_tickers))
+        subject = self._email_subject()
+        messages = {}
         
-        # Add popular WSB tickers to ensure we have content
-        popular_wsb_tickers = ['TSLA', 'AAPL', 'NVDA', 'GOOGL', 'MSFT', 'GME', 'AMC', 'PLTR', 'RKT', 'CLOV', 'DNUT', 'WEN']
+        # Render once per distinct watchlist, then address it to each member
+        for watchlist, emails in groups.items():
+            if watchlist:
+                report_data = [quotes[t] for t in watchlist if quotes[t].has_price]
+                report_data.sort(key=lambda q: q.rank_change, reverse=True)
+            else:
+                report_data = tickers_data
+            
+            report = self.create_report(report_data, analysis, unusual, formats=('html', 'text'))
+            for email in emails:
+                messages[email] = build_raw_message(email, self.email_from, subject, report['html'], report['text'])
+        
+        mailer = BatchMailer(self.gmail_service, batch_size=int(os.getenv('GMAIL_BATCH_SIZE', '10')))
+        start = time.perf_counter()
+        results = mailer.send(messages)
+        self.metrics.observe_http('gmail_batch', time.perf_counter() - start)
+        
+        for email, result in results.items():
+            if result['ok']:
+                logger.info("✓ Sent to %s (Message ID: %s)", email, result['message_id'], extra={'event': 'email_sent'})
+            else:
+                logger.warning("✗ Failed for %s after %d attempts: %s", email, result['attempts'], result['error'],
+                               extra={'event': 'email_error'})
+        
+        return results
+
+    def run_daily_scrape(self, run_id=None):
+        """Main function to run the daily scrape
+
+        With checkpoints enabled, each stage's output is saved under the run
+        ID and a rerun with the same ID resumes from the first incomplete
+        stage. The ID defaults to RUN_ID, else a new one per invocation, so
+        resuming is opt-in: separate runs never share checkpoints.
+        """
+        self.metrics = RunMetrics()
+        if self.price_history:
+            self.price_history.metrics = self.metrics
+        if self.profiler:
+            self.profiler.start_run()
+        # Per-run scrape results; a failed scraper must not reuse the last run's
+        self.reddit_kinds = {}
+        self.reddit_sentiment = {}
+        self.swaggy_sentiment = {}
+        self.reddit_options = {}
         
-        # Combine: prioritize scraped valid tickers, then add popular ones
-        final_tickers = valid_scraped_tickers.copy()
-        for ticker in popular_wsb_tickers:
-            if ticker not in final_tickers:
-                final_tickers.append(ticker)
+        run_id = run_id or os.getenv('RUN_ID') or datetime.now(MARKET_TIMEZONE).strftime('%Y-%m-%d-%H%M%S-%f')
+        set_run(run_id)
+        logger.info("Starting daily scrape at %s", datetime.now(), extra={'event': 'run_started'})
+        checkpoint = self._open_checkpoint(run_id)
+        restored = checkpoint.load('quotes') if checkpoint else None
+        if restored is not None:
+            # Scraping and pricing already completed in an earlier attempt
+            candidates = checkpoint.load('candidates') or {}
+            valid_tickers_data = [Quote.from_dict(data) for data in restored]
+            mentions = [Mention(**data) for data in candidates.get('mentions', [])]
+            attempted = candidates.get('attempted', [])
+            self.reddit_sentiment = {t: TickerSentiment.from_dict(s) for t, s in candidates.get('reddit_sentiment', {}).items()}
+            self.swaggy_sentiment = {t: TickerSentiment.from_dict(s) for t, s in candidates.get('swaggy_sentiment', {}).items()}
+            self.reddit_options = {t: OptionsFlow.from_dict(f) for t, f in candidates.get('reddit_options', {}).items()}
+            self.metrics.increment('resumed_stages', 2)
+            logger.info("Resumed %d checkpointed quotes for run %s", len(valid_tickers_data), checkpoint.run_id,
+                        extra={'event': 'resumed'})
+        else:
+            valid_tickers_data, mentions, attempted = self._scrape_and_price()
+            if checkpoint:
+                checkpoint.save('candidates', {
+                    'mentions': [m.to_dict() for m in mentions],
+                    'attempted': attempted,
+                    'reddit_sentiment': {t: s.to_dict() for t, s in self.reddit_sentiment.items()},
+                    'swaggy_sentiment': {t: s.to_dict() for t, s in self.swaggy_sentiment.items()},
+                    'reddit_options': {t: f.to_dict() for t, f in self.reddit_options.items()},
+                })
+                checkpoint.save('quotes', [q.to_dict() for q in valid_tickers_data])
         
-        print(f"SwaggyStocks found tickers: {swaggy_tickers}")
-        print(f"Reddit WSB found tickers: {reddit_tickers}")
-        print(f"Valid scraped tickers: {valid_scraped_tickers}")
-        print(f"Final ticker list: {final_tickers[:15]}")
+        # Sort by change percentage (highest first)
+        valid_tickers_data.sort(key=lambda q: q.rank_change, reverse=True)
         
-        # Get stock data for each ticker
-        valid_tickers_data = []
+        logger.info("Final valid tickers: %s", [q.ticker for q in valid_tickers_data], extra={'event': 'ranked'})
         
-        for ticker in final_tickers[:15]:  # Try up to 15 tickers
-            data = self.get_stock_data(ticker)
-            
-            # Accept both real data and placeholder data for known tickers
-            if (isinstance(data['current_price'], (int, float)) and 
-                data['current_price'] > 0):
-                valid_tickers_data.append(data)
-                print(f"✓ Valid ticker: {ticker} - ${data['current_price']:.2f}")
+        # Volatility indicators for the report and relative volume for every
+        # scraped candidate, from the cached daily history (one concurrent
+        # lookup per ticker, served from memory for the rest of the day)
+        indicators = None
+        unusual = {}
+        if self.price_history:
+            with self._stage('price_history'):
+                priced = [q.ticker for q in valid_tickers_data]
+                candidates = priced + [m.ticker for m in mentions]
+                histories = self.price_history.history_many(candidates)
+                live_volumes = {q.ticker: q.volume for q in valid_tickers_data if q.volume > 0}
+                rvol = relative_volume(histories, live_volumes, session_fraction())
+                indicators = compute_indicators({t: histories[t] for t in priced if t in histories})
+                indicators = indicators.join(rvol[['relative_volume', 'unusual_activity']], how='left')
+                unusual = rvol.loc[rvol['unusual_activity'].astype(bool), 'relative_volume'].round(2).to_dict()
+            self.metrics.increment('unusual_activity', len(unusual))
+            logger.info("Relative volume for %d candidates; unusual activity: %s", len(rvol), sorted(unusual))
+        
+        # Bullish/bearish ratios from Reddit text and SwaggyStocks labels
+        tallies = {ticker: TickerSentiment().merge(tally) for ticker, tally in self.reddit_sentiment.items()}
+        for ticker, tally in self.swaggy_sentiment.items():
+            tallies.setdefault(ticker, TickerSentiment()).merge(tally)
+        sentiment = sentiment_frame(tallies)
+        indicators = sentiment if indicators is None else indicators.join(sentiment, how='left')
+        
+        # Call/put counts of the options positions quoted in Reddit posts
+        indicators = indicators.join(options_frame(self.reddit_options), how='outer')
+        
+        # Analyze the whole batch once; every renderer reuses the result
+        with self._stage('analyze_quotes'):
+            analysis = analysis_by_ticker(analyze_quotes(valid_tickers_data, indicators))
+        
+        # Every candidate with its quote, analysis or rejection reason
+        if self.export_sinks and not (checkpoint and checkpoint.load('export')):
+            self.export_run(run_id, valid_tickers_data, mentions, analysis, attempted)
+            if checkpoint:
+                checkpoint.save('export', {'ok': True})
+        
+        # Snapshot this run; in delta mode, diff it against the previous run
+        delta, since = self.snapshot_delta(run_id, valid_tickers_data, mentions)
+        
+        # Create and send email, skipping whatever an earlier attempt finished
+        sent = send_results(checkpoint.load('send'), self.email_to) if checkpoint else {}
+        if delta is not None and not has_changes(delta):
+            logger.info("Nothing crossed the delta thresholds since %s; no report sent", since, extra={'event': 'delta_skipped'})
+            self.metrics.increment('delta_reports_skipped')
+            success = None
+        elif self.subscribers_file and delta is None:
+            already_sent = {email for email, result in sent.items() if result['ok']}
+            with self._stage('send_subscriber_reports'):
+                results = self.send_subscriber_reports(valid_tickers_data, analysis, unusual, skip=already_sent)
+            results = {**sent, **results}
+            if checkpoint:
+                checkpoint.save('send', results)
+            success = any(result['ok'] for result in results.values())
+        elif sent.get(self.email_to, {}).get('ok'):
+            logger.info("Report for run %s was already sent", checkpoint.run_id)
+            success = True
+        else:
+            rendered = checkpoint.load('html') if checkpoint else None
+            if rendered:
+                html_content = rendered['html']
+                text_content = rendered.get('text')
+                self.metrics.increment('resumed_stages')
             else:
-                print(f"✗ Invalid ticker: {ticker} - No price data")
-            
-            time.sleep(0.2)  # Be nice to APIs
-            
-            # Stop when we have enough valid tickers
-            if len(valid_tickers_data) >= 8:
-                break
+                text_content = None
+                with self._stage('create_email_content'):
+                    if delta is None:
+                        report = self.create_report(valid_tickers_data, analysis, unusual)
+                        html_content, text_content = report['html'], report['text']
+                        self.write_markdown_report(report['markdown'])
+                    else:
+                        html_content = self.create_delta_email(delta, since)
+                if checkpoint:
+                    checkpoint.save('html', {'html': html_content, 'text': text_content, 'delta': delta is not None})
+            subject = None
+            if delta is not None or (rendered and rendered.get('delta')):
+                subject = f"⚡ WSB Intraday Update - {datetime.now().strftime('%Y-%m-%d %H:%M')}"
+            with self._stage('send_email'):
+                success = self.send_email(html_content, subject, text_content)
+            if checkpoint:
+                checkpoint.save('send', {**sent, self.email_to: {'ok': success}})
+        
+        if success is not None:
+            if success:
+                logger.info("Daily report sent successfully!", extra={'event': 'report_sent'})
+            else:
+                logger.error("Failed to send daily report", extra={'event': 'report_failed'})
+            self.metrics.increment('emails_sent' if success else 'email_failures')
+        self.publish_metrics()
+        if self.api_cache:
+            self.refresh_api(valid_tickers_data, analysis)
+        if self.profiler:
+            self.profiler.finish_run()
+        if self.cassette and self.cassette.recording:
+            self.cassette.save()
+        
+        return valid_tickers_data
+
+    def _scrape_and_price(self):
+        """Scrape both sources and price the candidates; return (quotes, mentions, attempted)"""
+        # Scrape both sources and price candidates concurrently: known tickers
+        # and cashtags stream into the quote stage as soon as they are found
+        popular_wsb_tickers = ['TSLA', 'AAPL', 'NVDA', 'GOOGL', 'MSFT', 'GME', 'AMC', 'PLTR', 'RKT', 'CLOV', 'DNUT', 'WEN']
+        
+        # With a job queue, workers do the scraping and pricing instead.
+        # Profiling runs the stages one at a time (one active profiler only),
+        # and so does a replay, so its interactions are served in a fixed order
+        # (with no pause between quotes: the cassette's latency stands in for the APIs)
+        if self.job_queue:
+            pipeline = Coordinator(self.job_queue, self)
+        elif self.cassette and self.cassette.replaying:
+            pipeline = ScrapeQuotePipeline(self, quote_delay=0, overlap=False)
+        else:
+            pipeline = ScrapeQuotePipeline(self, quote_workers=self.quote_workers, overlap=not self.profiler)
+        valid_tickers_data = pipeline.run(popular_wsb_tickers)
+        
+        swaggy_tickers = pipeline.results.get('swaggystocks', [])
+        reddit_tickers = pipeline.results.get('reddit', [])
+        
+        logger.info("SwaggyStocks found tickers: %s", swaggy_tickers)
+        logger.info("Reddit found tickers: %s", reddit_tickers)
+        logger.info("Priced tickers: %s", pipeline.attempted)
+        
+        # Keep the raw counts for backtesting (replays are not real history)
+        if self.mention_store and self.reddit_kinds and not (self.cassette and self.cassette.replaying):
+            stored = self.mention_store.record(datetime.now(MARKET_TIMEZONE), self.reddit_kinds)
+            logger.info("Stored %d mention counts in %s", stored, self.mention_store.path)
         
         if not valid_tickers_data:
-            print("No valid tickers found. Using emergency fallback with placeholder data.")
+            logger.warning("No valid tickers found. Using emergency fallback with placeholder data.", extra={'event': 'fallback'})
             # Emergency ticker system
             emergency_tickers = ['TSLA', 'AAPL', 'NVDA', 'GOOGL', 'MSFT', 'AMC', 'GME', 'RKT', 'DNUT', 'PLTR']
             for ticker in emergency_tickers:
-                valid_tickers_data.append({
-                    'ticker': ticker,
-                    'current_price': 100.0 + len(ticker),  # Simple placeholder pricing
-                    'previous_close': 99.0 + len(ticker),
-                    'change_percent': 1.0,
-                    'volume': 1000000,
-                    'market_cap': 'N/A'
-                })
-                print(f"✓ Emergency ticker: {ticker}")
+                # Simple placeholder pricing
+                valid_tickers_data.append(Quote(ticker, 100.0 + len(ticker), 99.0 + len(ticker), 1.0,
+                                                volume=1000000, source='emergency'))
+                logger.info("✓ Emergency ticker: %s", ticker, extra={'event': 'fallback_ticker', 'ticker': ticker})
         
-        # Sort by change percentage (highest first)
-        valid_tickers_data.sort(key=lambda x: x['change_percent'] if isinstance(x['change_percent'], (int, float)) else -999, reverse=True)
+        return valid_tickers_data, pipeline.mentions, list(pipeline.attempted)
+
+    def export_run(self, run_id, quotes, mentions, analysis, attempted):
+        """Stream this run's candidates to the EXPORT_SINKS sinks"""
+        try:
+            with self._stage('export'):
+                sinks = parse_sinks(self.export_sinks, run_id, self.export_compression)
+                rows = candidate_rows(run_id, datetime.now(MARKET_TIMEZONE), quotes, mentions, analysis,
+                                      attempted, self.known_tickers)
+                exported = RunExporter(sinks).export(rows)
+            self.metrics.increment('exported_candidates', exported)
+            logger.info("Exported %d candidates to %d sinks", exported, len(sinks), extra={'event': 'exported'})
+        except Exception as e:
+            logger.error("Error exporting run: %s", e, extra={'event': 'export_error'})
+
+    def snapshot_delta(self, run_id, quotes, mentions):
+        """Store this run's snapshot and return (delta, since) for a delta report
+
+        Returns (None, None) when the full report should go out instead:
+        REPORT_MODE=full, no earlier snapshot, or (in auto mode) the first
+        run of the market day. Only stored snapshots are compared, so the
+        diff itself never fetches anything.
+        """
+        if not self.snapshot_store or (self.cassette and self.cassette.replaying):
+            return None, None
         
-        print(f"Final valid tickers: {[t['ticker'] for t in valid_tickers_data]}")
+        now = datetime.now(MARKET_TIMEZONE)
+        with self._stage('snapshot'):
+            self.snapshot_store.record(run_id, now, quotes, mentions)
+        if self.report_mode not in ('delta', 'auto'):
+            return None, None
         
-        # Create and send email
-        html_content = self.create_email_content(valid_tickers_data)
-        success = self.send_email(html_content)
+        previous = self.snapshot_store.previous(run_id)
+        if previous is None:
+            logger.info("No earlier snapshot to compare with; sending the full report")
+            return None, None
+        previous_id, since = previous
+        if self.report_mode == 'auto' and not since.startswith(now.strftime('%Y-%m-%d')):
+            logger.info("First run of the market day; sending the full report")
+            return None, None
         
-        if success:
-            print("Daily report sent successfully!")
-        else:
-            print("Failed to send daily report")
+        with self._stage('delta'):
+            delta = compute_delta(self.snapshot_store.load(previous_id), self.snapshot_store.load(run_id),
+                                  **self.delta_thresholds)
+        logger.info("Delta since run %s: %s", previous_id, ", ".join(f"{len(rows)} {kind}" for kind, rows in delta.items()),
+                    extra={'event': 'delta'})
+        return delta, since
+
+    def price_candidate(self, ticker, source=None):
+        """Fetch a quote for a candidate and return it if it has a usable price"""
+        start = time.perf_counter()
+        with self._stage('get_stock_data'):
+            data = self.get_stock_data(ticker)
+        latency_ms = round((time.perf_counter() - start) * 1000, 1)
         
-        return valid_tickers_data
+        # Accept both real data and placeholder data for known tickers
+        if data.has_price:
+            self.metrics.increment('valid_tickers')
+            logger.info("✓ Valid ticker: %s (%s) - $%.2f [%s]", ticker, source, data.current_price, data.source,
+                        extra={'event': 'quote', 'ticker': ticker, 'latency_ms': latency_ms,
+                               'source': data.source, 'candidate_source': source})
+            return data
+        
+        self.metrics.increment('invalid_tickers')
+        logger.info("✗ Invalid ticker: %s (%s) - No price data", ticker, source,
+                    extra={'event': 'quote', 'ticker': ticker, 'latency_ms': latency_ms, 'candidate_source': source})
+        return None
+
+    def _open_checkpoint(self, run_id):
+        """Checkpoint directory of this run (None when disabled or replaying)"""
+        if not self.checkpoint_dir or (self.cassette and self.cassette.replaying):
+            return None
+        
+        expired = expire_checkpoints(self.checkpoint_dir, self.checkpoint_max_age)
+        if expired:
+            logger.info("Removed %d expired run checkpoints", expired)
+        
+        checkpoint = RunCheckpoint(self.checkpoint_dir, run_id)
+        completed = checkpoint.completed()
+        if completed:
+            logger.info("Resuming run %s; completed stages: %s", run_id, ', '.join(completed))
+        return checkpoint
+
+    @contextmanager
+    def _stage(self, name):
+        """Time a pipeline stage (and tag its log events), profiling it too when --profile is on"""
+        with self.metrics.stage(name), log_stage(name):
+            if self.profiler:
+                with self.profiler.stage(name):
+                    yield
+            else:
+                yield
+
+    def refresh_api(self, quotes, analysis):
+        """Rebuild the API documents from this run's results and stored history"""
+        try:
+            now = datetime.now(MARKET_TIMEZONE)
+            mentions = None
+            if self.mention_store:
+                mentions = self.mention_store.load(start=(now - timedelta(days=MENTION_DAYS)).date())
+            load_histories = self.price_history.history_many if self.price_history else None
+            self.api_cache.refresh(build_documents(now, quotes, analysis, mentions, load_histories, self.subreddits))
+            logger.info("API cache refreshed (%d ranked tickers)", len(quotes))
+        except Exception as e:
+            logger.error("Error refreshing API cache: %s", e)
+
+    def publish_metrics(self):
+        """Write the JSON run report and feed the Prometheus exporter"""
+        if self.metrics_dir:
+            path = self.metrics.write_json(self.metrics_dir)
+            logger.info("Run report written to %s", path)
+        if self.exporter:
+            self.exporter.add_run(self.metrics)
+
+def parse_args():
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="WSB daily stock scraper")
+    parser.add_argument('--profile', nargs='?', const='profiles', metavar='DIR',
+                        help="profile CPU and memory per stage and write the results to DIR (default: profiles)")
+    parser.add_argument('--record', metavar='CASSETTE',
+                        help="record every external interaction of the run to a cassette file")
+    parser.add_argument('--replay', metavar='CASSETTE',
+                        help="run offline, serving every external interaction from a cassette file")
+    parser.add_argument('--replay-latency', type=float, default=0.0, metavar='SECONDS',
+                        help="latency injected into each replayed interaction")
+    parser.add_argument('--replay-failure-rate', type=float, default=0.0, metavar='P',
+                        help="probability that a replayed interaction fails")
+    parser.add_argument('--replay-seed', type=int, default=0,
+                        help="random seed for injected failures")
+    parser.add_argument('--worker', action='store_true',
+                        help="process scrape and quote jobs from JOB_QUEUE_DB instead of running reports")
+    return parser.parse_args()
+
+def create_cassette(args):
+    """Build the record/replay cassette requested on the command line, if any"""
+    if args.replay:
+        return Cassette(args.replay, 'replay', latency=args.replay_latency,
+                        failure_rate=args.replay_failure_rate, seed=args.replay_seed)
+    if args.record:
+        return Cassette(args.record, 'record')
+    return None
+
+def run_worker(scraper):
+    """Process jobs from the shared queue until interrupted"""
+    if not scraper.job_queue:
+        logger.error("--worker needs JOB_QUEUE_DB to point at the coordinator's job queue")
+        return
+    try:
+        JobWorker(scraper.job_queue, scraper).run_forever()
+    except KeyboardInterrupt:
+        logger.info("Worker stopped")
 
 def main():
     """Main function for GitHub Actions"""
-    print("🚀 Starting WSB Scraper (GitHub Actions Mode)")
+    args = parse_args()
+    setup_logging()
+    logger.info("🚀 Starting WSB Scraper (GitHub Actions Mode)")
     
     # Check if all required environment variables are set
     required_vars = [
@@ -594,24 +1088,36 @@ def main():
         'EMAIL_TO', 'EMAIL_FROM'
     ]
     
+    if args.worker:
+        # Workers only scrape and price; they send no email
+        required_vars = [var for var in required_vars if not var.startswith('EMAIL_')]
+    
+    cassette = create_cassette(args)
     missing_vars = [var for var in required_vars if not os.getenv(var)]
-    if missing_vars:
-        print(f"❌ Missing environment variables: {missing_vars}")
+    if missing_vars and not (cassette and cassette.replaying):
+        logger.error("❌ Missing environment variables: %s", missing_vars)
         return
     
     try:
-        scraper = WSBScraper()
+        scraper = WSBScraper(cassette=cassette, gmail=not args.worker)
+        if args.profile:
+            scraper.profiler = StageProfiler(args.profile)
+        
+        # Worker processes only serve the shared job queue
+        if args.worker:
+            run_worker(scraper)
+            return
         
         # Run the scrape
         result = scraper.run_daily_scrape()
         
         if result:
-            print(f"✅ Successfully processed {len(result)} tickers")
+            logger.info("✅ Successfully processed %d tickers", len(result))
         else:
-            print("⚠️ No tickers processed")
+            logger.warning("⚠️ No tickers processed")
             
     except Exception as e:
-        print(f"❌ Error running scraper: {e}")
+        logger.error("❌ Error running scraper: %s", e)
         raise
 
 if __name__ == "__main__":
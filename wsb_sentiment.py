@@ -0,0 +1,162 @@
+import math
+import re
+from bisect import bisect_left, bisect_right
+
+import pandas as pd
+
+# WSB lexicon: positive scores are bullish, negative bearish
+LEXICON = {
+    # Emojis
+    '🚀': 2.0, '🌙': 1.5, '🌕': 1.5, '💎🙌': 1.5, '💎': 1.0, '🙌': 0.5, '🦍': 1.0, '🐂': 1.5,
+    '📈': 1.5, '💰': 1.0, '🤑': 1.0, '🔥': 0.5,
+    '🌈🐻': -2.0, '🐻': -1.5, '📉': -1.5, '🩸': -1.0, '💀': -1.0, '🤡': -0.5, '🧻🙌': -1.0,
+    # Options and positioning
+    'calls': 1.5, 'call options': 1.5, 'leaps': 1.0, 'long': 1.0, 'buying': 1.0, 'bought': 0.5,
+    'holding': 0.5, 'hold': 0.5, 'hodl': 1.0, 'averaging down': 0.5, 'loading up': 1.5, 'loaded': 1.0,
+    'puts': -1.5, 'put options': -1.5, 'short': -1.0, 'shorting': -1.5, 'shorts': -1.0,
+    'selling': -1.0, 'sold': -0.5, 'bagholder': -1.0, 'bagholding': -1.0, 'bags': -0.5,
+    # Price action
+    'moon': 1.5, 'mooning': 2.0, 'to the moon': 2.0, 'squeeze': 1.5, 'short squeeze': 2.0, 'gamma squeeze': 2.0,
+    'rip': 1.0, 'ripping': 1.5, 'breakout': 1.5, 'undervalued': 1.5, 'printing': 1.5, 'tendies': 1.5,
+    'gains': 1.0, 'green': 1.0, 'pump': 0.5, 'bullish': 2.0, 'bull': 1.0, 'buy the dip': 1.5,
+    'crash': -2.0, 'crashing': -2.0, 'tank': -1.5, 'tanking': -2.0, 'dump': -1.5, 'dumping': -1.5,
+    'drill': -1.5, 'drilling': -1.5, 'rug pull': -2.0, 'overvalued': -1.5, 'bubble': -1.0,
+    'red': -1.0, 'losses': -1.0, 'loss porn': -1.0, 'bearish': -2.0, 'bear': -1.0, 'dead': -1.5,
+    'bankrupt': -2.0, 'bankruptcy': -2.0, 'dilution': -1.5, 'worthless': -2.0, 'guh': -1.5,
+}
+
+# A negation right before a term, or one short word before it, flips it
+# ("not selling", "no more puts")
+NEGATIONS = ('not', 'no', 'never', "don't", 'dont', "isn't", "won't", "ain't", 'stop')
+
+# Characters on each side of a ticker whose terms count towards it
+WINDOW_CHARS = 80
+
+# Window scores at or beyond these count as bullish / bearish mentions
+BULLISH_SCORE = 0.5
+BEARISH_SCORE = -0.5
+
+
+def _alternation(terms):
+    # Longest first so phrases win over their first word
+    return '|'.join(re.escape(term) for term in sorted(terms, key=len, reverse=True))
+
+
+# Precompiled once and matched against lowercased text in a single scan:
+# negations and lexicon words on word boundaries, emojis anywhere
+TERMS = re.compile(
+    r"\b(?P<negation>" + _alternation(NEGATIONS) + r")\b|"
+    r'\b(?:' + _alternation(t for t in LEXICON if t[0].isalnum()) + r')\b|'
+    + _alternation(t for t in LEXICON if not t[0].isalnum()))
+# Characters allowed between a negation and the term it flips
+NEGATION_REACH = 12
+
+
+class TickerSentiment:
+    """Running bullish/bearish tally of one ticker's mentions"""
+
+    __slots__ = ('bullish', 'bearish', 'neutral', 'score')
+
+    def __init__(self, bullish=0, bearish=0, neutral=0, score=0.0):
+        self.bullish = bullish
+        self.bearish = bearish
+        self.neutral = neutral
+        self.score = score
+
+    def add(self, score):
+        self.score += score
+        if score >= BULLISH_SCORE:
+            self.bullish += 1
+        elif score <= BEARISH_SCORE:
+            self.bearish += 1
+        else:
+            self.neutral += 1
+
+    def merge(self, other):
+        self.bullish += other.bullish
+        self.bearish += other.bearish
+        self.neutral += other.neutral
+        self.score += other.score
+        return self
+
+    @property
+    def mentions(self):
+        return self.bullish + self.bearish + self.neutral
+
+    @property
+    def bullish_ratio(self):
+        """Share of opinionated mentions that are bullish (NaN if none)"""
+        opinionated = self.bullish + self.bearish
+        return self.bullish / opinionated if opinionated else math.nan
+
+    def to_dict(self):
+        return {'bullish': self.bullish, 'bearish': self.bearish, 'neutral': self.neutral,
+                'score': self.score, 'bullish_ratio': self.bullish_ratio}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['bullish'], data['bearish'], data['neutral'], data['score'])
+
+    def __repr__(self):
+        return f"TickerSentiment(bullish={self.bullish}, bearish={self.bearish}, neutral={self.neutral})"
+
+
+class SentimentScorer:
+    """Score the text around each ticker mention with the WSB lexicon
+
+    The mentions are the spans TickerExtractor.count_mentions counted, so
+    only what it took for a ticker is scored (not every "it" or "now" of a
+    post). Each text with a mention is scanned once for lexicon terms, and
+    every mention then sums the terms within WINDOW_CHARS of it using a
+    binary search over the term positions. No per-mention model calls.
+    """
+
+    def __init__(self, window=WINDOW_CHARS):
+        self.window = window
+
+    def score_texts(self, texts, spans, tallies=None):
+        """Add the mentions in texts to {ticker: TickerSentiment}
+
+        spans holds one list of (start, end, ticker) per text, as filled in
+        by TickerExtractor.count_mentions.
+        """
+        tallies = {} if tallies is None else tallies
+        window = self.window
+
+        for text, text_spans in zip(texts, spans):
+            if not text_spans:
+                continue
+            lower = text.lower()
+            if len(lower) != len(text):
+                # Case mapping changed the length; keep positions aligned
+                lower = text
+
+            positions = []
+            scores = []
+            negation_end = -NEGATION_REACH - 1
+            for match in TERMS.finditer(lower):
+                if match.lastgroup == 'negation':
+                    negation_end = match.end()
+                    continue
+                start = match.start()
+                score = LEXICON[match.group()]
+                positions.append(start)
+                scores.append(-score if start - negation_end <= NEGATION_REACH else score)
+
+            for start, end, ticker in text_spans:
+                low = bisect_left(positions, start - window)
+                high = bisect_right(positions, end + window)
+                tally = tallies.get(ticker)
+                if tally is None:
+                    tally = tallies[ticker] = TickerSentiment()
+                tally.add(sum(scores[low:high]))
+
+        return tallies
+
+
+def sentiment_frame(tallies):
+    """Tallies as a DataFrame indexed by ticker (bullish_ratio, sentiment_mentions)"""
+    return pd.DataFrame({
+        'bullish_ratio': {ticker: tally.bullish_ratio for ticker, tally in tallies.items()},
+        'sentiment_mentions': {ticker: tally.mentions for ticker, tally in tallies.items()},
+    }, columns=['bullish_ratio', 'sentiment_mentions'], dtype='float64')